@@ -36,13 +36,20 @@ from openai import OpenAI
 from phone_agent import PhoneAgent
 from phone_agent.agent import AgentConfig
 from phone_agent.agent_ios import IOSAgentConfig, IOSPhoneAgent
+from phone_agent.capture import CaptureConfig
 from phone_agent.config.apps import list_supported_apps
 from phone_agent.config.apps_harmonyos import list_supported_apps as list_harmonyos_apps
 from phone_agent.config.apps_ios import list_supported_apps as list_ios_apps
 from phone_agent.device_factory import DeviceType, get_device_factory, set_device_type
-from phone_agent.utils import LogConfig
-from phone_agent.model import ModelConfig
+from phone_agent.utils import ImageConfig, LogConfig
+from phone_agent.model import (
+    ContextConfig,
+    HedgeConfig,
+    ModelConfig,
+    ThinkingBudgetConfig,
+)
 from phone_agent.xctest import XCTestConnection
+from phone_agent.xctest.mjpeg import MJPEGConfig
 from phone_agent.xctest import list_devices as list_ios_devices
 
 
@@ -421,6 +428,48 @@ Examples:
         help="Model API base URL",
     )
 
+    parser.add_argument(
+        "--endpoints",
+        type=str,
+        default=os.getenv("PHONE_AGENT_ENDPOINTS"),
+        help="Comma-separated model API base URLs to route requests across (overrides --base-url)",
+    )
+
+    parser.add_argument(
+        "--routing-policy",
+        type=str,
+        choices=["least_outstanding", "ttft"],
+        default="least_outstanding",
+        help="How to pick an endpoint when --endpoints is set",
+    )
+
+    parser.add_argument(
+        "--sticky-sessions",
+        action="store_true",
+        help="Keep the agent on one endpoint so the server's prefix cache is reused",
+    )
+
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send a duplicate request to another of --endpoints when the first token is unusually late (up to 5%% extra load)",
+    )
+
+    parser.add_argument(
+        "--guided-decoding",
+        type=str,
+        choices=["regex", "grammar"],
+        default=os.getenv("PHONE_AGENT_GUIDED_DECODING"),
+        help="Constrain the model's action to the action syntax (vLLM guided_regex or guided_grammar)",
+    )
+
+    parser.add_argument(
+        "--thinking-budget",
+        type=int,
+        default=None,
+        help="Thinking tokens allowed per step before the answer is forced (lower after Back/Home/Wait)",
+    )
+
     parser.add_argument(
         "--model",
         type=str,
@@ -567,6 +616,67 @@ Examples:
         help="Custom session name for log files",
     )
 
+    # Model image options
+    parser.add_argument(
+        "--image-max-edge",
+        type=int,
+        default=int(os.getenv("PHONE_AGENT_IMAGE_MAX_EDGE", "0")) or None,
+        help="Downscale screenshots so the longer side is at most this many pixels",
+    )
+
+    parser.add_argument(
+        "--image-max-pixels",
+        type=int,
+        default=int(os.getenv("PHONE_AGENT_IMAGE_MAX_PIXELS", "0")) or None,
+        help="Downscale screenshots to at most this many pixels (width * height)",
+    )
+
+    parser.add_argument(
+        "--image-patch-multiple",
+        type=int,
+        default=int(os.getenv("PHONE_AGENT_IMAGE_PATCH_MULTIPLE", "0")) or None,
+        help="Snap screenshot sides to a multiple of the vision encoder patch size (e.g. 28)",
+    )
+
+    parser.add_argument(
+        "--image-format",
+        type=str,
+        choices=["png", "jpeg", "webp"],
+        default=os.getenv("PHONE_AGENT_IMAGE_FORMAT"),
+        help="Encoding of screenshots sent to the model (default: keep captured format)",
+    )
+
+    parser.add_argument(
+        "--background-capture",
+        action="store_true",
+        help="Capture screenshots continuously in a background service (Android/HarmonyOS only)",
+    )
+
+    parser.add_argument(
+        "--mjpeg",
+        action="store_true",
+        help="Take screenshots from WebDriverAgent's MJPEG stream instead of per-step requests (iOS only)",
+    )
+
+    parser.add_argument(
+        "--early-dispatch",
+        action="store_true",
+        help="Start executing the action as soon as it is generated (Android/HarmonyOS only)",
+    )
+
+    parser.add_argument(
+        "--warm-up",
+        action="store_true",
+        help="Prefill the system prompt on the model server before the first step",
+    )
+
+    parser.add_argument(
+        "--context-turns",
+        type=int,
+        default=None,
+        help="Keep only the last N turns' thinking in the history and cap its size (default: unbounded)",
+    )
+
     parser.add_argument(
         "task",
         nargs="?",
@@ -794,25 +904,69 @@ def main():
         sys.exit(1)
 
     # Check model API connectivity and model availability
-    if not check_model_api(args.base_url, args.model, args.apikey):
-        sys.exit(1)
+    endpoints = (
+        [url.strip() for url in args.endpoints.split(",") if url.strip()]
+        if args.endpoints
+        else []
+    )
 
     # Create configurations and agent based on device type
-    model_config = ModelConfig(
-        base_url=args.base_url,
-        model_name=args.model,
-        api_key=args.apikey,
-        lang=args.lang,
-    )
+    try:
+        model_config = ModelConfig(
+            base_url=endpoints[0] if endpoints else args.base_url,
+            model_name=args.model,
+            api_key=args.apikey,
+            lang=args.lang,
+            endpoints=endpoints,
+            routing_policy=args.routing_policy,
+            sticky_sessions=args.sticky_sessions,
+            hedge=HedgeConfig() if args.hedge else None,
+            guided_decoding=args.guided_decoding,
+            thinking_budget=(
+                ThinkingBudgetConfig(max_tokens=args.thinking_budget)
+                if args.thinking_budget
+                else None
+            ),
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    for base_url in endpoints or [args.base_url]:
+        if not check_model_api(base_url, args.model, args.apikey):
+            sys.exit(1)
 
     # Create separate scoring model config if scoring parameters are provided
     scoring_model_config = None
     if args.scoring_base_url or args.scoring_model or args.scoring_apikey:
         scoring_model_config = ModelConfig(
-            base_url=args.scoring_base_url or args.base_url,
+            base_url=args.scoring_base_url or model_config.base_url,
             model_name=args.scoring_model or args.model,
             api_key=args.scoring_apikey or args.apikey,
             lang=args.lang,
+            endpoints=[] if args.scoring_base_url else endpoints,
+            routing_policy=args.routing_policy,
+        )
+
+    # Bound the conversation history if requested
+    context_config = (
+        ContextConfig(keep_recent_turns=args.context_turns)
+        if args.context_turns is not None
+        else None
+    )
+
+    # Create image preparation config if any image option is provided
+    image_config = None
+    if (
+        args.image_max_edge
+        or args.image_max_pixels
+        or args.image_patch_multiple
+        or args.image_format
+    ):
+        image_config = ImageConfig(
+            max_long_edge=args.image_max_edge,
+            max_pixels=args.image_max_pixels,
+            patch_multiple=args.image_patch_multiple,
+            output_format=args.image_format,
         )
 
     if device_type == DeviceType.IOS:
@@ -834,6 +988,10 @@ def main():
             enable_logging=enable_logging,
             log_config=log_config,
             session_name=args.session_name,
+            image_config=image_config,
+            context_config=context_config,
+            warm_up=args.warm_up,
+            mjpeg_config=MJPEGConfig() if args.mjpeg else None,
         )
 
         agent = IOSPhoneAgent(
@@ -859,6 +1017,11 @@ def main():
             enable_logging=enable_logging,
             log_config=log_config,
             session_name=args.session_name,
+            image_config=image_config,
+            context_config=context_config,
+            warm_up=args.warm_up,
+            capture_config=CaptureConfig() if args.background_capture else None,
+            early_dispatch=args.early_dispatch,
         )
 
         agent = PhoneAgent(
@@ -875,7 +1038,11 @@ def main():
         print("Phone Agent - AI-powered phone automation")
     print("=" * 50)
     print(f"Model: {model_config.model_name}")
-    print(f"Base URL: {model_config.base_url}")
+    if model_config.endpoints:
+        print(f"Endpoints: {', '.join(model_config.endpoints)}")
+        print(f"Routing: {model_config.routing_policy}")
+    else:
+        print(f"Base URL: {model_config.base_url}")
     print(f"Max Steps: {agent_config.max_steps}")
     print(f"Language: {agent_config.lang}")
     print(f"Device Type: {args.device_type.upper()}")
@@ -0,0 +1,207 @@
+"""Guided-decoding grammar for the action DSL and a parser for well-formed actions."""
+
+import ast
+import re
+from functools import lru_cache
+from typing import Any
+
+# Keyword arguments of each action, in the order the model writes them:
+# action name -> {argument: (kind, required)}, where kind is "string" or
+# "point" ([x, y] in 0-1000). Handlers declare theirs as ARGUMENTS.
+ActionArguments = dict[str, dict[str, tuple[str, bool]]]
+
+# Free text whose value is taken verbatim, matching the legacy parser
+_RAW_TEXT_ACTIONS = {"Type", "Type_Name"}
+
+# Value patterns. A string that ends the call may contain unescaped quotes
+# (free text such as Type text), since only the final '")' closes it.
+_SEP = r", ?"
+_POINT = r"\[\d{1,4}, ?\d{1,4}\]"
+_STRING = r'"(?:[^"\\\n]|\\.)*"'
+_LAST_STRING = r'"[^\n]*"'
+_FINISH = r'finish\(message="[^\n]*"\)'
+_FINISH_CAPTURE = re.compile(r'finish\(message="([^\n]*)"\)')
+_ACTION_NAME = re.compile(r'do\(action="([^"]+)"')
+
+
+def handler_arguments(handler: type) -> ActionArguments:
+    """
+    Get a handler's argument table, checked against its HANDLERS.
+
+    Args:
+        handler: Action handler class with HANDLERS and ARGUMENTS.
+
+    Returns:
+        The handler's ARGUMENTS.
+
+    Raises:
+        ValueError: If the two tables do not name the same actions.
+    """
+    missing = handler.HANDLERS.keys() - handler.ARGUMENTS.keys()
+    extra = handler.ARGUMENTS.keys() - handler.HANDLERS.keys()
+    if missing or extra:
+        raise ValueError(
+            f"{handler.__name__}.ARGUMENTS does not match HANDLERS: "
+            f"missing {sorted(missing)}, extra {sorted(extra)}"
+        )
+    return handler.ARGUMENTS
+
+
+def build_action_regex(arguments: ActionArguments) -> str:
+    """
+    Build a regex for a full response: free thinking, then one action call.
+
+    The thinking prefix is unconstrained; the constraint is that the output
+    can only end with a well-formed call (and an optional </answer>).
+
+    Args:
+        arguments: Argument table of the actions accepted by the handler.
+
+    Returns:
+        Regex suitable for vLLM's guided_regex.
+    """
+    calls = [
+        _call_pattern(name, tuple(spec.items()), capture=False)
+        for name, spec in arguments.items()
+    ]
+    return r"[\s\S]*(?:" + "|".join(calls + [_FINISH]) + r")(?:\n?</answer>)?"
+
+
+def build_action_grammar(arguments: ActionArguments) -> str:
+    """
+    Build an EBNF (GBNF-style) grammar equivalent to build_action_regex.
+
+    Args:
+        arguments: Argument table of the actions accepted by the handler.
+
+    Returns:
+        Grammar suitable for vLLM's guided_grammar.
+    """
+    rules = [
+        "root ::= thinking call answer-close?",
+        "thinking ::= [^\\x00]*",
+        'answer-close ::= "\\n"? "</answer>"',
+        'call ::= "finish(message=" last-string ")" | "do(action=" do-args ")"',
+        "do-args ::= " + " | ".join(_rule_name(name) for name in arguments),
+    ]
+    for name, spec in arguments.items():
+        parts = ['"\\"' + name + '\\""']
+        for index, (arg, (kind, required)) in enumerate(spec.items()):
+            value = "point"
+            if kind == "string":
+                value = "last-string" if index == len(spec) - 1 else "string"
+            part = f'sep "{arg}=" {value}'
+            parts.append(part if required else f"( {part} )?")
+        rules.append(f"{_rule_name(name)} ::= " + " ".join(parts))
+    rules += [
+        'sep ::= "," " "?',
+        'point ::= "[" [0-9]+ sep [0-9]+ "]"',
+        'string ::= "\\"" ( [^"\\\\\\n] | "\\\\" [^\\n] )* "\\""',
+        'last-string ::= "\\"" [^\\n]* "\\""',
+    ]
+    return "\n".join(rules) + "\n"
+
+
+@lru_cache(maxsize=None)
+def guided_decoding_params(kind: str, handler: type) -> dict[str, str]:
+    """
+    Get the extra_body parameters that constrain decoding to the action DSL.
+
+    Args:
+        kind: 'regex' (guided_regex) or 'grammar' (guided_grammar).
+        handler: Action handler class whose actions are accepted.
+
+    Returns:
+        Dictionary to merge into the request's extra_body.
+
+    Raises:
+        ValueError: If the kind is unknown or the handler's tables disagree.
+    """
+    arguments = handler_arguments(handler)
+    if kind == "regex":
+        return {"guided_regex": build_action_regex(arguments)}
+    if kind == "grammar":
+        return {"guided_grammar": build_action_grammar(arguments)}
+    raise ValueError(f"Unknown guided decoding kind: {kind}")
+
+
+def parse_well_formed(
+    response: str, arguments: ActionArguments
+) -> dict[str, Any] | None:
+    """
+    Parse an action that matches the grammar exactly, without the AST.
+
+    Args:
+        response: Stripped action string.
+        arguments: Argument table of the actions accepted by the handler.
+
+    Returns:
+        Action dictionary in the same shape as parse_action, or None if the
+        string is not well-formed and needs the general parser.
+    """
+    if response.startswith("finish("):
+        match = _FINISH_CAPTURE.fullmatch(response)
+        if match is None:
+            return None
+        return {"_metadata": "finish", "message": match.group(1)}
+
+    match = _ACTION_NAME.match(response)
+    if match is None or match.group(1) not in arguments:
+        return None
+    name = match.group(1)
+    pattern, kinds = _call_parser(name, tuple(arguments[name].items()))
+    match = pattern.fullmatch(response)
+    if match is None:
+        return None
+
+    if name in _RAW_TEXT_ACTIONS:
+        return {"_metadata": "do", "action": "Type", "text": match.group(1)}
+
+    action: dict[str, Any] = {"_metadata": "do", "action": name}
+    for (arg, kind), value in zip(kinds, match.groups()):
+        if value is None:
+            continue
+        if kind == "point":
+            action[arg] = [int(number) for number in re.findall(r"\d+", value)]
+        elif "\\" in value:
+            try:
+                action[arg] = ast.literal_eval(f'"{value}"')
+            except (SyntaxError, ValueError):
+                action[arg] = value
+        else:
+            action[arg] = value
+    return action
+
+
+def _call_pattern(
+    name: str, spec: tuple[tuple[str, tuple[str, bool]], ...], capture: bool
+) -> str:
+    """Regex for one do(...) call, optionally capturing argument values."""
+    pattern = r'do\(action="' + re.escape(name) + '"'
+    for index, (arg, (kind, required)) in enumerate(spec):
+        if kind == "point":
+            value = _POINT
+        elif index == len(spec) - 1:
+            value = _LAST_STRING
+        else:
+            value = _STRING
+        if capture:
+            # Capture the value without its quotes
+            value = f"({value})" if kind == "point" else f'"({value[1:-1]})"'
+        part = _SEP + re.escape(arg) + "=" + value
+        pattern += part if required else f"(?:{part})?"
+    return pattern + r"\)"
+
+
+@lru_cache(maxsize=None)
+def _call_parser(
+    name: str, spec: tuple[tuple[str, tuple[str, bool]], ...]
+) -> tuple[re.Pattern, list[tuple[str, str]]]:
+    """Compiled capturing pattern and (argument, kind) list for an action."""
+    kinds = [(arg, kind) for arg, (kind, _) in spec]
+    return re.compile(_call_pattern(name, spec, capture=True)), kinds
+
+
+def _rule_name(name: str) -> str:
+    """Grammar rule name for an action, e.g. 'Double Tap' -> 'action-double-tap'."""
+    return "action-" + re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
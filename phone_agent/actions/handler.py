@@ -4,11 +4,14 @@ import ast
 import re
 import subprocess
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Any, Callable
 
+from phone_agent.actions.grammar import ActionArguments, parse_well_formed
 from phone_agent.config.timing import TIMING_CONFIG
 from phone_agent.device_factory import get_device_factory
+from phone_agent.utils.settle import wait_after_action
 
 
 @dataclass
@@ -21,6 +24,22 @@ class ActionResult:
     requires_confirmation: bool = False
 
 
+# Actions that need no user interaction and can run on the dispatch thread
+# while the model response is still being finalized
+EARLY_DISPATCH_ACTIONS = {
+    "Launch",
+    "Tap",
+    "Type",
+    "Type_Name",
+    "Swipe",
+    "Back",
+    "Home",
+    "Double Tap",
+    "Long Press",
+    "Wait",
+}
+
+
 class ActionHandler:
     """
     Handles execution of actions from AI model output.
@@ -32,6 +51,43 @@ class ActionHandler:
         takeover_callback: Optional callback for takeover requests (login, captcha).
     """
 
+    # Action name -> handler method
+    HANDLERS = {
+        "Launch": "_handle_launch",
+        "Tap": "_handle_tap",
+        "Type": "_handle_type",
+        "Type_Name": "_handle_type",
+        "Swipe": "_handle_swipe",
+        "Back": "_handle_back",
+        "Home": "_handle_home",
+        "Double Tap": "_handle_double_tap",
+        "Long Press": "_handle_long_press",
+        "Wait": "_handle_wait",
+        "Take_over": "_handle_takeover",
+        "Note": "_handle_note",
+        "Call_API": "_handle_call_api",
+        "Interact": "_handle_interact",
+    }
+
+    # Keyword arguments of each action in HANDLERS (see grammar.ActionArguments);
+    # the guided-decoding grammar and the fast parser are built from it
+    ARGUMENTS: ActionArguments = {
+        "Launch": {"app": ("string", True)},
+        "Tap": {"element": ("point", True), "message": ("string", False)},
+        "Type": {"text": ("string", True)},
+        "Type_Name": {"text": ("string", True)},
+        "Swipe": {"start": ("point", True), "end": ("point", True)},
+        "Back": {},
+        "Home": {},
+        "Double Tap": {"element": ("point", True)},
+        "Long Press": {"element": ("point", True)},
+        "Wait": {"duration": ("string", True)},
+        "Take_over": {"message": ("string", True)},
+        "Note": {"message": ("string", True)},
+        "Call_API": {"instruction": ("string", True)},
+        "Interact": {},
+    }
+
     def __init__(
         self,
         device_id: str | None = None,
@@ -41,6 +97,54 @@ class ActionHandler:
         self.device_id = device_id
         self.confirmation_callback = confirmation_callback or self._default_confirmation
         self.takeover_callback = takeover_callback or self._default_takeover
+        self._executor: ThreadPoolExecutor | None = None
+
+    def dispatch(
+        self, action_text: str, screen_width: int, screen_height: int
+    ) -> tuple[dict[str, Any], Future] | None:
+        """
+        Parse an action string and start executing it in the background.
+
+        Used to begin device I/O as soon as the model has produced a complete
+        action, while the client is still finishing the response. Actions are
+        executed one at a time, in submission order.
+
+        Args:
+            action_text: Action string from the model, e.g. 'do(action="Tap", ...)'.
+            screen_width: Current screen width in pixels.
+            screen_height: Current screen height in pixels.
+
+        Returns:
+            Tuple of (parsed action, Future resolving to the ActionResult), or
+            None if the action cannot be parsed or needs user interaction
+            (confirmation, takeover) and must be executed by the caller.
+        """
+        try:
+            action = parse_action(action_text)
+        except ValueError:
+            return None
+
+        if (
+            action.get("_metadata") != "do"
+            or action.get("action") not in EARLY_DISPATCH_ACTIONS
+            or "message" in action
+        ):
+            return None
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="action"
+            )
+        future = self._executor.submit(
+            self.execute, action, screen_width, screen_height
+        )
+        return action, future
+
+    def close(self) -> None:
+        """Shut down the dispatch thread."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
 
     def execute(
         self, action: dict[str, Any], screen_width: int, screen_height: int
@@ -89,23 +193,8 @@ class ActionHandler:
 
     def _get_handler(self, action_name: str) -> Callable | None:
         """Get the handler method for an action."""
-        handlers = {
-            "Launch": self._handle_launch,
-            "Tap": self._handle_tap,
-            "Type": self._handle_type,
-            "Type_Name": self._handle_type,
-            "Swipe": self._handle_swipe,
-            "Back": self._handle_back,
-            "Home": self._handle_home,
-            "Double Tap": self._handle_double_tap,
-            "Long Press": self._handle_long_press,
-            "Wait": self._handle_wait,
-            "Take_over": self._handle_takeover,
-            "Note": self._handle_note,
-            "Call_API": self._handle_call_api,
-            "Interact": self._handle_interact,
-        }
-        return handlers.get(action_name)
+        method_name = self.HANDLERS.get(action_name)
+        return getattr(self, method_name) if method_name else None
 
     def _convert_relative_to_absolute(
         self, element: list[int], screen_width: int, screen_height: int
@@ -156,22 +245,29 @@ class ActionHandler:
 
         # Switch to ADB keyboard
         original_ime = device_factory.detect_and_set_adb_keyboard(self.device_id)
-        time.sleep(TIMING_CONFIG.action.keyboard_switch_delay)
+        self._wait_for_settle(TIMING_CONFIG.action.keyboard_switch_delay)
 
         # Clear existing text and type new text
         device_factory.clear_text(self.device_id)
-        time.sleep(TIMING_CONFIG.action.text_clear_delay)
+        self._wait_for_settle(TIMING_CONFIG.action.text_clear_delay)
 
         # Handle multiline text by splitting on newlines
         device_factory.type_text(text, self.device_id)
-        time.sleep(TIMING_CONFIG.action.text_input_delay)
+        self._wait_for_settle(TIMING_CONFIG.action.text_input_delay)
 
         # Restore original keyboard
         device_factory.restore_keyboard(original_ime, self.device_id)
-        time.sleep(TIMING_CONFIG.action.keyboard_restore_delay)
+        self._wait_for_settle(TIMING_CONFIG.action.keyboard_restore_delay)
 
         return ActionResult(True, False)
 
+    def _wait_for_settle(self, delay: float) -> None:
+        """Wait between text input steps, returning early once the screen settles."""
+        device_factory = get_device_factory()
+        wait_after_action(
+            "type", delay, lambda: device_factory.get_settle_frame(self.device_id)
+        )
+
     def _handle_swipe(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle swipe action."""
         start = action.get("start")
@@ -310,12 +406,9 @@ class ActionHandler:
                     )
         else:
             # ADB devices use standard input keyevent command
-            cmd_prefix = ["adb", "-s", self.device_id] if self.device_id else ["adb"]
-            subprocess.run(
-                cmd_prefix + ["shell", "input", "keyevent", keycode],
-                capture_output=True,
-                text=True,
-            )
+            from phone_agent.adb.shell import run_shell_command
+
+            run_shell_command(self.device_id, ["input", "keyevent", keycode])
 
     @staticmethod
     def _default_confirmation(message: str) -> bool:
@@ -345,6 +438,11 @@ def parse_action(response: str) -> dict[str, Any]:
     print(f"Parsing action: {response}")
     try:
         response = response.strip()
+        # Output produced under guided decoding takes the fast path
+        action = parse_well_formed(response, ActionHandler.ARGUMENTS)
+        if action is not None:
+            return action
+
         if response.startswith('do(action="Type"') or response.startswith(
             'do(action="Type_Name"'
         ):
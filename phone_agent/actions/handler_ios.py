@@ -4,6 +4,8 @@ import time
 from dataclasses import dataclass
 from typing import Any, Callable
 
+from phone_agent.actions.grammar import ActionArguments
+from phone_agent.utils.settle import wait_after_action
 from phone_agent.xctest import (
     back,
     double_tap,
@@ -13,7 +15,8 @@ from phone_agent.xctest import (
     swipe,
     tap,
 )
-from phone_agent.xctest.input import clear_text, hide_keyboard, type_text
+from phone_agent.xctest.input import hide_keyboard, replace_text
+from phone_agent.xctest.screenshot import get_settle_frame
 
 
 @dataclass
@@ -38,6 +41,43 @@ class IOSActionHandler:
         takeover_callback: Optional callback for takeover requests (login, captcha).
     """
 
+    # Action name -> handler method
+    HANDLERS = {
+        "Launch": "_handle_launch",
+        "Tap": "_handle_tap",
+        "Type": "_handle_type",
+        "Type_Name": "_handle_type",
+        "Swipe": "_handle_swipe",
+        "Back": "_handle_back",
+        "Home": "_handle_home",
+        "Double Tap": "_handle_double_tap",
+        "Long Press": "_handle_long_press",
+        "Wait": "_handle_wait",
+        "Take_over": "_handle_takeover",
+        "Note": "_handle_note",
+        "Call_API": "_handle_call_api",
+        "Interact": "_handle_interact",
+    }
+
+    # Keyword arguments of each action in HANDLERS (see grammar.ActionArguments);
+    # the guided-decoding grammar of the iOS agent is built from it
+    ARGUMENTS: ActionArguments = {
+        "Launch": {"app": ("string", True)},
+        "Tap": {"element": ("point", True), "message": ("string", False)},
+        "Type": {"text": ("string", True)},
+        "Type_Name": {"text": ("string", True)},
+        "Swipe": {"start": ("point", True), "end": ("point", True)},
+        "Back": {},
+        "Home": {},
+        "Double Tap": {"element": ("point", True)},
+        "Long Press": {"element": ("point", True)},
+        "Wait": {"duration": ("string", True)},
+        "Take_over": {"message": ("string", True)},
+        "Note": {"message": ("string", True)},
+        "Call_API": {"instruction": ("string", True)},
+        "Interact": {},
+    }
+
     def __init__(
         self,
         wda_url: str = "http://localhost:8100",
@@ -97,23 +137,8 @@ class IOSActionHandler:
 
     def _get_handler(self, action_name: str) -> Callable | None:
         """Get the handler method for an action."""
-        handlers = {
-            "Launch": self._handle_launch,
-            "Tap": self._handle_tap,
-            "Type": self._handle_type,
-            "Type_Name": self._handle_type,
-            "Swipe": self._handle_swipe,
-            "Back": self._handle_back,
-            "Home": self._handle_home,
-            "Double Tap": self._handle_double_tap,
-            "Long Press": self._handle_long_press,
-            "Wait": self._handle_wait,
-            "Take_over": self._handle_takeover,
-            "Note": self._handle_note,
-            "Call_API": self._handle_call_api,
-            "Interact": self._handle_interact,
-        }
-        return handlers.get(action_name)
+        method_name = self.HANDLERS.get(action_name)
+        return getattr(self, method_name) if method_name else None
 
     def _convert_relative_to_absolute(
         self, element: list[int], screen_width: int, screen_height: int
@@ -129,9 +154,7 @@ class IOSActionHandler:
         if not app_name:
             return ActionResult(False, False, "No app name specified")
 
-        success = launch_app(
-            app_name, wda_url=self.wda_url, session_id=self.session_id
-        )
+        success = launch_app(app_name, wda_url=self.wda_url, session_id=self.session_id)
         if success:
             return ActionResult(True, False)
         return ActionResult(False, False, f"App not found: {app_name}")
@@ -162,19 +185,22 @@ class IOSActionHandler:
         """Handle text input action."""
         text = action.get("text", "")
 
-        # Clear existing text and type new text
-        clear_text(wda_url=self.wda_url, session_id=self.session_id)
-        time.sleep(0.5)
-
-        type_text(text, wda_url=self.wda_url, session_id=self.session_id)
-        time.sleep(0.5)
+        # The field was focused by the preceding Tap; clear it, then type
+        replace_text(text, wda_url=self.wda_url, session_id=self.session_id)
+        self._wait_for_settle(0.5)
 
         # Hide keyboard after typing
         hide_keyboard(wda_url=self.wda_url, session_id=self.session_id)
-        time.sleep(0.5)
+        self._wait_for_settle(0.5)
 
         return ActionResult(True, False)
 
+    def _wait_for_settle(self, delay: float) -> None:
+        """Wait between text input steps, returning early once the screen settles."""
+        wait_after_action(
+            "type", delay, lambda: get_settle_frame(self.wda_url, self.session_id)
+        )
+
     def _handle_swipe(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle swipe action."""
         start = action.get("start")
@@ -23,11 +23,20 @@ from phone_agent.adb.input import (
     restore_keyboard,
     type_text,
 )
-from phone_agent.adb.screenshot import get_screenshot
+from phone_agent.adb.screenshot import get_screenshot, get_settle_frame
+from phone_agent.adb.transport import (
+    ADBProtocolError,
+    ADBServiceOpenError,
+    ADBTransport,
+    get_transport,
+    run_adb_exec_out,
+    run_adb_shell,
+)
 
 __all__ = [
     # Screenshot
     "get_screenshot",
+    "get_settle_frame",
     # Input
     "type_text",
     "clear_text",
@@ -48,4 +57,11 @@ __all__ = [
     "ConnectionType",
     "quick_connect",
     "list_devices",
+    # Native transport
+    "ADBTransport",
+    "ADBProtocolError",
+    "ADBServiceOpenError",
+    "get_transport",
+    "run_adb_shell",
+    "run_adb_exec_out",
 ]
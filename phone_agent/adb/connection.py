@@ -6,6 +6,7 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Optional
 
+from phone_agent.adb.transport import run_adb_shell
 from phone_agent.config.timing import TIMING_CONFIG
 
 
@@ -265,12 +266,7 @@ class ADBConnection:
             IP address string or None if not found.
         """
         try:
-            cmd = [self.adb_path]
-            if device_id:
-                cmd.extend(["-s", device_id])
-            cmd.extend(["shell", "ip", "route"])
-
-            result = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", timeout=5)
+            result = run_adb_shell(device_id, ["ip", "route"], timeout=5)
 
             # Parse IP from route output
             for line in result.stdout.split("\n"):
@@ -281,14 +277,7 @@ class ADBConnection:
                             return parts[i + 1]
 
             # Alternative: try wlan0 interface
-            cmd[-1] = "ip addr show wlan0"
-            result = subprocess.run(
-                cmd[:-1] + ["shell", "ip", "addr", "show", "wlan0"],
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                timeout=5,
-            )
+            result = run_adb_shell(device_id, ["ip", "addr", "show", "wlan0"], timeout=5)
 
             for line in result.stdout.split("\n"):
                 if "inet " in line:
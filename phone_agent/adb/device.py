@@ -1,12 +1,22 @@
 """Device control utilities for Android automation."""
 
 import os
-import subprocess
+import re
 import time
 from typing import List, Optional, Tuple
 
-from phone_agent.config.apps import APP_PACKAGES
+from phone_agent.adb.screenshot import get_settle_frame
+from phone_agent.adb.shell import run_shell_command
+from phone_agent.adb.touch import send_double_tap, send_long_press, send_swipe, send_tap
+from phone_agent.config.apps import APP_PACKAGES, PACKAGE_APP_NAMES
 from phone_agent.config.timing import TIMING_CONFIG
+from phone_agent.utils.settle import wait_after_action
+
+# Package name in a component string such as "com.tencent.mm/.ui.LauncherUI"
+_COMPONENT_PACKAGE = re.compile(r"([A-Za-z][\w]*(?:\.[\w]+)+)/")
+
+# Cached ro.build.version.sdk per device
+_sdk_levels: dict[str | None, int] = {}
 
 
 def get_current_app(device_id: str | None = None) -> str:
@@ -19,25 +29,39 @@ def get_current_app(device_id: str | None = None) -> str:
     Returns:
         The app name if recognized, otherwise "System Home".
     """
-    adb_prefix = _get_adb_prefix(device_id)
-
-    result = subprocess.run(
-        adb_prefix + ["shell", "dumpsys", "window"], capture_output=True, text=True, encoding="utf-8"
-    )
-    output = result.stdout
+    # Only the focus lines are needed; grep on the device instead of
+    # transferring and scanning the whole window dump
+    output = run_shell_command(device_id, [_focus_query(device_id)]).stdout
+    if not output.strip():
+        output = run_shell_command(device_id, ["dumpsys", "window"]).stdout
     if not output:
         raise ValueError("No output from dumpsys window")
 
     # Parse window focus info
     for line in output.split("\n"):
         if "mCurrentFocus" in line or "mFocusedApp" in line:
-            for app_name, package in APP_PACKAGES.items():
-                if package in line:
+            for package in _COMPONENT_PACKAGE.findall(line):
+                app_name = PACKAGE_APP_NAMES.get(package)
+                if app_name:
                     return app_name
 
     return "System Home"
 
 
+def _focus_query(device_id: str | None) -> str:
+    """Get the shell command listing the focused window, chosen per SDK level."""
+    if device_id not in _sdk_levels:
+        result = run_shell_command(device_id, ["getprop", "ro.build.version.sdk"])
+        try:
+            _sdk_levels[device_id] = int(result.stdout.strip())
+        except ValueError:
+            _sdk_levels[device_id] = 0
+
+    # Android 10+ moved the focus fields from "windows" to "displays"
+    section = "displays" if _sdk_levels[device_id] >= 29 else "windows"
+    return f"dumpsys window {section} | grep -E 'mCurrentFocus|mFocusedApp'"
+
+
 def tap(
     x: int, y: int, device_id: str | None = None, delay: float | None = None
 ) -> None:
@@ -53,12 +77,9 @@ def tap(
     if delay is None:
         delay = TIMING_CONFIG.device.default_tap_delay
 
-    adb_prefix = _get_adb_prefix(device_id)
-
-    subprocess.run(
-        adb_prefix + ["shell", "input", "tap", str(x), str(y)], capture_output=True
-    )
-    time.sleep(delay)
+    if not send_tap(x, y, device_id):
+        run_shell_command(device_id, ["input", "tap", str(x), str(y)])
+    _wait_after_action("tap", delay, device_id)
 
 
 def double_tap(
@@ -76,16 +97,12 @@ def double_tap(
     if delay is None:
         delay = TIMING_CONFIG.device.default_double_tap_delay
 
-    adb_prefix = _get_adb_prefix(device_id)
-
-    subprocess.run(
-        adb_prefix + ["shell", "input", "tap", str(x), str(y)], capture_output=True
-    )
-    time.sleep(TIMING_CONFIG.device.double_tap_interval)
-    subprocess.run(
-        adb_prefix + ["shell", "input", "tap", str(x), str(y)], capture_output=True
-    )
-    time.sleep(delay)
+    interval = TIMING_CONFIG.device.double_tap_interval
+    if not send_double_tap(x, y, interval, device_id):
+        run_shell_command(device_id, ["input", "tap", str(x), str(y)])
+        time.sleep(interval)
+        run_shell_command(device_id, ["input", "tap", str(x), str(y)])
+    _wait_after_action("double_tap", delay, device_id)
 
 
 def long_press(
@@ -108,14 +125,12 @@ def long_press(
     if delay is None:
         delay = TIMING_CONFIG.device.default_long_press_delay
 
-    adb_prefix = _get_adb_prefix(device_id)
-
-    subprocess.run(
-        adb_prefix
-        + ["shell", "input", "swipe", str(x), str(y), str(x), str(y), str(duration_ms)],
-        capture_output=True,
-    )
-    time.sleep(delay)
+    if not send_long_press(x, y, duration_ms, device_id):
+        run_shell_command(
+            device_id,
+            ["input", "swipe", str(x), str(y), str(x), str(y), str(duration_ms)],
+        )
+    _wait_after_action("long_press", delay, device_id)
 
 
 def swipe(
@@ -142,29 +157,26 @@ def swipe(
     if delay is None:
         delay = TIMING_CONFIG.device.default_swipe_delay
 
-    adb_prefix = _get_adb_prefix(device_id)
-
     if duration_ms is None:
         # Calculate duration based on distance
         dist_sq = (start_x - end_x) ** 2 + (start_y - end_y) ** 2
         duration_ms = int(dist_sq / 1000)
         duration_ms = max(1000, min(duration_ms, 2000))  # Clamp between 1000-2000ms
 
-    subprocess.run(
-        adb_prefix
-        + [
-            "shell",
-            "input",
-            "swipe",
-            str(start_x),
-            str(start_y),
-            str(end_x),
-            str(end_y),
-            str(duration_ms),
-        ],
-        capture_output=True,
-    )
-    time.sleep(delay)
+    if not send_swipe(start_x, start_y, end_x, end_y, duration_ms, device_id):
+        run_shell_command(
+            device_id,
+            [
+                "input",
+                "swipe",
+                str(start_x),
+                str(start_y),
+                str(end_x),
+                str(end_y),
+                str(duration_ms),
+            ],
+        )
+    _wait_after_action("swipe", delay, device_id)
 
 
 def back(device_id: str | None = None, delay: float | None = None) -> None:
@@ -178,12 +190,8 @@ def back(device_id: str | None = None, delay: float | None = None) -> None:
     if delay is None:
         delay = TIMING_CONFIG.device.default_back_delay
 
-    adb_prefix = _get_adb_prefix(device_id)
-
-    subprocess.run(
-        adb_prefix + ["shell", "input", "keyevent", "4"], capture_output=True
-    )
-    time.sleep(delay)
+    run_shell_command(device_id, ["input", "keyevent", "4"])
+    _wait_after_action("back", delay, device_id)
 
 
 def home(device_id: str | None = None, delay: float | None = None) -> None:
@@ -197,12 +205,8 @@ def home(device_id: str | None = None, delay: float | None = None) -> None:
     if delay is None:
         delay = TIMING_CONFIG.device.default_home_delay
 
-    adb_prefix = _get_adb_prefix(device_id)
-
-    subprocess.run(
-        adb_prefix + ["shell", "input", "keyevent", "KEYCODE_HOME"], capture_output=True
-    )
-    time.sleep(delay)
+    run_shell_command(device_id, ["input", "keyevent", "KEYCODE_HOME"])
+    _wait_after_action("home", delay, device_id)
 
 
 def launch_app(
@@ -225,13 +229,11 @@ def launch_app(
     if app_name not in APP_PACKAGES:
         return False
 
-    adb_prefix = _get_adb_prefix(device_id)
     package = APP_PACKAGES[app_name]
 
-    subprocess.run(
-        adb_prefix
-        + [
-            "shell",
+    run_shell_command(
+        device_id,
+        [
             "monkey",
             "-p",
             package,
@@ -239,14 +241,11 @@ def launch_app(
             "android.intent.category.LAUNCHER",
             "1",
         ],
-        capture_output=True,
     )
-    time.sleep(delay)
+    _wait_after_action("launch", delay, device_id)
     return True
 
 
-def _get_adb_prefix(device_id: str | None) -> list:
-    """Get ADB command prefix with optional device specifier."""
-    if device_id:
-        return ["adb", "-s", device_id]
-    return ["adb"]
+def _wait_after_action(action: str, delay: float, device_id: str | None) -> None:
+    """Wait after an action, returning early once the screen settles if enabled."""
+    wait_after_action(action, delay, lambda: get_settle_frame(device_id))
@@ -2,15 +2,48 @@
 
 import base64
 import os
-import subprocess
+import struct
 import tempfile
+import time
 import uuid
 from dataclasses import dataclass
-from io import BytesIO
 from typing import Tuple
 
 from PIL import Image
 
+from phone_agent.adb.touch import note_screen_size
+from phone_agent.adb.transport import pull_file, run_adb_exec_out, run_adb_shell
+from phone_agent.capture.service import get_capture_service
+from phone_agent.config.screenshot import ScreenshotConfig, get_screenshot_config
+from phone_agent.config.timing import TIMING_CONFIG
+from phone_agent.utils.image import (
+    PNG_SIGNATURE,
+    black_image_base64,
+    encode_image,
+    get_image_size,
+)
+from phone_agent.utils.settle import thumbnail_from_screenshot
+
+# Devices on which `adb exec-out` produced unusable output; these go straight
+# to the screencap-to-sdcard + pull path on subsequent captures.
+_exec_out_unsupported: set[str | None] = set()
+
+# Raw screencap pixel formats (android.graphics.PixelFormat) with 4 bytes per
+# pixel, mapped to the PIL raw mode that drops the alpha byte while unpacking.
+_RAW_PIXEL_FORMATS = {
+    1: "RGBX",  # RGBA_8888
+    2: "RGBX",  # RGBX_8888
+    5: "BGRX",  # BGRA_8888
+}
+
+# Settle frames only transfer this many framebuffer rows, spread evenly over
+# the full height so changes anywhere (e.g. the keyboard) are seen
+_SETTLE_ROWS = 48
+_SETTLE_FILE = "/data/local/tmp/.phone_agent_settle"
+
+# Raw framebuffer layout per device: (width, height, pixel_format, header_size)
+_raw_layouts: dict[str | None, tuple[int, int, int, int]] = {}
+
 
 @dataclass
 class Screenshot:
@@ -20,6 +53,7 @@ class Screenshot:
     width: int
     height: int
     is_sensitive: bool = False
+    mime_type: str = "image/png"
 
 
 def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screenshot:
@@ -34,19 +68,261 @@ def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screensho
         Screenshot object containing base64 data and dimensions.
 
     Note:
+        PNG bytes are streamed over `adb exec-out`; if that is not usable on
+        the device, falls back to screencap-to-sdcard followed by `adb pull`.
+        With capture_mode="raw" in ScreenshotConfig, the uncompressed
+        framebuffer is read instead and encoded on the host.
         If the screenshot fails (e.g., on sensitive screens like payment pages),
         a black fallback image is returned with is_sensitive=True.
     """
+    config = get_screenshot_config()
+    screenshot = None
+    if config.capture_mode == "raw" and device_id not in _exec_out_unsupported:
+        screenshot = _get_screenshot_raw(device_id, timeout, config)
+
+    if screenshot is None and device_id not in _exec_out_unsupported:
+        screenshot = _get_screenshot_exec_out(device_id, timeout)
+
+    if screenshot is None:
+        screenshot = _get_screenshot_pull(device_id, timeout)
+    if not screenshot.is_sensitive:
+        # A turned screen invalidates the touch backend's cached rotation
+        note_screen_size(device_id, screenshot.width, screenshot.height)
+    return screenshot
+
+
+def _get_screenshot_exec_out(device_id: str | None, timeout: int) -> Screenshot | None:
+    """
+    Capture a screenshot by streaming PNG bytes from `adb exec-out`.
+
+    The PNG produced by screencap is forwarded to the model as-is: dimensions
+    are read from the IHDR chunk, so the image is never decoded or re-encoded.
+
+    Args:
+        device_id: Optional ADB device ID.
+        timeout: Timeout in seconds.
+
+    Returns:
+        Screenshot object, or None if the caller should fall back to the
+        pull-based capture.
+    """
+    try:
+        result = run_adb_exec_out(device_id, ["screencap", "-p"], timeout=timeout)
+    except Exception as e:
+        print(f"Screenshot error: {e}")
+        return _create_fallback_screenshot(is_sensitive=False)
+
+    data = result.stdout
+    if not data.startswith(PNG_SIGNATURE):
+        # Check for screenshot failure (sensitive screen)
+        output = (data + result.stderr).decode("utf-8", errors="ignore")
+        if "Status: -1" in output or "Failed" in output:
+            return _create_fallback_screenshot(is_sensitive=True)
+        if data:
+            # Output arrived but is not a PNG (e.g. adbd rewrote line endings)
+            _exec_out_unsupported.add(device_id)
+        return None
+
+    size = get_image_size(data)
+    if size is None:
+        _exec_out_unsupported.add(device_id)
+        return None
+    width, height = size
+
+    return Screenshot(
+        base64_data=base64.b64encode(data).decode("ascii"),
+        width=width,
+        height=height,
+        is_sensitive=False,
+    )
+
+
+def get_settle_frame(device_id: str | None = None) -> Image.Image | None:
+    """
+    Capture a small grayscale frame for settle detection.
+
+    Reuses the background capture service's frames when one runs for the
+    device. Otherwise reads the raw framebuffer, so the device does not
+    spend time on PNG compression, and only a few rows spread over the full
+    height are sent over adb: the frame is written to a file on the device
+    and each row is read from it with dd.
+
+    Args:
+        device_id: Optional ADB device ID.
+
+    Returns:
+        Grayscale thumbnail, or None if the screen cannot be captured.
+    """
+    width = TIMING_CONFIG.settle.thumbnail_width
+    service = get_capture_service(device_id)
+    if service is not None:
+        frame = service.get_frame(newer_than=time.time(), timeout=5)
+        return thumbnail_from_screenshot(frame, width)
+
+    if device_id in _exec_out_unsupported:
+        return thumbnail_from_screenshot(_get_screenshot_pull(device_id, 5), width)
+
+    layout = _raw_layouts.get(device_id)
+    if layout is None:
+        # First frame of the device: read it in full to learn the layout
+        result = run_adb_exec_out(device_id, ["screencap"], timeout=5)
+        img = _raw_to_image(result.stdout)
+        if img is None:
+            return None
+        layout = struct.unpack_from("<III", result.stdout) + (
+            len(result.stdout) - img.width * img.height * 4,
+        )
+        _raw_layouts[device_id] = layout
+        frame_width, frame_height, pixel_format, header_size = layout
+        row_bytes = frame_width * 4
+        pixels = memoryview(result.stdout)[header_size:]
+        data = b"".join(
+            pixels[row * row_bytes : (row + 1) * row_bytes]
+            for row in _settle_rows(frame_height)
+        )
+    else:
+        frame_width, frame_height, pixel_format, header_size = layout
+        row_bytes = frame_width * 4
+        rows = _settle_rows(frame_height)
+        # dd seeks in whole rows, so the header is stripped while writing
+        command = (
+            f"screencap | tail -c +{header_size + 1} > {_SETTLE_FILE} && "
+            f"for r in {' '.join(map(str, rows))}; do "
+            f"dd if={_SETTLE_FILE} bs={row_bytes} skip=$r count=1 2>/dev/null; "
+            "done"
+        )
+        data = run_adb_exec_out(device_id, command.split(), timeout=5).stdout
+        if len(data) != len(rows) * row_bytes:
+            # Rotated or resized display; relearn the layout on the next frame
+            _raw_layouts.pop(device_id, None)
+            return None
+
+    img = Image.frombuffer(
+        "RGB",
+        (frame_width, len(data) // row_bytes),
+        data,
+        "raw",
+        _RAW_PIXEL_FORMATS[pixel_format],
+        0,
+        1,
+    )
+    # Keep every sampled row; only the width is reduced
+    return img.resize((width, img.height), Image.Resampling.NEAREST).convert("L")
+
+
+def _settle_rows(frame_height: int) -> list[int]:
+    """Indices of the framebuffer rows sampled for settle frames."""
+    count = min(_SETTLE_ROWS, frame_height)
+    return [(2 * i + 1) * frame_height // (2 * count) for i in range(count)]
+
+
+def _get_screenshot_raw(
+    device_id: str | None, timeout: int, config: ScreenshotConfig
+) -> Screenshot | None:
+    """
+    Capture the raw framebuffer via `adb exec-out screencap` and encode on the host.
+
+    Skips PNG compression on the device. The alpha channel is dropped on
+    the host and the image is encoded with the codec selected in
+    ScreenshotConfig.
+
+    Args:
+        device_id: Optional ADB device ID.
+        timeout: Timeout in seconds.
+        config: Screenshot configuration with the output codec settings.
+
+    Returns:
+        Screenshot object, or None if the caller should fall back to the
+        PNG capture path.
+    """
+    try:
+        result = run_adb_exec_out(device_id, ["screencap"], timeout=timeout)
+    except Exception as e:
+        print(f"Screenshot error: {e}")
+        return _create_fallback_screenshot(is_sensitive=False)
+
+    data = result.stdout
+    img = _raw_to_image(data)
+    if img is None:
+        output = (data[:256] + result.stderr).decode("utf-8", errors="ignore")
+        if "Status: -1" in output or "Failed" in output:
+            return _create_fallback_screenshot(is_sensitive=True)
+        return None
+
+    encoded, mime_type = encode_image(img, config)
+
+    return Screenshot(
+        base64_data=base64.b64encode(encoded).decode("ascii"),
+        width=img.width,
+        height=img.height,
+        is_sensitive=False,
+        mime_type=mime_type,
+    )
+
+
+def _raw_to_image(data: bytes) -> Image.Image | None:
+    """
+    Convert raw screencap output to an RGB image.
+
+    The header is width, height and pixel format as little-endian uint32,
+    followed by a uint32 color space on Android 12+.
+
+    With NumPy (the "raw-capture" extra), the pixels are read through a view
+    of the adb output and the channels are copied once into a contiguous RGB
+    array; without it, PIL drops the alpha byte while unpacking.
+    """
+    if len(data) < 12:
+        return None
+
+    width, height, pixel_format = struct.unpack_from("<III", data)
+    raw_mode = _RAW_PIXEL_FORMATS.get(pixel_format)
+    pixel_bytes = width * height * 4
+    header_size = len(data) - pixel_bytes
+    if raw_mode is None or width == 0 or header_size not in (12, 16):
+        return None
+
+    try:
+        import numpy as np
+    except ImportError:
+        # PIL unpacks and drops the alpha byte in a single pass
+        return Image.frombuffer(
+            "RGB",
+            (width, height),
+            memoryview(data)[header_size:],
+            "raw",
+            raw_mode,
+            0,
+            1,
+        )
+
+    pixels = np.frombuffer(
+        data, dtype=np.uint8, count=pixel_bytes, offset=header_size
+    ).reshape(height, width, 4)
+    rgb = pixels[:, :, 2::-1] if raw_mode == "BGRX" else pixels[:, :, :3]
+    # A strided view would make fromarray copy through tobytes() first
+    return Image.fromarray(np.ascontiguousarray(rgb), "RGB")
+
+
+def _get_screenshot_pull(device_id: str | None, timeout: int) -> Screenshot:
+    """
+    Capture a screenshot via screencap to /sdcard followed by `adb pull`.
+
+    Slower than exec-out, kept as a fallback for devices where exec-out
+    output is broken (e.g. old adbd versions that mangle line endings).
+
+    Args:
+        device_id: Optional ADB device ID.
+        timeout: Timeout in seconds.
+
+    Returns:
+        Screenshot object.
+    """
     temp_path = os.path.join(tempfile.gettempdir(), f"screenshot_{uuid.uuid4()}.png")
-    adb_prefix = _get_adb_prefix(device_id)
 
     try:
         # Execute screenshot command
-        result = subprocess.run(
-            adb_prefix + ["shell", "screencap", "-p", "/sdcard/tmp.png"],
-            capture_output=True,
-            text=True,
-            timeout=timeout,
+        result = run_adb_shell(
+            device_id, ["screencap", "-p", "/sdcard/tmp.png"], timeout=timeout
         )
 
         # Check for screenshot failure (sensitive screen)
@@ -55,29 +331,24 @@ def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screensho
             return _create_fallback_screenshot(is_sensitive=True)
 
         # Pull screenshot to local temp path
-        subprocess.run(
-            adb_prefix + ["pull", "/sdcard/tmp.png", temp_path],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-
-        if not os.path.exists(temp_path):
+        if not pull_file(device_id, "/sdcard/tmp.png", temp_path, timeout=5):
             return _create_fallback_screenshot(is_sensitive=False)
 
-        # Read and encode image
-        img = Image.open(temp_path)
-        width, height = img.size
-
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
-        # Cleanup
+        # Forward the PNG as-is; the size comes from its header
+        with open(temp_path, "rb") as f:
+            data = f.read()
         os.remove(temp_path)
 
+        size = get_image_size(data)
+        if size is None:
+            return _create_fallback_screenshot(is_sensitive=False)
+        width, height = size
+
         return Screenshot(
-            base64_data=base64_data, width=width, height=height, is_sensitive=False
+            base64_data=base64.b64encode(data).decode("ascii"),
+            width=width,
+            height=height,
+            is_sensitive=False,
         )
 
     except Exception as e:
@@ -85,24 +356,12 @@ def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screensho
         return _create_fallback_screenshot(is_sensitive=False)
 
 
-def _get_adb_prefix(device_id: str | None) -> list:
-    """Get ADB command prefix with optional device specifier."""
-    if device_id:
-        return ["adb", "-s", device_id]
-    return ["adb"]
-
-
 def _create_fallback_screenshot(is_sensitive: bool) -> Screenshot:
     """Create a black fallback image when screenshot fails."""
     default_width, default_height = 1080, 2400
 
-    black_img = Image.new("RGB", (default_width, default_height), color="black")
-    buffered = BytesIO()
-    black_img.save(buffered, format="PNG")
-    base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
     return Screenshot(
-        base64_data=base64_data,
+        base64_data=black_image_base64(default_width, default_height),
         width=default_width,
         height=default_height,
         is_sensitive=is_sensitive,
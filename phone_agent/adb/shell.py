@@ -0,0 +1,56 @@
+"""Persistent `adb shell` sessions for low-latency device commands."""
+
+import atexit
+import subprocess
+
+from phone_agent.adb.transport import run_adb_shell
+from phone_agent.utils.shell import DeviceShell, DeviceShells
+
+_shells = DeviceShells(
+    lambda device_id: (["adb", "-s", device_id] if device_id else ["adb"]) + ["shell"],
+    lambda device_id, args, timeout: run_adb_shell(device_id, args, timeout=timeout),
+)
+
+
+def get_device_shell(device_id: str | None = None) -> DeviceShell:
+    """
+    Get the persistent shell session for a device, creating it on first use.
+
+    Args:
+        device_id: Optional ADB device ID.
+
+    Returns:
+        DeviceShell for the device.
+    """
+    return _shells.get(device_id)
+
+
+def run_shell_command(
+    device_id: str | None, args: list[str], timeout: float | None = None
+) -> subprocess.CompletedProcess:
+    """
+    Run a shell command through the device's persistent session.
+
+    Falls back to a one-shot `adb shell` only if the command never reached
+    the session; a session lost mid-command raises instead of rerunning it.
+
+    Args:
+        device_id: Optional ADB device ID.
+        args: Shell command arguments, joined with spaces like the adb client does.
+        timeout: Timeout in seconds.
+
+    Returns:
+        CompletedProcess with text stdout and the exit code.
+
+    Raises:
+        EOFError: If the session closed while the command was running.
+    """
+    return _shells.run(device_id, args, timeout)
+
+
+def close_device_shells() -> None:
+    """Terminate all persistent shell sessions."""
+    _shells.close()
+
+
+atexit.register(close_device_shells)
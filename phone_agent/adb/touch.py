@@ -0,0 +1,427 @@
+"""Low-latency touch injection via sendevent.
+
+`input tap/swipe` starts an app_process JVM on the device for every call,
+which costs hundreds of milliseconds before the event is injected. This
+backend writes multi-touch (protocol B) events straight to the touchscreen's
+/dev/input/eventN node, sending a whole gesture as a single script over the
+persistent shell session. Where the shell's builtin `print` can emit binary,
+each report (the events up to a SYN_REPORT) is written to the node as packed
+input_event structs in one write, so a gesture starts no processes; other
+shells run one `sendevent` per event.
+
+Enable with PHONE_AGENT_ADB_TOUCH_BACKEND=sendevent. The display rotation
+is read once and cached until a screenshot shows the screen switched between
+portrait and landscape; screen coordinates are rotated back to the panel's
+natural orientation, and if the rotation cannot be read the gesture uses
+`input`. Devices whose touchscreen cannot be probed or written to fall back
+to `input` as well.
+"""
+
+import os
+import re
+import struct
+from dataclasses import dataclass
+
+from phone_agent.adb.shell import run_shell_command
+
+TOUCH_BACKEND = os.getenv("PHONE_AGENT_ADB_TOUCH_BACKEND", "input").lower()
+
+# Linux input event types and codes
+_EV_SYN = 0
+_EV_KEY = 1
+_EV_ABS = 3
+_SYN_REPORT = 0
+_BTN_TOUCH = 330
+_ABS_MT_SLOT = 47
+_ABS_MT_TOUCH_MAJOR = 48
+_ABS_MT_POSITION_X = 53
+_ABS_MT_POSITION_Y = 54
+_ABS_MT_TRACKING_ID = 57
+_ABS_MT_PRESSURE = 58
+_TRACKING_ID_NONE = 4294967295  # -1 as unsigned, lifts the contact
+
+# Interval between move events in a swipe
+_SWIPE_STEP_MS = 20
+
+_AXIS_PATTERN = re.compile(r"(ABS_MT_\w+)\s*:\s*value -?\d+, min (-?\d+), max (-?\d+)")
+_SIZE_PATTERN = re.compile(r"(Physical|Override) size: (\d+)x(\d+)")
+# Display rotation (0-3, quarter turns) in `dumpsys input`: SurfaceOrientation
+# up to Android 12, the internal viewport's orientation from Android 13
+_ROTATION_PATTERN = re.compile(r"SurfaceOrientation: (\d)|orientation=(\d)")
+
+# struct input_event as written by the shell: timeval (ignored on write),
+# type, code, value; the timeval longs follow the shell's word size
+_INPUT_EVENT_64 = struct.Struct("<qqHHI")
+_INPUT_EVENT_32 = struct.Struct("<iiHHI")
+# Checks that `print` writes hex escapes, including NUL, as raw bytes
+_PRINT_PROBE = "print -n '\\x41\\x00\\x42' | od -An -tx1"
+
+# A gesture script item: an input event (type, code, value) or a shell command
+GestureItem = tuple[int, int, int] | str
+
+
+@dataclass
+class TouchScreen:
+    """Touchscreen input node and its coordinate ranges."""
+
+    path: str
+    x_min: int
+    x_max: int
+    y_min: int
+    y_max: int
+    screen_width: int
+    screen_height: int
+    has_slot: bool = False
+    has_btn_touch: bool = False
+    has_pressure: bool = False
+    has_touch_major: bool = False
+    event_size: int = 0  # input_event bytes written with print; 0 uses sendevent
+    rotation: int = 0  # Current display rotation in quarter turns
+
+    def to_panel(self, x: int, y: int) -> tuple[int, int]:
+        """Map screen pixel coordinates in the current rotation to panel coordinates."""
+        # Undo the rotation; screen_width/height are in the natural orientation
+        if self.rotation == 1:
+            x, y = self.screen_width - 1 - y, x
+        elif self.rotation == 2:
+            x, y = self.screen_width - 1 - x, self.screen_height - 1 - y
+        elif self.rotation == 3:
+            x, y = y, self.screen_height - 1 - x
+        px = self.x_min + x * (self.x_max - self.x_min + 1) // self.screen_width
+        py = self.y_min + y * (self.y_max - self.y_min + 1) // self.screen_height
+        return (
+            max(self.x_min, min(px, self.x_max)),
+            max(self.y_min, min(py, self.y_max)),
+        )
+
+
+# Probed touchscreens per device; None marks devices that must use `input`
+_touch_screens: dict[str | None, TouchScreen | None] = {}
+# Display rotation per device, until a screenshot shows the screen turned
+_rotations: dict[str | None, int] = {}
+_tracking_id = 0
+
+
+def get_touch_screen(device_id: str | None = None) -> TouchScreen | None:
+    """
+    Get the touchscreen of a device, probing it on first use.
+
+    Args:
+        device_id: Optional ADB device ID.
+
+    Returns:
+        TouchScreen, or None if the sendevent backend cannot be used.
+    """
+    if device_id not in _touch_screens:
+        try:
+            _touch_screens[device_id] = _probe_touch_screen(device_id)
+        except Exception as e:
+            print(f"Touchscreen probe failed, using input: {e}")
+            _touch_screens[device_id] = None
+    return _touch_screens[device_id]
+
+
+def note_screen_size(device_id: str | None, width: int, height: int) -> None:
+    """
+    Drop the cached display rotation if a screenshot shows the screen turned.
+
+    Called with the size of each screenshot. A switch between portrait and
+    landscape makes the next gesture read the rotation again; a half turn
+    keeps the size and is not seen here.
+
+    Args:
+        device_id: Optional ADB device ID.
+        width: Screenshot width in pixels.
+        height: Screenshot height in pixels.
+    """
+    rotation = _rotations.get(device_id)
+    ts = _touch_screens.get(device_id)
+    if rotation is None or ts is None:
+        return
+    natural_landscape = ts.screen_width > ts.screen_height
+    if (width > height) != (natural_landscape != (rotation % 2 == 1)):
+        _rotations.pop(device_id, None)
+
+
+def send_tap(x: int, y: int, device_id: str | None = None) -> bool:
+    """
+    Tap via sendevent.
+
+    Returns:
+        True if the tap was injected, False if the caller should use `input`.
+    """
+    return _send_gesture(device_id, lambda ts: _down(ts, x, y) + _up(ts))
+
+
+def send_double_tap(
+    x: int, y: int, interval: float, device_id: str | None = None
+) -> bool:
+    """
+    Double tap via sendevent, with both taps sent in one script so the gap
+    between them is the configured interval.
+
+    Returns:
+        True if the double tap was injected, False if the caller should use `input`.
+    """
+    return _send_gesture(
+        device_id,
+        lambda ts: (
+            _down(ts, x, y)
+            + _up(ts)
+            + [f"sleep {interval:.3f}"]
+            + _down(ts, x, y)
+            + _up(ts)
+        ),
+    )
+
+
+def send_long_press(
+    x: int, y: int, duration_ms: int, device_id: str | None = None
+) -> bool:
+    """
+    Long press via sendevent.
+
+    Returns:
+        True if the long press was injected, False if the caller should use `input`.
+    """
+    return _send_gesture(
+        device_id,
+        lambda ts: _down(ts, x, y) + [f"sleep {duration_ms / 1000:.3f}"] + _up(ts),
+        duration_ms,
+    )
+
+
+def send_swipe(
+    start_x: int,
+    start_y: int,
+    end_x: int,
+    end_y: int,
+    duration_ms: int,
+    device_id: str | None = None,
+) -> bool:
+    """
+    Swipe via sendevent, interpolating moves every few milliseconds.
+
+    Returns:
+        True if the swipe was injected, False if the caller should use `input`.
+    """
+
+    def build(ts: TouchScreen) -> list[GestureItem]:
+        steps = max(2, duration_ms // _SWIPE_STEP_MS)
+        pause = f"sleep {duration_ms / steps / 1000:.3f}"
+        commands = _down(ts, start_x, start_y)
+        for i in range(1, steps + 1):
+            x = start_x + (end_x - start_x) * i // steps
+            y = start_y + (end_y - start_y) * i // steps
+            px, py = ts.to_panel(x, y)
+            commands += [
+                pause,
+                _event(_EV_ABS, _ABS_MT_POSITION_X, px),
+                _event(_EV_ABS, _ABS_MT_POSITION_Y, py),
+                _event(_EV_SYN, _SYN_REPORT, 0),
+            ]
+        return commands + _up(ts)
+
+    return _send_gesture(device_id, build, duration_ms)
+
+
+def _send_gesture(device_id: str | None, build, duration_ms: int = 0) -> bool:
+    """Build and run a gesture script; disable the backend on failure."""
+    if TOUCH_BACKEND != "sendevent":
+        return False
+    ts = get_touch_screen(device_id)
+    if ts is None:
+        return False
+    rotation = _get_rotation(device_id)
+    if rotation is None:
+        return False
+    ts.rotation = rotation
+
+    # If a write fails partway, lift the contact before reporting the error
+    release = "; ".join(_commands(ts, _release(ts)))
+    script = (
+        f"{' && '.join(_commands(ts, build(ts)))}; rc=$?; "
+        f"[ $rc -eq 0 ] || {{ {release}; }}"
+    )
+    try:
+        result = run_shell_command(
+            device_id, [script + "; (exit $rc)"], timeout=duration_ms / 1000 + 10
+        )
+    except Exception:
+        # The session was killed mid-gesture; release in a fresh one
+        run_shell_command(device_id, [release], timeout=10)
+        raise
+    # The writes are silent on success; older shells report no exit code
+    if result.returncode != 0 or result.stdout.strip():
+        print(f"Touch injection failed, using input: {result.stdout.strip()}")
+        _touch_screens[device_id] = None
+        return False
+    return True
+
+
+def _commands(ts: TouchScreen, items: list[GestureItem]) -> list[str]:
+    """
+    Turn gesture items into shell commands.
+
+    With a known event size, each report (the events up to a SYN_REPORT) is
+    written to the node by one builtin `print`, small enough for the shell
+    to write it in one go; otherwise each event is a `sendevent` command.
+    """
+    commands = []
+    report: list[tuple[int, int, int]] = []
+    for item in items:
+        if isinstance(item, str):
+            commands.append(item)
+        elif not ts.event_size:
+            commands.append(f"sendevent {ts.path} {item[0]} {item[1]} {item[2]}")
+        else:
+            report.append(item)
+            if item[:2] == (_EV_SYN, _SYN_REPORT):
+                commands.append(_print_events(ts, report))
+                report = []
+    if report:
+        commands.append(_print_events(ts, report))
+    return commands
+
+
+def _print_events(ts: TouchScreen, events: list[tuple[int, int, int]]) -> str:
+    """A builtin `print` writing packed input events to the node in one write."""
+    layout = (
+        _INPUT_EVENT_64 if ts.event_size == _INPUT_EVENT_64.size else _INPUT_EVENT_32
+    )
+    data = b"".join(
+        layout.pack(0, 0, ev_type, code, value & 0xFFFFFFFF)
+        for ev_type, code, value in events
+    )
+    escaped = "".join(f"\\x{byte:02x}" for byte in data)
+    return f"print -n '{escaped}' > {ts.path}"
+
+
+def _get_rotation(device_id: str | None) -> int | None:
+    """Current display rotation in quarter turns (cached), or None if unknown."""
+    if device_id in _rotations:
+        return _rotations[device_id]
+    output = run_shell_command(
+        device_id,
+        [
+            "dumpsys",
+            "input",
+            "|",
+            "grep",
+            "-m1",
+            "-E",
+            "'SurfaceOrientation|Viewport INTERNAL'",
+        ],
+        timeout=5,
+    ).stdout
+    match = _ROTATION_PATTERN.search(output)
+    if match is None:
+        print("Display rotation unknown, using input")
+        return None
+    _rotations[device_id] = int(match.group(1) or match.group(2))
+    return _rotations[device_id]
+
+
+def _down(ts: TouchScreen, x: int, y: int) -> list[GestureItem]:
+    """Events for a new contact at (x, y)."""
+    global _tracking_id
+    _tracking_id = (_tracking_id + 1) % 65536
+    px, py = ts.to_panel(x, y)
+
+    commands = []
+    if ts.has_slot:
+        commands.append(_event(_EV_ABS, _ABS_MT_SLOT, 0))
+    commands.append(_event(_EV_ABS, _ABS_MT_TRACKING_ID, _tracking_id))
+    if ts.has_btn_touch:
+        commands.append(_event(_EV_KEY, _BTN_TOUCH, 1))
+    commands += [
+        _event(_EV_ABS, _ABS_MT_POSITION_X, px),
+        _event(_EV_ABS, _ABS_MT_POSITION_Y, py),
+    ]
+    if ts.has_pressure:
+        commands.append(_event(_EV_ABS, _ABS_MT_PRESSURE, 50))
+    if ts.has_touch_major:
+        commands.append(_event(_EV_ABS, _ABS_MT_TOUCH_MAJOR, 5))
+    commands.append(_event(_EV_SYN, _SYN_REPORT, 0))
+    return commands
+
+
+def _up(ts: TouchScreen) -> list[GestureItem]:
+    """Events lifting the contact."""
+    commands = [_event(_EV_ABS, _ABS_MT_TRACKING_ID, _TRACKING_ID_NONE)]
+    if ts.has_btn_touch:
+        commands.append(_event(_EV_KEY, _BTN_TOUCH, 0))
+    commands.append(_event(_EV_SYN, _SYN_REPORT, 0))
+    return commands
+
+
+def _release(ts: TouchScreen) -> list[GestureItem]:
+    """Events lifting the contact in slot 0, whichever slot is selected."""
+    commands = []
+    if ts.has_slot:
+        commands.append(_event(_EV_ABS, _ABS_MT_SLOT, 0))
+    return commands + _up(ts)
+
+
+def _event(ev_type: int, code: int, value: int) -> GestureItem:
+    """A single input event for the gesture script."""
+    return (ev_type, code, value)
+
+
+def _probe_touch_screen(device_id: str | None) -> TouchScreen | None:
+    """Find the multi-touch input node with `getevent -pl` and the screen size with `wm size`."""
+    output = run_shell_command(device_id, ["getevent", "-pl"]).stdout
+
+    touch_screen = None
+    for block in re.split(r"^add device \d+: ", output, flags=re.MULTILINE)[1:]:
+        path = block.split("\n", 1)[0].strip()
+        axes = {
+            name: (int(low), int(high))
+            for name, low, high in _AXIS_PATTERN.findall(block)
+        }
+        if "ABS_MT_POSITION_X" not in axes or "ABS_MT_POSITION_Y" not in axes:
+            continue
+        x_min, x_max = axes["ABS_MT_POSITION_X"]
+        y_min, y_max = axes["ABS_MT_POSITION_Y"]
+        touch_screen = TouchScreen(
+            path=path,
+            x_min=x_min,
+            x_max=x_max,
+            y_min=y_min,
+            y_max=y_max,
+            screen_width=0,
+            screen_height=0,
+            has_slot="ABS_MT_SLOT" in axes,
+            has_btn_touch="BTN_TOUCH" in block,
+            has_pressure="ABS_MT_PRESSURE" in axes,
+            has_touch_major="ABS_MT_TOUCH_MAJOR" in axes,
+        )
+        break
+
+    if touch_screen is None:
+        return None
+
+    sizes = {
+        kind: (int(w), int(h))
+        for kind, w, h in _SIZE_PATTERN.findall(
+            run_shell_command(device_id, ["wm", "size"]).stdout
+        )
+    }
+    size = sizes.get("Override") or sizes.get("Physical")
+    if size is None:
+        return None
+    touch_screen.screen_width, touch_screen.screen_height = size
+    touch_screen.event_size = _probe_event_size(device_id)
+    return touch_screen
+
+
+def _probe_event_size(device_id: str | None) -> int:
+    """Size of input_event for the shell's `print` writes, or 0 to use sendevent."""
+    output = run_shell_command(
+        device_id, [f"{_PRINT_PROBE}; getprop ro.product.cpu.abi"]
+    ).stdout.split()
+    if output[:3] != ["41", "00", "42"]:
+        return 0
+    # The shell is built for the primary ABI
+    abi = output[3] if len(output) > 3 else ""
+    return _INPUT_EVENT_64.size if "64" in abi else _INPUT_EVENT_32.size
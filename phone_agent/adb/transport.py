@@ -0,0 +1,401 @@
+"""Native ADB server protocol client.
+
+Talks to the local adb server (port 5037) directly over a socket instead of
+forking the adb client binary for every command. Each device command still
+uses its own short-lived connection to the server, because the server closes
+the socket when a service ends, but no process is spawned on the host.
+
+Supported services:
+    host:transport:<serial>   select a device
+    shell,v2,raw:<command>    shell with separate stdout/stderr and exit code
+    shell:<command>           legacy shell (merged output, no exit code)
+    exec:<command>            raw binary output (used for screencap)
+    sync:                     file transfer (used for pull)
+
+The helpers fall back to the adb binary only if the server cannot be
+reached or refuses the device or service, i.e. before anything ran on the
+device. Errors after the service is open are raised, so a command is never
+run twice.
+"""
+
+import os
+import socket
+import struct
+import subprocess
+import threading
+
+# Shell protocol v2 packet ids
+_SHELL_STDOUT = 1
+_SHELL_STDERR = 2
+_SHELL_EXIT = 3
+
+_SYNC_MAX_CHUNK = 64 * 1024
+
+
+class ADBProtocolError(Exception):
+    """Raised when the adb server rejects a request or the stream is malformed."""
+
+
+class ADBServiceOpenError(ADBProtocolError):
+    """Raised when a service could not be opened; nothing ran on the device."""
+
+
+class ADBTransport:
+    """
+    Client for the adb server's smart-socket protocol.
+
+    Args:
+        host: adb server host. Defaults to ANDROID_ADB_SERVER_ADDRESS or 127.0.0.1.
+        port: adb server port. Defaults to ANDROID_ADB_SERVER_PORT or 5037.
+        timeout: Default socket timeout in seconds.
+
+    Example:
+        >>> transport = ADBTransport()
+        >>> result = transport.shell("emulator-5554", "getprop ro.build.version.sdk")
+        >>> png = transport.exec_out("emulator-5554", "screencap -p")
+    """
+
+    def __init__(
+        self, host: str | None = None, port: int | None = None, timeout: float = 10
+    ):
+        self.host = host or os.getenv("ANDROID_ADB_SERVER_ADDRESS", "127.0.0.1")
+        self.port = port or int(os.getenv("ANDROID_ADB_SERVER_PORT", "5037"))
+        self.timeout = timeout
+        self._features: dict[str | None, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def shell(
+        self, device_id: str | None, command: str, timeout: float | None = None
+    ) -> subprocess.CompletedProcess:
+        """
+        Run a shell command on the device.
+
+        Args:
+            device_id: Device serial, or None for the only connected device.
+            command: Shell command line.
+            timeout: Socket timeout in seconds.
+
+        Returns:
+            CompletedProcess with bytes stdout/stderr and the exit code
+            (always 0 on devices without shell protocol v2).
+        """
+        if "shell_v2" not in self.features(device_id):
+            sock = self._open_service(device_id, f"shell:{command}", timeout)
+            with sock:
+                output = _read_all(sock)
+            return subprocess.CompletedProcess(command, 0, output, b"")
+
+        sock = self._open_service(device_id, f"shell,v2,raw:{command}", timeout)
+        stdout, stderr = bytearray(), bytearray()
+        returncode = 0
+        with sock:
+            while True:
+                header = _read_exact(sock, 5, allow_eof=True)
+                if header is None:
+                    break
+                packet_id, length = struct.unpack("<BI", header)
+                data = _read_exact(sock, length)
+                if packet_id == _SHELL_STDOUT:
+                    stdout += data
+                elif packet_id == _SHELL_STDERR:
+                    stderr += data
+                elif packet_id == _SHELL_EXIT:
+                    returncode = data[0] if data else 0
+                    break
+        return subprocess.CompletedProcess(
+            command, returncode, bytes(stdout), bytes(stderr)
+        )
+
+    def exec_out(
+        self, device_id: str | None, command: str, timeout: float | None = None
+    ) -> bytes:
+        """
+        Run a command and return its raw binary output (like `adb exec-out`).
+
+        Args:
+            device_id: Device serial, or None for the only connected device.
+            command: Command line.
+            timeout: Socket timeout in seconds.
+
+        Returns:
+            Raw output bytes.
+        """
+        sock = self._open_service(device_id, f"exec:{command}", timeout)
+        with sock:
+            return _read_all(sock)
+
+    def pull(
+        self, device_id: str | None, remote_path: str, timeout: float | None = None
+    ) -> bytes:
+        """
+        Read a file from the device over the sync service.
+
+        Args:
+            device_id: Device serial, or None for the only connected device.
+            remote_path: Path on the device.
+            timeout: Socket timeout in seconds.
+
+        Returns:
+            File contents.
+        """
+        sock = self._open_service(device_id, "sync:", timeout)
+        with sock:
+            path = remote_path.encode("utf-8")
+            sock.sendall(b"RECV" + struct.pack("<I", len(path)) + path)
+
+            data = bytearray()
+            while True:
+                header = _read_exact(sock, 8)
+                chunk_id, length = header[:4], struct.unpack("<I", header[4:])[0]
+                if chunk_id == b"DATA":
+                    if length > _SYNC_MAX_CHUNK:
+                        raise ADBProtocolError(f"Sync chunk too large: {length}")
+                    data += _read_exact(sock, length)
+                elif chunk_id == b"DONE":
+                    break
+                elif chunk_id == b"FAIL":
+                    message = _read_exact(sock, length).decode("utf-8", "replace")
+                    raise ADBProtocolError(f"Pull failed: {message}")
+                else:
+                    raise ADBProtocolError(f"Unexpected sync response: {chunk_id!r}")
+
+            sock.sendall(b"QUIT" + struct.pack("<I", 0))
+        return bytes(data)
+
+    def features(self, device_id: str | None) -> set[str]:
+        """Get (and cache) the adb feature set of a device."""
+        with self._lock:
+            if device_id in self._features:
+                return self._features[device_id]
+
+        if device_id:
+            request = f"host-serial:{device_id}:features"
+        else:
+            request = "host:features"
+        try:
+            with self._connect(None) as sock:
+                self._send_request(sock, request)
+                length = int(_read_exact(sock, 4), 16)
+                features = set(_read_exact(sock, length).decode("ascii").split(","))
+        except (OSError, ADBProtocolError) as e:
+            raise ADBServiceOpenError(f"Cannot read features: {e}") from e
+
+        with self._lock:
+            self._features[device_id] = features
+        return features
+
+    def _open_service(
+        self, device_id: str | None, service: str, timeout: float | None
+    ) -> socket.socket:
+        """
+        Connect, select the device transport and open a service.
+
+        Raises:
+            ADBServiceOpenError: If any step fails; the service did not start.
+        """
+        try:
+            sock = self._connect(timeout)
+        except OSError as e:
+            raise ADBServiceOpenError(f"Cannot reach adb server: {e}") from e
+        try:
+            if device_id:
+                self._send_request(sock, f"host:transport:{device_id}")
+            else:
+                self._send_request(sock, "host:transport-any")
+            self._send_request(sock, service)
+        except (OSError, ADBProtocolError) as e:
+            sock.close()
+            raise ADBServiceOpenError(str(e)) from e
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    def _connect(self, timeout: float | None) -> socket.socket:
+        """Open a TCP connection to the adb server."""
+        sock = socket.create_connection(
+            (self.host, self.port), timeout=timeout or self.timeout
+        )
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    @staticmethod
+    def _send_request(sock: socket.socket, request: str) -> None:
+        """Send a length-prefixed request and check the OKAY/FAIL status."""
+        payload = request.encode("utf-8")
+        sock.sendall(b"%04x" % len(payload) + payload)
+
+        status = _read_exact(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            length = int(_read_exact(sock, 4), 16)
+            message = _read_exact(sock, length).decode("utf-8", "replace")
+            raise ADBProtocolError(message)
+        raise ADBProtocolError(f"Unexpected adb server status: {status!r}")
+
+
+def _read_exact(
+    sock: socket.socket, size: int, allow_eof: bool = False
+) -> bytes | None:
+    """Read exactly size bytes from a socket."""
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            if allow_eof and not buf:
+                return None
+            raise ADBProtocolError("Connection closed by adb server")
+        buf += chunk
+    return bytes(buf)
+
+
+def _read_all(sock: socket.socket) -> bytes:
+    """Read from a socket until EOF."""
+    chunks = []
+    while True:
+        chunk = sock.recv(256 * 1024)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+# Global transport instance; set PHONE_AGENT_ADB_TRANSPORT=subprocess to disable
+_transport: ADBTransport | None = None
+_NATIVE_ENABLED = (
+    os.getenv("PHONE_AGENT_ADB_TRANSPORT", "native").lower() != "subprocess"
+)
+
+
+def get_transport() -> ADBTransport:
+    """Get the global ADB transport."""
+    global _transport
+    if _transport is None:
+        _transport = ADBTransport()
+    return _transport
+
+
+def set_native_transport(enabled: bool) -> None:
+    """Enable or disable the native transport globally."""
+    global _NATIVE_ENABLED
+    _NATIVE_ENABLED = enabled
+
+
+def run_adb_shell(
+    device_id: str | None,
+    args: list[str],
+    timeout: float | None = None,
+    text: bool = True,
+) -> subprocess.CompletedProcess:
+    """
+    Run `adb shell <args>` on a device.
+
+    Args:
+        device_id: Optional ADB device ID.
+        args: Shell command arguments, joined with spaces like the adb client does.
+        timeout: Timeout in seconds.
+        text: Decode stdout/stderr as UTF-8.
+
+    Returns:
+        CompletedProcess with stdout, stderr and returncode.
+
+    Raises:
+        subprocess.TimeoutExpired: If the command does not finish in time.
+        OSError: If the connection breaks after the command started.
+        ADBProtocolError: If the server's output is malformed.
+    """
+    command = " ".join(args)
+    result = None
+    if _NATIVE_ENABLED:
+        try:
+            result = get_transport().shell(device_id, command, timeout)
+        except ADBServiceOpenError:
+            result = None
+        except socket.timeout:
+            raise subprocess.TimeoutExpired(command, timeout or 0)
+
+    if result is None:
+        result = subprocess.run(
+            _get_adb_prefix(device_id) + ["shell"] + args,
+            capture_output=True,
+            timeout=timeout,
+        )
+
+    if text:
+        result.stdout = result.stdout.decode("utf-8", errors="replace")
+        result.stderr = result.stderr.decode("utf-8", errors="replace")
+    return result
+
+
+def run_adb_exec_out(
+    device_id: str | None, args: list[str], timeout: float | None = None
+) -> subprocess.CompletedProcess:
+    """
+    Run `adb exec-out <args>` on a device.
+
+    Args:
+        device_id: Optional ADB device ID.
+        args: Command arguments.
+        timeout: Timeout in seconds.
+
+    Returns:
+        CompletedProcess with raw bytes stdout.
+    """
+    command = " ".join(args)
+    if _NATIVE_ENABLED:
+        try:
+            output = get_transport().exec_out(device_id, command, timeout)
+            return subprocess.CompletedProcess(command, 0, output, b"")
+        except ADBServiceOpenError:
+            pass
+        except socket.timeout:
+            raise subprocess.TimeoutExpired(command, timeout or 0)
+
+    return subprocess.run(
+        _get_adb_prefix(device_id) + ["exec-out"] + args,
+        capture_output=True,
+        timeout=timeout,
+    )
+
+
+def pull_file(
+    device_id: str | None,
+    remote_path: str,
+    local_path: str,
+    timeout: float | None = None,
+) -> bool:
+    """
+    Copy a file from the device (like `adb pull`).
+
+    Args:
+        device_id: Optional ADB device ID.
+        remote_path: Path on the device.
+        local_path: Destination path on the host.
+        timeout: Timeout in seconds.
+
+    Returns:
+        True if the file was copied.
+    """
+    if _NATIVE_ENABLED:
+        try:
+            data = get_transport().pull(device_id, remote_path, timeout)
+            with open(local_path, "wb") as f:
+                f.write(data)
+            return True
+        except ADBServiceOpenError:
+            pass
+
+    subprocess.run(
+        _get_adb_prefix(device_id) + ["pull", remote_path, local_path],
+        capture_output=True,
+        timeout=timeout,
+    )
+    return os.path.exists(local_path)
+
+
+def _get_adb_prefix(device_id: str | None) -> list:
+    """Get ADB command prefix with optional device specifier."""
+    if device_id:
+        return ["adb", "-s", device_id]
+    return ["adb"]
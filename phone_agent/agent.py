@@ -1,18 +1,22 @@
 """Main PhoneAgent class for orchestrating phone automation."""
 
 import json
+import threading
+import time
 import traceback
+from concurrent.futures import Future
 from dataclasses import dataclass
 from typing import Any, Callable
 
 from phone_agent.actions import ActionHandler
 from phone_agent.actions.handler import do, finish, parse_action
+from phone_agent.capture import CaptureConfig, CaptureService, Observer
 from phone_agent.config import get_messages, get_system_prompt
 from phone_agent.device_factory import get_device_factory
 from phone_agent.evaluation import ScoreResult, ScoringConfig, TaskScorer
-from phone_agent.model import ModelClient, ModelConfig
+from phone_agent.model import ContextConfig, ContextManager, ModelClient, ModelConfig
 from phone_agent.model.client import MessageBuilder
-from phone_agent.utils import AgentLogger, LogConfig
+from phone_agent.utils import AgentLogger, ImageConfig, LogConfig, prepare_image
 
 
 @dataclass
@@ -29,6 +33,12 @@ class AgentConfig:
     session_name: str | None = None
     enable_scoring: bool = True
     scoring_config: ScoringConfig | None = None
+    image_config: ImageConfig | None = None
+    capture_config: CaptureConfig | None = None  # Enables the background capture service
+    early_dispatch: bool = False  # Start executing the action before the response is finalized
+    context_config: ContextConfig | None = None  # Bounds the history sent each step
+    warm_up: bool = False  # Prefill the system prompt on the server at construction
+    warm_up_wait: float = 2.0  # Max seconds the first request waits for the warm-up
 
     def __post_init__(self):
         if self.system_prompt is None:
@@ -81,16 +91,46 @@ class PhoneAgent:
         self.agent_config = agent_config or AgentConfig()
         self.scoring_model_config = scoring_model_config
 
-        self.model_client = ModelClient(self.model_config)
+        self.model_client = ModelClient(self.model_config, ActionHandler)
         self.action_handler = ActionHandler(
             device_id=self.agent_config.device_id,
             confirmation_callback=confirmation_callback,
             takeover_callback=takeover_callback,
         )
 
+        # Rendered once so every request starts with byte-identical tokens
+        self._system_message = MessageBuilder.create_system_message(
+            self.agent_config.system_prompt
+        )
+        self._warm_up_thread: threading.Thread | None = None
+        if self.agent_config.warm_up:
+            self._warm_up_thread = threading.Thread(
+                target=self.model_client.warm_up,
+                args=([self._system_message],),
+                daemon=True,
+            )
+            self._warm_up_thread.start()
+
         self._context: list[dict[str, Any]] = []
+        self.context_manager: ContextManager | None = None
+        if self.agent_config.context_config is not None:
+            self.context_manager = ContextManager(self.agent_config.context_config)
         self._step_count = 0
         self._scoring_context: list[dict[str, Any]] = []
+        self._last_action_end: float | None = None
+        self._last_action_name: str | None = None
+
+        # Optional background capture, so screenshots are off the step's critical path
+        self.capture_service: CaptureService | None = None
+        if self.agent_config.capture_config is not None:
+            self.capture_service = CaptureService(
+                device_id=self.agent_config.device_id,
+                config=self.agent_config.capture_config,
+            )
+            self.capture_service.start()
+
+        # Screenshot and foreground app are fetched concurrently at each step
+        self._observer = Observer(self._capture_screenshot, self._query_current_app)
 
         self.logger: AgentLogger | None = None
         if self.agent_config.enable_logging:
@@ -134,6 +174,8 @@ class PhoneAgent:
         """
         self._context = []
         self._step_count = 0
+        self._last_action_end = time.time()
+        self._last_action_name = None
 
         # Log task start
         if self.logger:
@@ -223,6 +265,56 @@ class PhoneAgent:
         self._context = []
         self._step_count = 0
         self._scoring_context = []
+        self._last_action_end = None
+        self._last_action_name = None
+
+    def close(self) -> None:
+        """Release background resources such as the capture service."""
+        if self.capture_service:
+            self.capture_service.stop()
+            self.capture_service = None
+        self._observer.close()
+        self.action_handler.close()
+
+    def _settle_dispatched(
+        self, dispatched: tuple[dict[str, Any], Future], message: str
+    ) -> tuple[dict[str, Any] | None, str]:
+        """
+        Cancel an early-dispatched action after a failed request, or await it.
+
+        Returns:
+            Tuple of (the action if it ran, message extended with its outcome).
+        """
+        action, pending_result = dispatched
+        if pending_result.cancel():
+            return None, message
+        try:
+            result = pending_result.result()
+            outcome = "succeeded" if result.success else f"failed: {result.message}"
+        except Exception as e:
+            outcome = f"failed: {e}"
+        self._last_action_end = time.time()
+        self._last_action_name = action.get("action")
+        name = action.get("action")
+        return action, f"{message} (action {name} already ran and {outcome})"
+
+    def _wait_for_warm_up(self) -> None:
+        """Wait briefly for a running warm-up so the first request reuses its prefill."""
+        thread, self._warm_up_thread = self._warm_up_thread, None
+        if thread is not None:
+            thread.join(timeout=self.agent_config.warm_up_wait)
+
+    def _capture_screenshot(self) -> Any:
+        """Capture the screen, preferring a background frame newer than the last action."""
+        if self.capture_service:
+            frame = self.capture_service.get_frame(newer_than=self._last_action_end)
+            if frame is not None:
+                return frame
+        return get_device_factory().get_screenshot(self.agent_config.device_id)
+
+    def _query_current_app(self) -> str:
+        """Get the foreground app name."""
+        return get_device_factory().get_current_app(self.agent_config.device_id)
 
     def _execute_step(
         self, user_prompt: str | None = None, is_first: bool = False
@@ -230,23 +322,27 @@ class PhoneAgent:
         """Execute a single step of the agent loop."""
         self._step_count += 1
 
-        # Capture current screen state
-        device_factory = get_device_factory()
-        screenshot = device_factory.get_screenshot(self.agent_config.device_id)
-        current_app = device_factory.get_current_app(self.agent_config.device_id)
+        # Capture current screen state and foreground app concurrently
+        observation = self._observer.observe()
+        screenshot = observation.screenshot
+        current_app = observation.current_app
+
+        # Resize / re-encode the screenshot for the model. Relative coordinates
+        # from the model map to the full screenshot size unchanged.
+        image = prepare_image(screenshot, self.agent_config.image_config)
 
         # Build messages
         if is_first:
-            self._context.append(
-                MessageBuilder.create_system_message(self.agent_config.system_prompt)
-            )
+            self._context.append(self._system_message)
 
             screen_info = MessageBuilder.build_screen_info(current_app)
             text_content = f"{user_prompt}\n\n{screen_info}"
 
             self._context.append(
                 MessageBuilder.create_user_message(
-                    text=text_content, image_base64=screenshot.base64_data
+                    text=text_content,
+                    image_base64=image.base64_data,
+                    image_mime_type=image.mime_type,
                 )
             )
         else:
@@ -255,17 +351,44 @@ class PhoneAgent:
 
             self._context.append(
                 MessageBuilder.create_user_message(
-                    text=text_content, image_base64=screenshot.base64_data
+                    text=text_content,
+                    image_base64=image.base64_data,
+                    image_mime_type=image.mime_type,
                 )
             )
 
+        # Keep the history sent to the model bounded
+        if self.context_manager is not None:
+            self.context_manager.apply(self._context)
+
+        # Smaller thinking budgets after simple actions
+        budget_config = self.model_client.config.thinking_budget
+        thinking_budget = (
+            budget_config.budget_after(self._last_action_name)
+            if budget_config is not None
+            else None
+        )
+
         # Get model response
+        dispatched = None
         try:
             msgs = get_messages(self.agent_config.lang)
             print("\n" + "=" * 50)
             print(f"💭 {msgs['thinking']}:")
             print("-" * 50)
-            response = self.model_client.request(self._context)
+
+            def on_action(action_text: str) -> None:
+                nonlocal dispatched
+                dispatched = self.action_handler.dispatch(
+                    action_text, screenshot.width, screenshot.height
+                )
+
+            self._wait_for_warm_up()
+            response = self.model_client.request(
+                self._context,
+                on_action=on_action if self.agent_config.early_dispatch else None,
+                thinking_budget=thinking_budget,
+            )
 
             # Log model response
             if self.logger:
@@ -281,21 +404,29 @@ class PhoneAgent:
         except Exception as e:
             if self.agent_config.verbose:
                 traceback.print_exc()
+            action, message = None, f"Model error: {e}"
+            if dispatched is not None:
+                action, message = self._settle_dispatched(dispatched, message)
             return StepResult(
                 success=False,
                 finished=True,
-                action=None,
+                action=action,
                 thinking="",
-                message=f"Model error: {e}",
+                message=message,
             )
 
-        # Parse action from response
-        try:
-            action = parse_action(response.action)
-        except ValueError:
-            if self.agent_config.verbose:
-                traceback.print_exc()
-            action = finish(message=response.action)
+        # Parse action from response, unless it is already executing
+        if dispatched is not None:
+            action, pending_result = dispatched
+        else:
+            pending_result = None
+            try:
+                action = parse_action(response.action)
+            except ValueError:
+                if self.agent_config.verbose:
+                    traceback.print_exc()
+                action = finish(message=response.action)
+        self._last_action_name = action.get("action")
 
         if self.agent_config.verbose:
             # Print thinking process
@@ -309,9 +440,13 @@ class PhoneAgent:
 
         # Execute action
         try:
-            result = self.action_handler.execute(
-                action, screenshot.width, screenshot.height
-            )
+            if pending_result is not None:
+                result = pending_result.result()
+            else:
+                result = self.action_handler.execute(
+                    action, screenshot.width, screenshot.height
+                )
+            self._last_action_end = time.time()
 
             # Log action execution
             if self.logger:
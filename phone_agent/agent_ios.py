@@ -1,17 +1,21 @@
 """iOS PhoneAgent class for orchestrating iOS phone automation."""
 
 import json
+import threading
+import time
 import traceback
 from dataclasses import dataclass
 from typing import Any, Callable
 
 from phone_agent.actions.handler import do, finish, parse_action
 from phone_agent.actions.handler_ios import IOSActionHandler
+from phone_agent.capture import Observer
 from phone_agent.config import get_messages, get_system_prompt
-from phone_agent.utils import AgentLogger, LogConfig
-from phone_agent.model import ModelClient, ModelConfig
+from phone_agent.utils import AgentLogger, ImageConfig, LogConfig, prepare_image
+from phone_agent.model import ContextConfig, ContextManager, ModelClient, ModelConfig
 from phone_agent.model.client import MessageBuilder
 from phone_agent.xctest import XCTestConnection, get_current_app, get_screenshot
+from phone_agent.xctest.mjpeg import MJPEGConfig, MJPEGFrameSource
 
 
 @dataclass
@@ -28,6 +32,11 @@ class IOSAgentConfig:
     enable_logging: bool = False
     log_config: LogConfig | None = None
     session_name: str | None = None
+    image_config: ImageConfig | None = None
+    context_config: ContextConfig | None = None  # Bounds the history sent each step
+    warm_up: bool = False  # Prefill the system prompt on the server at construction
+    warm_up_wait: float = 2.0  # Max seconds the first request waits for the warm-up
+    mjpeg_config: MJPEGConfig | None = None  # Take screenshots from WDA's MJPEG stream
 
     def __post_init__(self):
         if self.system_prompt is None:
@@ -78,7 +87,7 @@ class IOSPhoneAgent:
         self.model_config = model_config or ModelConfig()
         self.agent_config = agent_config or IOSAgentConfig()
 
-        self.model_client = ModelClient(self.model_config)
+        self.model_client = ModelClient(self.model_config, IOSActionHandler)
 
         # Initialize WDA connection and create session if needed
         self.wda_connection = XCTestConnection(wda_url=self.agent_config.wda_url)
@@ -100,8 +109,45 @@ class IOSPhoneAgent:
             takeover_callback=takeover_callback,
         )
 
+        # Rendered once so every request starts with byte-identical tokens
+        self._system_message = MessageBuilder.create_system_message(
+            self.agent_config.system_prompt
+        )
+        self._warm_up_thread: threading.Thread | None = None
+        if self.agent_config.warm_up:
+            self._warm_up_thread = threading.Thread(
+                target=self.model_client.warm_up,
+                args=([self._system_message],),
+                daemon=True,
+            )
+            self._warm_up_thread.start()
+
         self._context: list[dict[str, Any]] = []
+        self.context_manager: ContextManager | None = None
+        if self.agent_config.context_config is not None:
+            self.context_manager = ContextManager(self.agent_config.context_config)
         self._step_count = 0
+        self._last_action_name: str | None = None
+        self._last_action_end: float | None = None
+
+        # Optional MJPEG stream, so screenshots are read from memory
+        self.frame_source: MJPEGFrameSource | None = None
+        if self.agent_config.mjpeg_config is not None:
+            self.frame_source = MJPEGFrameSource(
+                wda_url=self.agent_config.wda_url,
+                session_id=self.agent_config.session_id,
+                config=self.agent_config.mjpeg_config,
+            )
+            self.frame_source.start()
+
+        # Screenshot and foreground app are fetched concurrently at each step
+        self._observer = Observer(
+            self._get_screenshot,
+            lambda: get_current_app(
+                wda_url=self.agent_config.wda_url,
+                session_id=self.agent_config.session_id,
+            ),
+        )
 
         # Initialize logger if logging is enabled
         self.logger: AgentLogger | None = None
@@ -123,6 +169,8 @@ class IOSPhoneAgent:
         """
         self._context = []
         self._step_count = 0
+        self._last_action_name = None
+        self._last_action_end = None
 
         # Log task start
         if self.logger:
@@ -184,6 +232,33 @@ class IOSPhoneAgent:
         """Reset the agent state for a new task."""
         self._context = []
         self._step_count = 0
+        self._last_action_name = None
+        self._last_action_end = None
+
+    def close(self) -> None:
+        """Release background resources."""
+        self._observer.close()
+        if self.frame_source is not None:
+            self.frame_source.stop()
+            self.frame_source = None
+
+    def _wait_for_warm_up(self) -> None:
+        """Wait briefly for a running warm-up so the first request reuses its prefill."""
+        thread, self._warm_up_thread = self._warm_up_thread, None
+        if thread is not None:
+            thread.join(timeout=self.agent_config.warm_up_wait)
+
+    def _get_screenshot(self) -> Any:
+        """Screenshot from the MJPEG stream if enabled, else from a WDA request."""
+        if self.frame_source is not None:
+            screenshot = self.frame_source.get_frame(newer_than=self._last_action_end)
+            if screenshot is not None:
+                return screenshot
+        return get_screenshot(
+            wda_url=self.agent_config.wda_url,
+            session_id=self.agent_config.session_id,
+            device_id=self.agent_config.device_id,
+        )
 
     def _execute_step(
         self, user_prompt: str | None = None, is_first: bool = False
@@ -191,28 +266,27 @@ class IOSPhoneAgent:
         """Execute a single step of the agent loop."""
         self._step_count += 1
 
-        # Capture current screen state
-        screenshot = get_screenshot(
-            wda_url=self.agent_config.wda_url,
-            session_id=self.agent_config.session_id,
-            device_id=self.agent_config.device_id,
-        )
-        current_app = get_current_app(
-            wda_url=self.agent_config.wda_url, session_id=self.agent_config.session_id
-        )
+        # Capture current screen state and foreground app concurrently
+        observation = self._observer.observe()
+        screenshot = observation.screenshot
+        current_app = observation.current_app
+
+        # Resize / re-encode the screenshot for the model. Relative coordinates
+        # from the model map to the full screenshot size unchanged.
+        image = prepare_image(screenshot, self.agent_config.image_config)
 
         # Build messages
         if is_first:
-            self._context.append(
-                MessageBuilder.create_system_message(self.agent_config.system_prompt)
-            )
+            self._context.append(self._system_message)
 
             screen_info = MessageBuilder.build_screen_info(current_app)
             text_content = f"{user_prompt}\n\n{screen_info}"
 
             self._context.append(
                 MessageBuilder.create_user_message(
-                    text=text_content, image_base64=screenshot.base64_data
+                    text=text_content,
+                    image_base64=image.base64_data,
+                    image_mime_type=image.mime_type,
                 )
             )
         else:
@@ -221,13 +295,30 @@ class IOSPhoneAgent:
 
             self._context.append(
                 MessageBuilder.create_user_message(
-                    text=text_content, image_base64=screenshot.base64_data
+                    text=text_content,
+                    image_base64=image.base64_data,
+                    image_mime_type=image.mime_type,
                 )
             )
 
+        # Keep the history sent to the model bounded
+        if self.context_manager is not None:
+            self.context_manager.apply(self._context)
+
+        # Smaller thinking budgets after simple actions
+        budget_config = self.model_client.config.thinking_budget
+        thinking_budget = (
+            budget_config.budget_after(self._last_action_name)
+            if budget_config is not None
+            else None
+        )
+
         # Get model response
         try:
-            response = self.model_client.request(self._context)
+            self._wait_for_warm_up()
+            response = self.model_client.request(
+                self._context, thinking_budget=thinking_budget
+            )
         except Exception as e:
             if self.agent_config.verbose:
                 traceback.print_exc()
@@ -246,6 +337,7 @@ class IOSPhoneAgent:
             if self.agent_config.verbose:
                 traceback.print_exc()
             action = finish(message=response.action)
+        self._last_action_name = action.get("action")
 
         # Log model response
         if self.logger:
@@ -279,6 +371,7 @@ class IOSPhoneAgent:
             result = self.action_handler.execute(
                 action, screenshot.width, screenshot.height
             )
+            self._last_action_end = time.time()
         except Exception as e:
             if self.agent_config.verbose:
                 traceback.print_exc()
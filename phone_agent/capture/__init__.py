@@ -0,0 +1,20 @@
+"""Background screen capture for Phone Agent."""
+
+from phone_agent.capture.observation import Observation, Observer
+from phone_agent.capture.ring_buffer import Frame, SharedFrameRing, ring_name_for_device
+from phone_agent.capture.service import (
+    CaptureConfig,
+    CaptureService,
+    get_capture_service,
+)
+
+__all__ = [
+    "CaptureService",
+    "CaptureConfig",
+    "get_capture_service",
+    "SharedFrameRing",
+    "Frame",
+    "ring_name_for_device",
+    "Observer",
+    "Observation",
+]
@@ -0,0 +1,97 @@
+"""Concurrent step-start observation of the device screen and foreground app."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass
+class Observation:
+    """Device state gathered at the start of an agent step."""
+
+    screenshot: Any
+    current_app: str
+    started_at: float  # Wall-clock time the observation started
+    completed_at: float  # Wall-clock time both queries finished
+    screenshot_latency: float  # Seconds spent capturing the screenshot
+    app_latency: float  # Seconds spent querying the foreground app
+
+    @property
+    def latency(self) -> float:
+        """Total observation time in seconds."""
+        return self.completed_at - self.started_at
+
+
+class Observer:
+    """
+    Gathers the screenshot and the foreground app for one device concurrently.
+
+    The two are independent device round trips, so the step start costs the
+    slower of the two instead of their sum. The app query runs on a
+    single-worker pool owned by the observer while the screenshot is
+    captured on the calling thread.
+
+    Args:
+        capture_screenshot: Returns a Screenshot-like object.
+        query_app: Returns the foreground app name.
+
+    Example:
+        >>> observer = Observer(
+        ...     lambda: factory.get_screenshot(device_id),
+        ...     lambda: factory.get_current_app(device_id),
+        ... )
+        >>> observation = observer.observe()
+        >>> observation.current_app, observation.latency
+    """
+
+    def __init__(
+        self,
+        capture_screenshot: Callable[[], Any],
+        query_app: Callable[[], str],
+    ):
+        self._capture_screenshot = capture_screenshot
+        self._query_app = query_app
+        self._executor: ThreadPoolExecutor | None = None
+
+    def observe(self) -> Observation:
+        """
+        Capture the screenshot and query the foreground app in parallel.
+
+        Returns:
+            Observation with both results and their latencies.
+
+        Raises:
+            Exception: Whatever the screenshot or app query raised.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="observe"
+            )
+
+        started_at = time.time()
+        app_future = self._executor.submit(_timed, self._query_app)
+        screenshot, screenshot_latency = _timed(self._capture_screenshot)
+        current_app, app_latency = app_future.result()
+
+        return Observation(
+            screenshot=screenshot,
+            current_app=current_app,
+            started_at=started_at,
+            completed_at=time.time(),
+            screenshot_latency=screenshot_latency,
+            app_latency=app_latency,
+        )
+
+    def close(self) -> None:
+        """Shut down the worker thread."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def _timed(fn: Callable[[], Any]) -> tuple[Any, float]:
+    """Call fn and return its result with the elapsed seconds."""
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
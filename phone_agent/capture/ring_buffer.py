@@ -0,0 +1,288 @@
+"""Shared-memory ring buffer for publishing screen frames between processes."""
+
+import os
+import re
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+
+# Ring header: magic, version, slot count, slot size, writer process ID,
+# latest sequence number
+_RING_HEADER = struct.Struct("<4sIIIIQ")
+# Slot header: sequence, captured_at, completed_at, width, height, length,
+# flags, mime type
+_SLOT_HEADER = struct.Struct("<QddIIII16s")
+_MAGIC = b"PAFR"
+_VERSION = 2
+_FLAG_SENSITIVE = 1
+
+
+@dataclass
+class Frame:
+    """
+    A screen frame read from the ring buffer.
+
+    Has the same fields as the device Screenshot objects, so it can be used
+    anywhere a screenshot is expected.
+    """
+
+    base64_data: str
+    width: int
+    height: int
+    is_sensitive: bool = False
+    mime_type: str = "image/png"
+    seq: int = 0
+    captured_at: float = 0.0  # Wall-clock time the capture started
+    completed_at: float = 0.0  # Wall-clock time the capture finished
+
+
+def ring_name_for_device(device_id: str | None) -> str:
+    """Get the default shared memory name for a device."""
+    suffix = re.sub(r"[^A-Za-z0-9_]", "_", device_id or "default")
+    return f"phone_agent_frames_{suffix}"
+
+
+class SharedFrameRing:
+    """
+    Fixed-size ring of frame slots in shared memory.
+
+    A single writer publishes frames; any number of readers, in this or other
+    processes, can attach by name and read the newest frame. Readers verify
+    the slot sequence number before and after copying, so a frame that is
+    overwritten mid-read is retried instead of returned torn.
+
+    Example:
+        >>> ring = SharedFrameRing.create("frames", slot_count=4)
+        >>> ring.write(base64_data, 1080, 2400, captured_at=t0)
+        >>> reader = SharedFrameRing.attach("frames")
+        >>> frame = reader.read_latest()
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        magic, version, self.slot_count, self.slot_size, self.writer_pid, _ = (
+            _RING_HEADER.unpack_from(shm.buf, 0)
+        )
+        if magic != _MAGIC or version != _VERSION:
+            shm.close()
+            raise ValueError(f"Not a frame ring buffer: {shm.name}")
+
+    @classmethod
+    def create(
+        cls, name: str, slot_count: int = 4, slot_size: int = 8 * 1024 * 1024
+    ) -> "SharedFrameRing":
+        """
+        Create a new ring buffer.
+
+        A segment with the same name is replaced only if it is a frame ring
+        left behind by a writer process that no longer runs.
+
+        Args:
+            name: Shared memory name.
+            slot_count: Number of frame slots.
+            slot_size: Maximum encoded frame size in bytes.
+
+        Returns:
+            The ring buffer, owned by the caller.
+
+        Raises:
+            FileExistsError: If the name is in use by a running writer or by
+                shared memory that is not a frame ring.
+        """
+        size = _RING_HEADER.size + slot_count * (_SLOT_HEADER.size + slot_size)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            cls._remove_stale(name)
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        _RING_HEADER.pack_into(
+            shm.buf, 0, _MAGIC, _VERSION, slot_count, slot_size, os.getpid(), 0
+        )
+        for index in range(slot_count):
+            _SLOT_HEADER.pack_into(
+                shm.buf,
+                cls._slot_offset(index, slot_size),
+                0,
+                0.0,
+                0.0,
+                0,
+                0,
+                0,
+                0,
+                b"",
+            )
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedFrameRing":
+        """Attach to an existing ring buffer by name."""
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+            # Readers must not unlink the writer's segment when they exit
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        """Shared memory name."""
+        return self._shm.name
+
+    @property
+    def latest_seq(self) -> int:
+        """Sequence number of the newest published frame (0 if none)."""
+        return _RING_HEADER.unpack_from(self._shm.buf, 0)[5]
+
+    def write(
+        self,
+        base64_data: str,
+        width: int,
+        height: int,
+        captured_at: float,
+        is_sensitive: bool = False,
+        mime_type: str = "image/png",
+    ) -> int:
+        """
+        Publish a frame.
+
+        Args:
+            base64_data: Base64-encoded image.
+            width: Image width in pixels.
+            height: Image height in pixels.
+            captured_at: Wall-clock time the capture started.
+            is_sensitive: Whether the frame is a sensitive-screen placeholder.
+            mime_type: MIME type of the encoded image.
+
+        Returns:
+            Sequence number of the published frame.
+
+        Raises:
+            ValueError: If the frame does not fit in a slot.
+        """
+        payload = base64_data.encode("ascii")
+        if len(payload) > self.slot_size:
+            raise ValueError(
+                f"Frame of {len(payload)} bytes exceeds slot size {self.slot_size}"
+            )
+
+        seq = self.latest_seq + 1
+        offset = self._slot_offset((seq - 1) % self.slot_count, self.slot_size)
+        buf = self._shm.buf
+
+        # Mark the slot as being written before touching the payload
+        struct.pack_into("<Q", buf, offset, 0)
+        data_offset = offset + _SLOT_HEADER.size
+        buf[data_offset : data_offset + len(payload)] = payload
+        _SLOT_HEADER.pack_into(
+            buf,
+            offset,
+            seq,
+            captured_at,
+            time.time(),
+            width,
+            height,
+            len(payload),
+            _FLAG_SENSITIVE if is_sensitive else 0,
+            mime_type.encode("ascii")[:16],
+        )
+        struct.pack_into("<Q", buf, _RING_HEADER.size - 8, seq)
+        return seq
+
+    def read_latest(self, retries: int = 3) -> Frame | None:
+        """
+        Read the newest frame.
+
+        Args:
+            retries: Attempts if the slot is overwritten while reading.
+
+        Returns:
+            The newest Frame, or None if nothing has been published yet.
+        """
+        for _ in range(retries):
+            seq = self.latest_seq
+            if seq == 0:
+                return None
+
+            offset = self._slot_offset((seq - 1) % self.slot_count, self.slot_size)
+            header = _SLOT_HEADER.unpack_from(self._shm.buf, offset)
+            if header[0] != seq:
+                continue
+
+            _, captured_at, completed_at, width, height, length, flags, mime = header
+            data_offset = offset + _SLOT_HEADER.size
+            payload = bytes(self._shm.buf[data_offset : data_offset + length])
+
+            # The writer may have lapped us while copying
+            if struct.unpack_from("<Q", self._shm.buf, offset)[0] != seq:
+                continue
+
+            return Frame(
+                base64_data=payload.decode("ascii"),
+                width=width,
+                height=height,
+                is_sensitive=bool(flags & _FLAG_SENSITIVE),
+                mime_type=mime.rstrip(b"\x00").decode("ascii"),
+                seq=seq,
+                captured_at=captured_at,
+                completed_at=completed_at,
+            )
+        return None
+
+    def close(self) -> None:
+        """Detach from the ring buffer, and remove it if this process created it."""
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    @classmethod
+    def _remove_stale(cls, name: str) -> None:
+        """Unlink a ring whose writer has exited; raise if it may be in use."""
+        shm = shared_memory.SharedMemory(name=name)
+        magic, version, pid = b"", 0, 0
+        if shm.size >= _RING_HEADER.size:
+            magic, version, _, _, pid, _ = _RING_HEADER.unpack_from(shm.buf, 0)
+        if magic == _MAGIC and version == _VERSION and not _process_running(pid):
+            shm.close()
+            shm.unlink()
+            return
+
+        shm.close()
+        if sys.version_info < (3, 13) and pid != os.getpid():
+            # Opening registered the segment; keep our exit from unlinking it
+            resource_tracker.unregister(shm._name, "shared_memory")
+        if magic != _MAGIC or version != _VERSION:
+            raise FileExistsError(
+                f"Shared memory {name} exists and is not a frame ring buffer"
+            )
+        raise FileExistsError(
+            f"Frame ring buffer {name} is in use by process {pid}; "
+            "set a different ring name"
+        )
+
+    @staticmethod
+    def _slot_offset(index: int, slot_size: int) -> int:
+        """Byte offset of a slot header."""
+        return _RING_HEADER.size + index * (_SLOT_HEADER.size + slot_size)
+
+
+def _process_running(pid: int) -> bool:
+    """Whether a process with the given ID exists."""
+    if sys.platform == "win32":
+        # Windows frees shared memory with its last handle, so an existing
+        # segment always has a live owner
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
@@ -0,0 +1,215 @@
+"""Background per-device capture service."""
+
+import atexit
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from phone_agent.capture.ring_buffer import Frame, SharedFrameRing, ring_name_for_device
+
+# Running services by device ID, so device backends can reuse their frames
+_services: dict[str | None, "CaptureService"] = {}
+_services_lock = threading.Lock()
+
+
+@dataclass
+class CaptureConfig:
+    """Configuration for the background capture service."""
+
+    # Seconds between capture starts while no consumer is waiting for a newer
+    # frame; keeps screencap from competing with input commands on the device
+    min_interval: float = 1.0
+    slot_count: int = 4  # Frames kept in the ring buffer
+    slot_size: int = 8 * 1024 * 1024  # Maximum base64 frame size in bytes
+    ring_name: str | None = None  # Shared memory name; derived from device ID if None
+
+
+class CaptureService:
+    """
+    Continuously captures frames from one device into a shared-memory ring buffer.
+
+    Takes screenshot capture off the agent's critical path: the agent asks
+    for the newest frame taken after its last action finished, instead of
+    spawning a capture on demand. Other consumers (loggers, settle detectors,
+    other processes via SharedFrameRing.attach) can share the same stream.
+
+    While nobody waits, captures are spaced by config.min_interval so the
+    device is not kept busy with screencap; get_frame waiting for a newer
+    frame starts the next capture immediately.
+
+    Args:
+        device_id: Optional device ID for multi-device setups.
+        capture_fn: Callable returning a Screenshot-like object. Defaults to
+            the device factory's get_screenshot, so it follows the configured
+            capture mode (exec-out PNG or raw framebuffer).
+        config: Capture service configuration.
+
+    Example:
+        >>> service = CaptureService(device_id="emulator-5554")
+        >>> service.start()
+        >>> frame = service.get_frame(newer_than=last_action_end)
+        >>> service.stop()
+    """
+
+    def __init__(
+        self,
+        device_id: str | None = None,
+        capture_fn: Callable[[], Any] | None = None,
+        config: CaptureConfig | None = None,
+    ):
+        self.device_id = device_id
+        self.config = config or CaptureConfig()
+        self._capture_fn = capture_fn or self._default_capture
+        self._ring: SharedFrameRing | None = None
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        self._new_frame = threading.Condition()
+        self._frame_wanted = threading.Event()  # A consumer waits for a newer frame
+        self._last_error: Exception | None = None  # Error of the latest capture
+        self._captures = 0  # Completed capture attempts, failed or not
+
+    @property
+    def ring_name(self) -> str:
+        """Name of the shared memory ring buffer, for attaching from other processes."""
+        return self.config.ring_name or ring_name_for_device(self.device_id)
+
+    @property
+    def last_error(self) -> Exception | None:
+        """Error of the latest capture attempt, or None if it succeeded."""
+        return self._last_error
+
+    @property
+    def running(self) -> bool:
+        """Whether the capture thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Create the ring buffer and start the capture thread."""
+        if self.running:
+            return
+
+        self._ring = SharedFrameRing.create(
+            self.ring_name,
+            slot_count=self.config.slot_count,
+            slot_size=self.config.slot_size,
+        )
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"capture-{self.ring_name}", daemon=True
+        )
+        self._thread.start()
+        with _services_lock:
+            _services[self.device_id] = self
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Stop the capture thread and remove the ring buffer."""
+        with _services_lock:
+            if _services.get(self.device_id) is self:
+                del _services[self.device_id]
+        self._stop_event.set()
+        self._frame_wanted.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+        atexit.unregister(self.stop)
+
+    def latest(self) -> Frame | None:
+        """Get the newest frame without waiting."""
+        if self._ring is None:
+            return None
+        return self._ring.read_latest()
+
+    def get_frame(
+        self, newer_than: float | None = None, timeout: float = 10.0
+    ) -> Frame | None:
+        """
+        Get the newest frame whose capture started at or after a given time.
+
+        Args:
+            newer_than: Wall-clock time (time.time()) the frame capture must
+                not predate, e.g. when the last action finished. None accepts
+                any frame.
+            timeout: Maximum seconds to wait for a suitable frame.
+
+        Returns:
+            The frame, or None if the service is not running, timed out, or
+            a capture failed while waiting (see last_error), so the caller
+            can capture directly instead of waiting out the timeout.
+        """
+        deadline = time.monotonic() + timeout
+        with self._new_frame:
+            captures = self._captures
+            while True:
+                frame = self.latest()
+                if frame is not None and (
+                    newer_than is None or frame.captured_at >= newer_than
+                ):
+                    return frame
+
+                if self._captures != captures and self._last_error is not None:
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.running:
+                    return None
+                # Start the next capture now instead of after min_interval
+                self._frame_wanted.set()
+                self._new_frame.wait(min(remaining, 0.5))
+
+    def _run(self) -> None:
+        """Capture loop."""
+        while not self._stop_event.is_set():
+            self._frame_wanted.clear()
+            captured_at = time.time()
+            try:
+                screenshot = self._capture_fn()
+                self._ring.write(
+                    screenshot.base64_data,
+                    screenshot.width,
+                    screenshot.height,
+                    captured_at=captured_at,
+                    is_sensitive=screenshot.is_sensitive,
+                    mime_type=getattr(screenshot, "mime_type", "image/png"),
+                )
+                error = None
+            except Exception as e:
+                # Includes frames larger than a ring slot
+                if type(e) is not type(self._last_error):
+                    print(f"Capture service error: {e}")
+                error = e
+
+            with self._new_frame:
+                self._last_error = error
+                self._captures += 1
+                self._new_frame.notify_all()
+            if error is not None:
+                self._stop_event.wait(1.0)
+                continue
+
+            elapsed = time.time() - captured_at
+            if elapsed < self.config.min_interval:
+                self._frame_wanted.wait(self.config.min_interval - elapsed)
+
+    def _default_capture(self) -> Any:
+        """Capture through the global device factory."""
+        from phone_agent.device_factory import get_device_factory
+
+        return get_device_factory().get_screenshot(self.device_id)
+
+
+def get_capture_service(device_id: str | None = None) -> CaptureService | None:
+    """
+    Get the running capture service of a device, if any.
+
+    Args:
+        device_id: Optional device ID.
+
+    Returns:
+        The CaptureService, or None if no service runs for the device.
+    """
+    with _services_lock:
+        return _services.get(device_id)
@@ -13,11 +13,18 @@ from phone_agent.config.scoring_prompts_zh import (
     SCORING_SYSTEM_PROMPT as SCORING_SYSTEM_PROMPT_ZH,
     SCORING_USER_PROMPT_TEMPLATE as SCORING_USER_PROMPT_TEMPLATE_ZH,
 )
+from phone_agent.config.screenshot import (
+    SCREENSHOT_CONFIG,
+    ScreenshotConfig,
+    get_screenshot_config,
+    update_screenshot_config,
+)
 from phone_agent.config.timing import (
     TIMING_CONFIG,
     ActionTimingConfig,
     ConnectionTimingConfig,
     DeviceTimingConfig,
+    SettleTimingConfig,
     TimingConfig,
     get_timing_config,
     update_timing_config,
@@ -77,6 +84,11 @@ __all__ = [
     "ActionTimingConfig",
     "DeviceTimingConfig",
     "ConnectionTimingConfig",
+    "SettleTimingConfig",
     "get_timing_config",
     "update_timing_config",
+    "SCREENSHOT_CONFIG",
+    "ScreenshotConfig",
+    "get_screenshot_config",
+    "update_screenshot_config",
 ]
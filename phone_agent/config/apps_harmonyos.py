@@ -227,6 +227,13 @@ APP_PACKAGES: dict[str, str] = {
 }
 
 
+# Reverse index for O(1) lookups by package. When several names share one,
+# the first listed wins.
+PACKAGE_APP_NAMES: dict[str, str] = {
+    package: name for name, package in reversed(APP_PACKAGES.items())
+}
+
+
 def get_package_name(app_name: str) -> str | None:
     """
     Get the package name for an app.
@@ -250,10 +257,7 @@ def get_app_name(package_name: str) -> str | None:
     Returns:
         The display name of the app, or None if not found.
     """
-    for name, package in APP_PACKAGES.items():
-        if package == package_name:
-            return name
-    return None
+    return PACKAGE_APP_NAMES.get(package_name)
 
 
 def list_supported_apps() -> list[str]:
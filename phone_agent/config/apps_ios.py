@@ -201,6 +201,13 @@ APP_PACKAGES_IOS: dict[str, str] = {
 }
 
 
+# Reverse index for O(1) lookups by bundle ID. When several names share one,
+# the first listed wins.
+BUNDLE_ID_APP_NAMES: dict[str, str] = {
+    bid: name for name, bid in reversed(APP_PACKAGES_IOS.items())
+}
+
+
 def get_bundle_id(app_name: str) -> str | None:
     """
     Get the iOS bundle ID for an app.
@@ -224,10 +231,7 @@ def get_app_name(bundle_id: str) -> str | None:
     Returns:
         The display name of the app, or None if not found.
     """
-    for name, bid in APP_PACKAGES_IOS.items():
-        if bid == bundle_id:
-            return name
-    return None
+    return BUNDLE_ID_APP_NAMES.get(bundle_id)
 
 
 def list_supported_apps() -> list[str]:
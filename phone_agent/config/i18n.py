@@ -23,6 +23,7 @@ MESSAGES_ZH = {
     "time_to_first_token": "首 Token 延迟 (TTFT)",
     "time_to_thinking_end": "思考完成延迟",
     "total_inference_time": "总推理时间",
+    "thinking_budget_hint": "请简要思考，直接给出操作。",
     "scoring_task": "评估任务执行",
     "scoring_failed": "评分失败",
     "completion_quality": "完成质量",
@@ -56,6 +57,7 @@ MESSAGES_EN = {
     "time_to_first_token": "Time to First Token (TTFT)",
     "time_to_thinking_end": "Time to Thinking End",
     "total_inference_time": "Total Inference Time",
+    "thinking_budget_hint": "Think briefly and give the action directly.",
     "scoring_task": "Evaluating Task Execution",
     "scoring_failed": "Scoring Failed",
     "completion_quality": "Completion Quality",
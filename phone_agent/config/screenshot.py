@@ -0,0 +1,83 @@
+"""Screenshot capture configuration for Phone Agent.
+
+This module defines how device screenshots are captured and encoded on the host.
+Users can customize these values by modifying this file or by setting environment variables.
+"""
+
+import os
+from dataclasses import dataclass
+
+
+@dataclass
+class ScreenshotConfig:
+    """Configuration for screenshot capture and host-side encoding."""
+
+    # Capture mode: "png" streams the PNG produced by screencap on the device,
+    # "raw" reads the uncompressed framebuffer and encodes it on the host.
+    capture_mode: str = "png"
+    # Output codec for host-side encoding: "png", "jpeg" or "webp"
+    output_format: str = "png"
+    png_compress_level: int = 1  # 0 (none) to 9 (smallest, slowest)
+    jpeg_quality: int = 90  # 1 to 95
+    webp_quality: int = 90  # 0 to 100
+
+    def __post_init__(self):
+        """Load values from environment variables if present."""
+        self.capture_mode = os.getenv(
+            "PHONE_AGENT_SCREENSHOT_MODE", self.capture_mode
+        ).lower()
+        self.output_format = os.getenv(
+            "PHONE_AGENT_SCREENSHOT_FORMAT", self.output_format
+        ).lower()
+        self.png_compress_level = int(
+            os.getenv("PHONE_AGENT_PNG_COMPRESS_LEVEL", self.png_compress_level)
+        )
+        self.jpeg_quality = int(
+            os.getenv("PHONE_AGENT_JPEG_QUALITY", self.jpeg_quality)
+        )
+        self.webp_quality = int(
+            os.getenv("PHONE_AGENT_WEBP_QUALITY", self.webp_quality)
+        )
+
+
+# Global screenshot configuration instance
+# Users can modify these values at runtime or through environment variables
+SCREENSHOT_CONFIG = ScreenshotConfig()
+
+
+def get_screenshot_config() -> ScreenshotConfig:
+    """
+    Get the global screenshot configuration.
+
+    Returns:
+        The global ScreenshotConfig instance.
+    """
+    return SCREENSHOT_CONFIG
+
+
+def update_screenshot_config(config: ScreenshotConfig) -> None:
+    """
+    Update the global screenshot configuration.
+
+    Args:
+        config: New screenshot configuration.
+
+    Example:
+        >>> from phone_agent.config.screenshot import (
+        ...     ScreenshotConfig,
+        ...     update_screenshot_config,
+        ... )
+        >>> update_screenshot_config(
+        ...     ScreenshotConfig(capture_mode="raw", output_format="jpeg")
+        ... )
+    """
+    global SCREENSHOT_CONFIG
+    SCREENSHOT_CONFIG = config
+
+
+__all__ = [
+    "ScreenshotConfig",
+    "SCREENSHOT_CONFIG",
+    "get_screenshot_config",
+    "update_screenshot_config",
+]
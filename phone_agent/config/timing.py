@@ -76,6 +76,88 @@ class DeviceTimingConfig:
         )
 
 
+@dataclass
+class SettleTimingConfig:
+    """Configuration for waiting until the screen is visually stable after actions.
+
+    When enabled, the fixed post-action delays above become upper bounds: after
+    an action the device is sampled with cheap low-resolution frames and the
+    wait ends as soon as consecutive frames stop changing.
+    """
+
+    enabled: bool = False  # Replace fixed post-action sleeps with settle detection
+    sample_interval: float = 0.05  # Delay between settle frames (in seconds)
+    stable_frames: int = 2  # Consecutive unchanged frame pairs required
+    diff_threshold: float = 2.0  # Max mean absolute grayscale difference (0-255)
+    thumbnail_width: int = 72  # Width of the downscaled frames that are compared
+
+    # Minimum wait per action type before sampling starts (in seconds)
+    min_tap_delay: float = 0.15
+    min_swipe_delay: float = 0.3
+    min_back_delay: float = 0.2
+    min_home_delay: float = 0.3
+    min_launch_delay: float = 0.5
+    min_type_delay: float = 0.1
+
+    def __post_init__(self):
+        """Load values from environment variables if present."""
+        self.enabled = os.getenv(
+            "PHONE_AGENT_SETTLE_ENABLED", str(self.enabled)
+        ).lower() in ("true", "1", "yes")
+        self.sample_interval = float(
+            os.getenv("PHONE_AGENT_SETTLE_SAMPLE_INTERVAL", self.sample_interval)
+        )
+        self.stable_frames = int(
+            os.getenv("PHONE_AGENT_SETTLE_STABLE_FRAMES", self.stable_frames)
+        )
+        self.diff_threshold = float(
+            os.getenv("PHONE_AGENT_SETTLE_DIFF_THRESHOLD", self.diff_threshold)
+        )
+        self.thumbnail_width = int(
+            os.getenv("PHONE_AGENT_SETTLE_THUMBNAIL_WIDTH", self.thumbnail_width)
+        )
+        self.min_tap_delay = float(
+            os.getenv("PHONE_AGENT_SETTLE_MIN_TAP_DELAY", self.min_tap_delay)
+        )
+        self.min_swipe_delay = float(
+            os.getenv("PHONE_AGENT_SETTLE_MIN_SWIPE_DELAY", self.min_swipe_delay)
+        )
+        self.min_back_delay = float(
+            os.getenv("PHONE_AGENT_SETTLE_MIN_BACK_DELAY", self.min_back_delay)
+        )
+        self.min_home_delay = float(
+            os.getenv("PHONE_AGENT_SETTLE_MIN_HOME_DELAY", self.min_home_delay)
+        )
+        self.min_launch_delay = float(
+            os.getenv("PHONE_AGENT_SETTLE_MIN_LAUNCH_DELAY", self.min_launch_delay)
+        )
+        self.min_type_delay = float(
+            os.getenv("PHONE_AGENT_SETTLE_MIN_TYPE_DELAY", self.min_type_delay)
+        )
+
+    def get_min_delay(self, action: str) -> float:
+        """
+        Get the minimum settle wait for an action type.
+
+        Args:
+            action: Action type, e.g. "tap", "double_tap", "swipe", "launch".
+
+        Returns:
+            Minimum delay in seconds.
+        """
+        delays = {
+            "tap": self.min_tap_delay,
+            "double_tap": self.min_tap_delay,
+            "long_press": self.min_tap_delay,
+            "swipe": self.min_swipe_delay,
+            "back": self.min_back_delay,
+            "home": self.min_home_delay,
+            "launch": self.min_launch_delay,
+            "type": self.min_type_delay,
+        }
+        return delays.get(action, self.min_tap_delay)
+
+
 @dataclass
 class ConnectionTimingConfig:
     """Configuration for ADB connection timing delays."""
@@ -103,12 +185,14 @@ class TimingConfig:
     action: ActionTimingConfig
     device: DeviceTimingConfig
     connection: ConnectionTimingConfig
+    settle: SettleTimingConfig
 
     def __init__(self):
         """Initialize all timing configurations."""
         self.action = ActionTimingConfig()
         self.device = DeviceTimingConfig()
         self.connection = ConnectionTimingConfig()
+        self.settle = SettleTimingConfig()
 
 
 # Global timing configuration instance
@@ -130,6 +214,7 @@ def update_timing_config(
     action: ActionTimingConfig | None = None,
     device: DeviceTimingConfig | None = None,
     connection: ConnectionTimingConfig | None = None,
+    settle: SettleTimingConfig | None = None,
 ) -> None:
     """
     Update the global timing configuration.
@@ -138,6 +223,7 @@ def update_timing_config(
         action: New action timing configuration.
         device: New device timing configuration.
         connection: New connection timing configuration.
+        settle: New settle detection configuration.
 
     Example:
         >>> from phone_agent.config.timing import update_timing_config, ActionTimingConfig
@@ -154,12 +240,15 @@ def update_timing_config(
         TIMING_CONFIG.device = device
     if connection is not None:
         TIMING_CONFIG.connection = connection
+    if settle is not None:
+        TIMING_CONFIG.settle = settle
 
 
 __all__ = [
     "ActionTimingConfig",
     "DeviceTimingConfig",
     "ConnectionTimingConfig",
+    "SettleTimingConfig",
     "TimingConfig",
     "TIMING_CONFIG",
     "get_timing_config",
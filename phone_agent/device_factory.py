@@ -49,6 +49,10 @@ class DeviceFactory:
         """Get screenshot from device."""
         return self.module.get_screenshot(device_id, timeout)
 
+    def get_settle_frame(self, device_id: str | None = None):
+        """Get a small grayscale frame for settle detection."""
+        return self.module.get_settle_frame(device_id)
+
     def get_current_app(self, device_id: str | None = None) -> str:
         """Get current app name."""
         return self.module.get_current_app(device_id)
@@ -24,11 +24,12 @@ from phone_agent.hdc.input import (
     restore_keyboard,
     type_text,
 )
-from phone_agent.hdc.screenshot import get_screenshot
+from phone_agent.hdc.screenshot import get_screenshot, get_settle_frame
 
 __all__ = [
     # Screenshot
     "get_screenshot",
+    "get_settle_frame",
     # Input
     "type_text",
     "clear_text",
@@ -5,9 +5,15 @@ import subprocess
 import time
 from typing import List, Optional, Tuple
 
-from phone_agent.config.apps_harmonyos import APP_ABILITIES, APP_PACKAGES
+from phone_agent.config.apps_harmonyos import (
+    APP_ABILITIES,
+    APP_PACKAGES,
+    PACKAGE_APP_NAMES,
+)
 from phone_agent.config.timing import TIMING_CONFIG
-from phone_agent.hdc.connection import _run_hdc_command
+from phone_agent.hdc.screenshot import get_settle_frame
+from phone_agent.hdc.shell import run_shell_command
+from phone_agent.utils.settle import wait_after_action
 import re
 
 def get_current_app(device_id: str | None = None) -> str:
@@ -20,16 +26,14 @@ def get_current_app(device_id: str | None = None) -> str:
     Returns:
         The app name if recognized, otherwise "System Home".
     """
-    hdc_prefix = _get_hdc_prefix(device_id)
-
-    # Use 'aa dump -l' to list running abilities
-    result = _run_hdc_command(
-        hdc_prefix + ["shell", "aa", "dump", "-l"],
-        capture_output=True,
-        text=True,
-        encoding="utf-8"
+    # Use 'aa dump -l' to list running abilities, keeping only the lines the
+    # parser below looks at
+    result = run_shell_command(
+        device_id, ["aa dump -l | grep -iE 'Mission ID|app name \\[|state #'"]
     )
     output = result.stdout
+    if not output.strip():
+        output = run_shell_command(device_id, ["aa", "dump", "-l"]).stdout
     # print(output)
     if not output:
         raise ValueError("No output from aa dump")
@@ -67,9 +71,9 @@ def get_current_app(device_id: str | None = None) -> str:
 
     # Match against known apps
     if foreground_bundle:
-        for app_name, package in APP_PACKAGES.items():
-            if package == foreground_bundle:
-                return app_name
+        app_name = PACKAGE_APP_NAMES.get(foreground_bundle)
+        if app_name:
+            return app_name
         # If bundle is found but not in our known apps, return the bundle name
         print(f'Bundle is found but not in our known apps: {foreground_bundle}')
         return foreground_bundle
@@ -92,14 +96,9 @@ def tap(
     if delay is None:
         delay = TIMING_CONFIG.device.default_tap_delay
 
-    hdc_prefix = _get_hdc_prefix(device_id)
-
     # HarmonyOS uses uitest uiInput click
-    _run_hdc_command(
-        hdc_prefix + ["shell", "uitest", "uiInput", "click", str(x), str(y)],
-        capture_output=True
-    )
-    time.sleep(delay)
+    run_shell_command(device_id, ["uitest", "uiInput", "click", str(x), str(y)])
+    _wait_after_action("tap", delay, device_id)
 
 
 def double_tap(
@@ -117,14 +116,9 @@ def double_tap(
     if delay is None:
         delay = TIMING_CONFIG.device.default_double_tap_delay
 
-    hdc_prefix = _get_hdc_prefix(device_id)
-
     # HarmonyOS uses uitest uiInput doubleClick
-    _run_hdc_command(
-        hdc_prefix + ["shell", "uitest", "uiInput", "doubleClick", str(x), str(y)],
-        capture_output=True
-    )
-    time.sleep(delay)
+    run_shell_command(device_id, ["uitest", "uiInput", "doubleClick", str(x), str(y)])
+    _wait_after_action("double_tap", delay, device_id)
 
 
 def long_press(
@@ -147,15 +141,10 @@ def long_press(
     if delay is None:
         delay = TIMING_CONFIG.device.default_long_press_delay
 
-    hdc_prefix = _get_hdc_prefix(device_id)
-
     # HarmonyOS uses uitest uiInput longClick
     # Note: longClick may have a fixed duration, duration_ms parameter might not be supported
-    _run_hdc_command(
-        hdc_prefix + ["shell", "uitest", "uiInput", "longClick", str(x), str(y)],
-        capture_output=True,
-    )
-    time.sleep(delay)
+    run_shell_command(device_id, ["uitest", "uiInput", "longClick", str(x), str(y)])
+    _wait_after_action("long_press", delay, device_id)
 
 
 def swipe(
@@ -182,8 +171,6 @@ def swipe(
     if delay is None:
         delay = TIMING_CONFIG.device.default_swipe_delay
 
-    hdc_prefix = _get_hdc_prefix(device_id)
-
     if duration_ms is None:
         # Calculate duration based on distance
         dist_sq = (start_x - end_x) ** 2 + (start_y - end_y) ** 2
@@ -192,10 +179,9 @@ def swipe(
 
     # HarmonyOS uses uitest uiInput swipe
     # Format: swipe startX startY endX endY duration
-    _run_hdc_command(
-        hdc_prefix
-        + [
-            "shell",
+    run_shell_command(
+        device_id,
+        [
             "uitest",
             "uiInput",
             "swipe",
@@ -205,9 +191,8 @@ def swipe(
             str(end_y),
             str(duration_ms),
         ],
-        capture_output=True,
     )
-    time.sleep(delay)
+    _wait_after_action("swipe", delay, device_id)
 
 
 def back(device_id: str | None = None, delay: float | None = None) -> None:
@@ -221,14 +206,9 @@ def back(device_id: str | None = None, delay: float | None = None) -> None:
     if delay is None:
         delay = TIMING_CONFIG.device.default_back_delay
 
-    hdc_prefix = _get_hdc_prefix(device_id)
-
     # HarmonyOS uses uitest uiInput keyEvent Back
-    _run_hdc_command(
-        hdc_prefix + ["shell", "uitest", "uiInput", "keyEvent", "Back"],
-        capture_output=True
-    )
-    time.sleep(delay)
+    run_shell_command(device_id, ["uitest", "uiInput", "keyEvent", "Back"])
+    _wait_after_action("back", delay, device_id)
 
 
 def home(device_id: str | None = None, delay: float | None = None) -> None:
@@ -242,14 +222,9 @@ def home(device_id: str | None = None, delay: float | None = None) -> None:
     if delay is None:
         delay = TIMING_CONFIG.device.default_home_delay
 
-    hdc_prefix = _get_hdc_prefix(device_id)
-
     # HarmonyOS uses uitest uiInput keyEvent Home
-    _run_hdc_command(
-        hdc_prefix + ["shell", "uitest", "uiInput", "keyEvent", "Home"],
-        capture_output=True
-    )
-    time.sleep(delay)
+    run_shell_command(device_id, ["uitest", "uiInput", "keyEvent", "Home"])
+    _wait_after_action("home", delay, device_id)
 
 
 def launch_app(
@@ -274,7 +249,6 @@ def launch_app(
         print(f"[HDC] Available apps: {', '.join(sorted(APP_PACKAGES.keys())[:10])}...")
         return False
 
-    hdc_prefix = _get_hdc_prefix(device_id)
     bundle = APP_PACKAGES[app_name]
 
     # Get the ability name for this bundle
@@ -283,10 +257,9 @@ def launch_app(
 
     # HarmonyOS uses 'aa start' command to launch apps
     # Format: aa start -b {bundle} -a {ability}
-    _run_hdc_command(
-        hdc_prefix
-        + [
-            "shell",
+    run_shell_command(
+        device_id,
+        [
             "aa",
             "start",
             "-b",
@@ -294,17 +267,15 @@ def launch_app(
             "-a",
             ability,
         ],
-        capture_output=True,
     )
-    time.sleep(delay)
+    _wait_after_action("launch", delay, device_id)
     return True
 
 
-def _get_hdc_prefix(device_id: str | None) -> list:
-    """Get HDC command prefix with optional device specifier."""
-    if device_id:
-        return ["hdc", "-t", device_id]
-    return ["hdc"]
+def _wait_after_action(action: str, delay: float, device_id: str | None) -> None:
+    """Wait after an action, returning early once the screen settles if enabled."""
+    wait_after_action(action, delay, lambda: get_settle_frame(device_id))
+
 
 if __name__ == "__main__":
     print(get_current_app())
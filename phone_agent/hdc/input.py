@@ -5,6 +5,7 @@ import subprocess
 from typing import Optional
 
 from phone_agent.hdc.connection import _run_hdc_command
+from phone_agent.hdc.shell import run_shell_command
 
 
 def type_text(text: str, device_id: str | None = None) -> None:
@@ -74,19 +75,10 @@ def clear_text(device_id: str | None = None) -> None:
         This method uses repeated delete key events to clear text.
         For HarmonyOS, you might also use select all + delete for better efficiency.
     """
-    hdc_prefix = _get_hdc_prefix(device_id)
     # Ctrl+A to select all (key code 2072 for Ctrl, 2017 for A)
     # Then delete
-    _run_hdc_command(
-        hdc_prefix + ["shell", "uitest", "uiInput", "keyEvent", "2072", "2017"],
-        capture_output=True,
-        text=True,
-    )
-    _run_hdc_command(
-        hdc_prefix + ["shell", "uitest", "uiInput", "keyEvent", "2055"],  # Delete key
-        capture_output=True,
-        text=True,
-    )
+    run_shell_command(device_id, ["uitest", "uiInput", "keyEvent", "2072", "2017"])
+    run_shell_command(device_id, ["uitest", "uiInput", "keyEvent", "2055"])  # Delete key
 
 
 def detect_and_set_adb_keyboard(device_id: str | None = None) -> str:
@@ -103,14 +95,10 @@ def detect_and_set_adb_keyboard(device_id: str | None = None) -> str:
         This is a placeholder. HarmonyOS may not support ADB Keyboard.
         If there's a similar tool for HarmonyOS, integrate it here.
     """
-    hdc_prefix = _get_hdc_prefix(device_id)
-
     # Get current IME (if HarmonyOS supports this)
     try:
-        result = _run_hdc_command(
-            hdc_prefix + ["shell", "settings", "get", "secure", "default_input_method"],
-            capture_output=True,
-            text=True,
+        result = run_shell_command(
+            device_id, ["settings", "get", "secure", "default_input_method"]
         )
         current_ime = (result.stdout + result.stderr).strip()
 
@@ -132,12 +120,8 @@ def restore_keyboard(ime: str, device_id: str | None = None) -> None:
     if not ime:
         return
 
-    hdc_prefix = _get_hdc_prefix(device_id)
-
     try:
-        _run_hdc_command(
-            hdc_prefix + ["shell", "ime", "set", ime], capture_output=True, text=True
-        )
+        run_shell_command(device_id, ["ime", "set", ime])
     except Exception:
         pass
 
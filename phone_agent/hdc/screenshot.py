@@ -4,13 +4,21 @@ import base64
 import os
 import subprocess
 import tempfile
+import time
 import uuid
 from dataclasses import dataclass
-from io import BytesIO
 from typing import Tuple
 
 from PIL import Image
+from phone_agent.capture.service import get_capture_service
+from phone_agent.config.timing import TIMING_CONFIG
 from phone_agent.hdc.connection import _run_hdc_command
+from phone_agent.utils.image import (
+    black_image_base64,
+    get_image_mime_type,
+    get_image_size,
+)
+from phone_agent.utils.settle import thumbnail_from_screenshot
 
 
 @dataclass
@@ -21,6 +29,7 @@ class Screenshot:
     width: int
     height: int
     is_sensitive: bool = False
+    mime_type: str = "image/png"
 
 
 def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screenshot:
@@ -80,20 +89,23 @@ def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screensho
         if not os.path.exists(temp_path):
             return _create_fallback_screenshot(is_sensitive=False)
 
-        # Read JPEG image and convert to PNG for model inference
-        # PIL automatically detects the image format from file content
-        img = Image.open(temp_path)
-        width, height = img.size
-
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
-        # Cleanup
+        # Ship the JPEG as-is (prepare_image re-encodes if configured);
+        # the size comes from its header
+        with open(temp_path, "rb") as f:
+            data = f.read()
         os.remove(temp_path)
 
+        size = get_image_size(data)
+        if size is None:
+            return _create_fallback_screenshot(is_sensitive=False)
+        width, height = size
+
         return Screenshot(
-            base64_data=base64_data, width=width, height=height, is_sensitive=False
+            base64_data=base64.b64encode(data).decode("ascii"),
+            width=width,
+            height=height,
+            is_sensitive=False,
+            mime_type=get_image_mime_type(data, default="image/jpeg"),
         )
 
     except Exception as e:
@@ -101,6 +113,27 @@ def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screensho
         return _create_fallback_screenshot(is_sensitive=False)
 
 
+def get_settle_frame(device_id: str | None = None) -> Image.Image | None:
+    """
+    Capture a small grayscale frame for settle detection.
+
+    Uses the background capture service's frames. Without one there is no
+    cheap frame source (every hdc screenshot is a full capture and file
+    transfer), so None is returned and the fixed delay is used instead.
+
+    Args:
+        device_id: Optional HDC device ID.
+
+    Returns:
+        Grayscale thumbnail, or None if no capture service runs.
+    """
+    service = get_capture_service(device_id)
+    if service is None:
+        return None
+    screenshot = service.get_frame(newer_than=time.time(), timeout=5)
+    return thumbnail_from_screenshot(screenshot, TIMING_CONFIG.settle.thumbnail_width)
+
+
 def _get_hdc_prefix(device_id: str | None) -> list:
     """Get HDC command prefix with optional device specifier."""
     if device_id:
@@ -112,13 +145,8 @@ def _create_fallback_screenshot(is_sensitive: bool) -> Screenshot:
     """Create a black fallback image when screenshot fails."""
     default_width, default_height = 1080, 2400
 
-    black_img = Image.new("RGB", (default_width, default_height), color="black")
-    buffered = BytesIO()
-    black_img.save(buffered, format="PNG")
-    base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
     return Screenshot(
-        base64_data=base64_data,
+        base64_data=black_image_base64(default_width, default_height),
         width=default_width,
         height=default_height,
         is_sensitive=is_sensitive,
@@ -0,0 +1,73 @@
+"""Persistent `hdc shell` sessions for low-latency device commands."""
+
+import atexit
+import subprocess
+
+import phone_agent.hdc.connection as hdc_connection
+from phone_agent.hdc.connection import _run_hdc_command
+from phone_agent.utils.shell import DeviceShell, DeviceShells
+
+
+def _hdc_prefix(device_id: str | None) -> list[str]:
+    return ["hdc", "-t", device_id] if device_id else ["hdc"]
+
+
+def _run_once(
+    device_id: str | None, args: list[str], timeout: float | None
+) -> subprocess.CompletedProcess:
+    return _run_hdc_command(
+        _hdc_prefix(device_id) + ["shell"] + args,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        timeout=timeout,
+    )
+
+
+_shells = DeviceShells(lambda device_id: _hdc_prefix(device_id) + ["shell"], _run_once)
+
+
+def get_device_shell(device_id: str | None = None) -> DeviceShell:
+    """
+    Get the persistent shell session for a device, creating it on first use.
+
+    Args:
+        device_id: Optional HDC device ID.
+
+    Returns:
+        DeviceShell for the device.
+    """
+    return _shells.get(device_id)
+
+
+def run_shell_command(
+    device_id: str | None, args: list[str], timeout: float | None = None
+) -> subprocess.CompletedProcess:
+    """
+    Run a shell command through the device's persistent session.
+
+    Falls back to a one-shot `hdc shell` only if the command never reached
+    the session; a session lost mid-command raises instead of rerunning it.
+
+    Args:
+        device_id: Optional HDC device ID.
+        args: Shell command arguments.
+        timeout: Timeout in seconds.
+
+    Returns:
+        CompletedProcess with text stdout and the exit code.
+
+    Raises:
+        EOFError: If the session closed while the command was running.
+    """
+    if hdc_connection._HDC_VERBOSE and _shells.enabled:
+        print(f"[HDC] Running in shell session: {' '.join(args)}")
+    return _shells.run(device_id, args, timeout)
+
+
+def close_device_shells() -> None:
+    """Terminate all persistent shell sessions."""
+    _shells.close()
+
+
+atexit.register(close_device_shells)
@@ -1,5 +1,21 @@
 """Model client module for AI inference."""
 
-from phone_agent.model.client import ModelClient, ModelConfig
+from phone_agent.model.client import AsyncModelClient, ModelClient, ModelConfig
+from phone_agent.model.context import ContextConfig, ContextManager
+from phone_agent.model.hedge import HedgeConfig
+from phone_agent.model.pool import HTTPPoolConfig, configure_http_pool
+from phone_agent.model.router import EndpointRouter
+from phone_agent.model.thinking import ThinkingBudgetConfig
 
-__all__ = ["ModelClient", "ModelConfig"]
+__all__ = [
+    "AsyncModelClient",
+    "ModelClient",
+    "ModelConfig",
+    "HTTPPoolConfig",
+    "configure_http_pool",
+    "EndpointRouter",
+    "HedgeConfig",
+    "ContextConfig",
+    "ContextManager",
+    "ThinkingBudgetConfig",
+]
@@ -1,13 +1,37 @@
 """Model client for AI inference using OpenAI-compatible API."""
 
 import json
+import queue
+import threading
 import time
+import uuid
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Callable
 
-from openai import OpenAI
+from openai import (
+    APIConnectionError,
+    AsyncOpenAI,
+    BadRequestError,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
 
 from phone_agent.config.i18n import get_message
+from phone_agent.model.hedge import HedgeConfig, HedgeController, get_hedge_controller
+from phone_agent.model.pool import get_async_openai_client, get_openai_client
+from phone_agent.model.router import LEAST_OUTSTANDING, Endpoint, get_router
+from phone_agent.model.stream import (
+    ACTION_MARKERS,
+    ActionCompletionTracker,
+    MarkerMatcher,
+)
+from phone_agent.model.thinking import (
+    FORCE_ANSWER,
+    RETRY,
+    ThinkingBudgetConfig,
+    answer_prefix,
+)
 
 
 @dataclass
@@ -23,6 +47,20 @@ class ModelConfig:
     frequency_penalty: float = 0.2
     extra_body: dict[str, Any] = field(default_factory=dict)
     lang: str = "cn"  # Language for UI messages: 'cn' or 'en'
+    stop_on_action_complete: bool = True  # Close the stream once the action is complete
+    # Replica base URLs; when set, requests are routed across them instead of base_url
+    endpoints: list[str] = field(default_factory=list)
+    routing_policy: str = LEAST_OUTSTANDING  # 'least_outstanding' or 'ttft'
+    sticky_sessions: bool = False  # Keep a client on one endpoint (prefix cache)
+    hedge: HedgeConfig | None = None  # Duplicate late requests (ModelClient only)
+    guided_decoding: str | None = None  # Constrain output: 'regex' or 'grammar'
+    thinking_budget: ThinkingBudgetConfig | None = None  # Cap thinking per step
+
+    def __post_init__(self):
+        """Validate option combinations."""
+        if self.hedge is not None and len(self.endpoints) < 2:
+            # Without another replica the hedge would only retry the same server
+            raise ValueError("Hedging requires at least two endpoints")
 
 
 @dataclass
@@ -36,116 +74,320 @@ class ModelResponse:
     time_to_first_token: float | None = None  # Time to first token (seconds)
     time_to_thinking_end: float | None = None  # Time to thinking end (seconds)
     total_time: float | None = None  # Total inference time (seconds)
+    stopped_early: bool = False  # Stream closed once the action was complete
+    endpoint: str | None = None  # Base URL that served the request
+    hedges_fired: int = 0  # Duplicate requests sent because the first token was late
+    hedge_won: bool = False  # A hedge produced the first token
+    thinking_truncated: bool = (
+        False  # Thinking hit the budget and the answer was forced
+    )
 
 
-class ModelClient:
+class _StreamAssembler:
     """
-    Client for interacting with OpenAI-compatible vision-language models.
-
-    Args:
-        config: Model configuration.
+    Per-chunk handling of a streamed response, shared by the sync and async clients.
+
+    Prints thinking as it arrives, records timing, and detects when the
+    action expression is complete: on_action is called with the response up
+    to that point, and the caller may stop reading. With a
+    thinking budget, it also stops reading once the thinking runs over it;
+    thinking tokens are counted as content deltas, which OpenAI-compatible
+    servers stream one per decoded token.
     """
 
-    def __init__(self, config: ModelConfig | None = None):
-        self.config = config or ModelConfig()
-        self.client = OpenAI(base_url=self.config.base_url, api_key=self.config.api_key)
-
-    def request(self, messages: list[dict[str, Any]]) -> ModelResponse:
+    def __init__(
+        self,
+        start_time: float,
+        stop_on_action_complete: bool,
+        thinking_budget: int | None = None,
+        on_action: Callable[[str], None] | None = None,
+    ):
+        self.start_time = start_time
+        self.time_to_first_token: float | None = None
+        self.time_to_thinking_end: float | None = None
+        self.stopped_early = False
+        self.budget_exceeded = False
+        self._stop_on_action_complete = stop_on_action_complete
+        self.thinking_budget = thinking_budget
+        self._thinking_tokens = 0
+        self._on_action = on_action
+        self.restart()
+
+    def restart(self) -> None:
+        """Discard the content received so far, keeping the timings."""
+        # Accumulate chunks in lists and join once; the matcher and tracker
+        # only ever look at each new chunk, so a step costs O(response length)
+        self._thinking_parts: list[str] = []
+        self._action_parts: list[str] = []
+        self._matcher = MarkerMatcher(ACTION_MARKERS)
+        self._in_action_phase = False  # Track if we've entered the action phase
+        self._tracker: ActionCompletionTracker | None = ActionCompletionTracker()
+
+    def feed(self, content: str) -> bool:
         """
-        Send a request to the model.
-
-        Args:
-            messages: List of message dictionaries in OpenAI format.
+        Consume a content delta.
 
         Returns:
-            ModelResponse containing thinking and action.
-
-        Raises:
-            ValueError: If the response cannot be parsed.
+            True once the action is complete, or the thinking budget is
+            spent, and the stream should be closed.
         """
-        # Start timing
-        start_time = time.time()
-        time_to_first_token = None
-        time_to_thinking_end = None
-
-        stream = self.client.chat.completions.create(
-            messages=messages,
-            model=self.config.model_name,
-            max_tokens=self.config.max_tokens,
-            temperature=self.config.temperature,
-            top_p=self.config.top_p,
-            frequency_penalty=self.config.frequency_penalty,
-            extra_body=self.config.extra_body,
-            stream=True,
+        # Record time to first token
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.time() - self.start_time
+
+        if not self._in_action_phase:
+            # Print thinking as it streams, holding back possible marker prefixes
+            emitted, marker = self._matcher.feed(content)
+            self._thinking_parts.append(emitted)
+            print(emitted, end="", flush=True)
+            if marker is None:
+                self._thinking_tokens += 1
+                if (
+                    self.thinking_budget is not None
+                    and not self.budget_exceeded
+                    and self._thinking_tokens > self.thinking_budget
+                ):
+                    # Only once: the follow-up request is capped by max_tokens
+                    self.budget_exceeded = True
+                    return True
+                return False
+
+            print()  # Print newline after thinking is complete
+            self._in_action_phase = True
+
+            # Record time to thinking end
+            self.time_to_thinking_end = time.time() - self.start_time
+
+            self._action_parts.append(marker)
+            content = self._matcher.remainder
+
+        self._action_parts.append(content)
+        if self._tracker is None:
+            return False
+        body_end = self._tracker.feed(content)
+        if body_end is None:
+            return False
+
+        # Complete: notify once, while the server may still be generating
+        self._tracker = None
+        action_text = "".join(self._action_parts)
+        complete = action_text[: len(self._matcher.matched) + body_end]
+        if self._on_action is not None:
+            self._on_action("".join(self._thinking_parts) + complete)
+        if not self._stop_on_action_complete:
+            return False
+
+        # Drop trailing tokens; the caller aborts generation on the server
+        self._action_parts = [complete]
+        self.stopped_early = True
+        return True
+
+    def thinking_so_far(self) -> str:
+        """Return the thinking received so far, including held-back text."""
+        self._thinking_parts.append(self._matcher.flush())
+        return "".join(self._thinking_parts)
+
+    def finish(self) -> str:
+        """Return the raw response content received so far."""
+        if not self._in_action_phase:
+            self._thinking_parts.append(self._matcher.flush())
+        return "".join(self._thinking_parts) + "".join(self._action_parts)
+
+
+# Failures that count against an endpoint and may be retried on another one
+_ENDPOINT_ERRORS = (APIConnectionError, InternalServerError, RateLimitError)
+
+
+def _guided_decoding_params(mode: str, action_handler: type | None) -> dict[str, str]:
+    """extra_body parameters constraining output to the actions the handler supports."""
+    # Imported lazily: the action layer pulls in the device backends
+    from phone_agent.actions.grammar import guided_decoding_params
+
+    if action_handler is None:
+        from phone_agent.actions.handler import ActionHandler
+
+        action_handler = ActionHandler
+    return guided_decoding_params(mode, action_handler)
+
+
+class _BaseModelClient:
+    """Request construction and response handling shared by the model clients."""
+
+    config: ModelConfig
+    action_handler: type | None = None
+
+    def _init_routing(self) -> None:
+        """Set up endpoint routing if the config lists several endpoints."""
+        self.router = (
+            get_router(self.config.endpoints, self.config.routing_policy)
+            if self.config.endpoints
+            else None
         )
+        self.session_key = uuid.uuid4().hex if self.config.sticky_sessions else None
+
+    def _attempts(self) -> int:
+        """How many endpoints a request may try before giving up."""
+        return len(self.router.endpoints) if self.router else 1
+
+    def _acquire_endpoint(
+        self, exclude: list[Endpoint] | None = None
+    ) -> Endpoint | None:
+        """Pick the endpoint for the next attempt (None without routing)."""
+        if self.router is None:
+            return None
+        return self.router.acquire(self.session_key, exclude)
+
+    def _release_endpoint(
+        self,
+        endpoint: Endpoint | None,
+        assembler: _StreamAssembler,
+        attempt_start: float,
+        ok: bool = True,
+    ) -> None:
+        """Report the attempt's outcome and TTFT to the router."""
+        if endpoint is None:
+            return
+        ttft = None
+        if ok and assembler.time_to_first_token is not None:
+            ttft = assembler.start_time + assembler.time_to_first_token - attempt_start
+        self.router.release(endpoint, ttft=ttft, ok=ok)
+
+    def _should_retry(
+        self,
+        endpoint: Endpoint | None,
+        assembler: _StreamAssembler,
+        attempt: int,
+        error: Exception,
+    ) -> bool:
+        """Retry on another endpoint only if nothing was streamed yet."""
+        if (
+            endpoint is None
+            or assembler.time_to_first_token is not None
+            or attempt + 1 >= self._attempts()
+        ):
+            return False
+        print(f"Endpoint {endpoint.base_url} failed, retrying: {error}")
+        return True
+
+    def _completion_kwargs(
+        self,
+        messages: list[dict[str, Any]],
+        max_tokens: int | None = None,
+        extra_body: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Arguments for a streamed chat completion, with optional overrides."""
+        extra_body = {**self.config.extra_body, **(extra_body or {})}
+        if self.config.guided_decoding:
+            extra_body.update(
+                _guided_decoding_params(
+                    self.config.guided_decoding, self.action_handler
+                )
+            )
+        return {
+            "messages": messages,
+            "model": self.config.model_name,
+            "max_tokens": max_tokens or self.config.max_tokens,
+            "temperature": self.config.temperature,
+            "top_p": self.config.top_p,
+            "frequency_penalty": self.config.frequency_penalty,
+            "extra_body": extra_body,
+            "stream": True,
+        }
+
+    def _thinking_budget(self, thinking_budget: int | None) -> int | None:
+        """The step's thinking budget: the argument, else the configured default."""
+        if thinking_budget is not None or self.config.thinking_budget is None:
+            return thinking_budget
+        return self.config.thinking_budget.max_tokens
+
+    def _answer_request(
+        self,
+        messages: list[dict[str, Any]],
+        assembler: _StreamAssembler,
+        strategy: str,
+    ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        """
+        Build the follow-up request that gets the action once the budget is spent.
 
-        raw_content = ""
-        buffer = ""  # Buffer to hold content that might be part of a marker
-        action_markers = ["finish(message=", "do(action="]
-        in_action_phase = False  # Track if we've entered the action phase
-        first_token_received = False
-
-        for chunk in stream:
-            if len(chunk.choices) == 0:
-                continue
-            if chunk.choices[0].delta.content is not None:
-                content = chunk.choices[0].delta.content
-                raw_content += content
-
-                # Record time to first token
-                if not first_token_received:
-                    time_to_first_token = time.time() - start_time
-                    first_token_received = True
+        FORCE_ANSWER continues the truncated response with the answer opened
+        (vLLM's continue_final_message), on the same endpoint so the prompt and
+        the thinking are served from the prefix cache. RETRY discards the
+        response and asks again with a short-thinking hint.
 
-                if in_action_phase:
-                    # Already in action phase, just accumulate content without printing
-                    continue
+        Returns:
+            Tuple of (messages, completion overrides).
+        """
+        config = self.config.thinking_budget or ThinkingBudgetConfig()
+        if strategy == FORCE_ANSWER:
+            thinking = assembler.thinking_so_far()
+            prefix = answer_prefix(thinking)
+            assembler.feed(prefix)
+            return messages + [
+                MessageBuilder.create_assistant_message(thinking + prefix)
+            ], {
+                "max_tokens": config.answer_max_tokens,
+                "extra_body": {
+                    "continue_final_message": True,
+                    "add_generation_prompt": False,
+                },
+            }
+
+        assembler.restart()
+        hint = get_message("thinking_budget_hint", self.config.lang)
+        last = messages[-1]
+        content = last["content"]
+        if isinstance(content, list):
+            content = content + [{"type": "text", "text": hint}]
+        else:
+            content = f"{content}\n\n{hint}"
+        return messages[:-1] + [{**last, "content": content}], {
+            "max_tokens": assembler.thinking_budget + config.answer_max_tokens
+        }
+
+    def _answer_strategy(self) -> str:
+        """Announce the budget overrun and return the configured strategy."""
+        config = self.config.thinking_budget or ThinkingBudgetConfig()
+        print(f"\nThinking budget exceeded, forcing the answer ({config.strategy})")
+        return config.strategy
+
+    def _assembler(
+        self,
+        on_action: Callable[[str], None] | None,
+        thinking_budget: int | None,
+    ) -> _StreamAssembler:
+        """A stream assembler for one request, starting its clock now."""
+        notify = None
+        if on_action is not None:
+
+            def notify(content: str) -> None:
+                on_action(self._parse_response(content)[1])
+
+        return _StreamAssembler(
+            time.time(),
+            self.config.stop_on_action_complete,
+            self._thinking_budget(thinking_budget),
+            notify,
+        )
 
-                buffer += content
-
-                # Check if any marker is fully present in buffer
-                marker_found = False
-                for marker in action_markers:
-                    if marker in buffer:
-                        # Marker found, print everything before it
-                        thinking_part = buffer.split(marker, 1)[0]
-                        print(thinking_part, end="", flush=True)
-                        print()  # Print newline after thinking is complete
-                        in_action_phase = True
-                        marker_found = True
-
-                        # Record time to thinking end
-                        if time_to_thinking_end is None:
-                            time_to_thinking_end = time.time() - start_time
-
-                        break
-
-                if marker_found:
-                    continue  # Continue to collect remaining content
-
-                # Check if buffer ends with a prefix of any marker
-                # If so, don't print yet (wait for more content)
-                is_potential_marker = False
-                for marker in action_markers:
-                    for i in range(1, len(marker)):
-                        if buffer.endswith(marker[:i]):
-                            is_potential_marker = True
-                            break
-                    if is_potential_marker:
-                        break
-
-                if not is_potential_marker:
-                    # Safe to print the buffer
-                    print(buffer, end="", flush=True)
-                    buffer = ""
+    def _finish(
+        self,
+        assembler: _StreamAssembler,
+        endpoint: Endpoint | None = None,
+        hedges_fired: int = 0,
+        hedge_won: bool = False,
+    ) -> ModelResponse:
+        """Parse the assembled response and print metrics."""
+        raw_content = assembler.finish()
 
         # Calculate total time
-        total_time = time.time() - start_time
+        total_time = time.time() - assembler.start_time
 
         # Parse thinking and action from response
         thinking, action = self._parse_response(raw_content)
 
         # Print performance metrics
+        time_to_first_token = assembler.time_to_first_token
+        time_to_thinking_end = assembler.time_to_thinking_end
         lang = self.config.lang
         print()
         print("=" * 50)
@@ -171,6 +413,11 @@ class ModelClient:
             time_to_first_token=time_to_first_token,
             time_to_thinking_end=time_to_thinking_end,
             total_time=total_time,
+            stopped_early=assembler.stopped_early,
+            endpoint=endpoint.base_url if endpoint else self.config.base_url,
+            hedges_fired=hedges_fired,
+            hedge_won=hedge_won,
+            thinking_truncated=assembler.budget_exceeded,
         )
 
     def _parse_response(self, content: str) -> tuple[str, str]:
@@ -216,6 +463,469 @@ class ModelClient:
         return "", content
 
 
+class ModelClient(_BaseModelClient):
+    """
+    Client for interacting with OpenAI-compatible vision-language models.
+
+    Clients for the same endpoint share one OpenAI client and HTTP connection
+    pool (see phone_agent.model.pool). With several endpoints configured,
+    each request is routed by a shared EndpointRouter. With hedging enabled,
+    a request whose first token is late is duplicated and the faster stream
+    is kept.
+
+    Args:
+        config: Model configuration.
+        action_handler: Action handler class whose actions guided decoding
+            allows (default: ActionHandler).
+    """
+
+    def __init__(
+        self, config: ModelConfig | None = None, action_handler: type | None = None
+    ):
+        self.config = config or ModelConfig()
+        self.action_handler = action_handler
+        self.client = get_openai_client(self.config.base_url, self.config.api_key)
+        self._init_routing()
+        self.hedge_controller: HedgeController | None = None
+        if self.config.hedge is not None:
+            self.hedge_controller = get_hedge_controller(
+                (
+                    tuple(self.config.endpoints or [self.config.base_url]),
+                    self.config.model_name,
+                ),
+                self.config.hedge,
+            )
+
+    def request(
+        self,
+        messages: list[dict[str, Any]],
+        on_action: Callable[[str], None] | None = None,
+        thinking_budget: int | None = None,
+    ) -> ModelResponse:
+        """
+        Send a request to the model.
+
+        Args:
+            messages: List of message dictionaries in OpenAI format.
+            on_action: Optional callback receiving the action string as soon as
+                it is known to be complete, from the streaming loop while the
+                rest of the response is still being read. Called at most once;
+                with stop_on_action_complete it receives the same string as
+                ModelResponse.action.
+            thinking_budget: Thinking tokens allowed for this step; defaults to
+                config.thinking_budget.max_tokens when that is configured.
+
+        Returns:
+            ModelResponse containing thinking and action.
+
+        Raises:
+            ValueError: If the response cannot be parsed.
+        """
+        # Start timing
+        assembler = self._assembler(on_action, thinking_budget)
+
+        if self.hedge_controller is not None:
+            endpoint, hedges_fired, hedge_won = self._request_hedged(
+                messages, assembler
+            )
+            if assembler.budget_exceeded:
+                self._answer_after_budget(messages, assembler, endpoint)
+            return self._finish(assembler, endpoint, hedges_fired, hedge_won)
+
+        tried: list[Endpoint] = []
+        for attempt in range(self._attempts()):
+            endpoint = self._acquire_endpoint(tried)
+            if endpoint is not None:
+                tried.append(endpoint)
+            attempt_start = time.time()
+            try:
+                self._stream(self._client_for(endpoint), messages, assembler)
+            except _ENDPOINT_ERRORS as e:
+                self._release_endpoint(endpoint, assembler, attempt_start, ok=False)
+                if self._should_retry(endpoint, assembler, attempt, e):
+                    continue
+                raise
+            except BaseException:
+                self._release_endpoint(endpoint, assembler, attempt_start)
+                raise
+            self._release_endpoint(endpoint, assembler, attempt_start)
+            break
+
+        if assembler.budget_exceeded:
+            self._answer_after_budget(messages, assembler, endpoint)
+        return self._finish(assembler, endpoint)
+
+    def _answer_after_budget(
+        self,
+        messages: list[dict[str, Any]],
+        assembler: _StreamAssembler,
+        endpoint: Endpoint | None,
+    ) -> None:
+        """Stream the action after the thinking budget ran out."""
+        client = self._client_for(endpoint)
+        strategy = self._answer_strategy()
+        if strategy == FORCE_ANSWER:
+            follow_up, overrides = self._answer_request(messages, assembler, strategy)
+            try:
+                self._stream(client, follow_up, assembler, **overrides)
+                return
+            except BadRequestError as e:
+                print(f"Server cannot continue the response, retrying: {e}")
+        follow_up, overrides = self._answer_request(messages, assembler, RETRY)
+        self._stream(client, follow_up, assembler, **overrides)
+
+    def _request_hedged(
+        self,
+        messages: list[dict[str, Any]],
+        assembler: _StreamAssembler,
+    ) -> tuple[Endpoint | None, int, bool]:
+        """
+        Stream a completion, firing a hedge if the first token is late.
+
+        Each attempt is read on its own thread; the first to deliver a token
+        wins and the others are closed, which aborts them on the server. The
+        hedge goes to another endpoint when the router has one; without
+        endpoints it is a retry against the same base_url.
+
+        Returns:
+            Tuple of (winning endpoint, hedges fired, whether a hedge won).
+        """
+        controller = self.hedge_controller
+        deadline = assembler.start_time + controller.start_request()
+        kwargs = self._completion_kwargs(messages)
+        events: queue.Queue = queue.Queue()
+        attempts: list[_StreamAttempt] = []
+        unreleased: list[_StreamAttempt] = []
+        winner: _StreamAttempt | None = None
+        hedges_fired = 0
+        hedge_pending = True
+
+        def launch() -> None:
+            endpoint = self._acquire_endpoint(
+                [a.endpoint for a in attempts if a.endpoint is not None]
+            )
+            attempt = _StreamAttempt(
+                endpoint, self._client_for(endpoint), kwargs, events
+            )
+            attempts.append(attempt)
+            unreleased.append(attempt)
+
+        def release(attempt: _StreamAttempt, ok: bool = True) -> None:
+            if attempt in unreleased:
+                unreleased.remove(attempt)
+                if attempt.endpoint is not None:
+                    self.router.release(attempt.endpoint, ttft=attempt.ttft, ok=ok)
+
+        launch()
+        try:
+            while True:
+                timeout = None
+                if winner is None and hedge_pending:
+                    timeout = max(0.0, deadline - time.time())
+                try:
+                    attempt, item = events.get(timeout=timeout)
+                except queue.Empty:
+                    hedge_pending = False
+                    if controller.try_hedge():
+                        hedges_fired += 1
+                        print(
+                            f"\nNo first token after {deadline - assembler.start_time:.2f}s, "
+                            "sending a hedged request"
+                        )
+                        launch()
+                    continue
+
+                if winner is not None and attempt is not winner:
+                    continue  # Late output from a cancelled attempt
+
+                if isinstance(item, Exception):
+                    endpoint_error = isinstance(item, _ENDPOINT_ERRORS)
+                    release(attempt, ok=not endpoint_error)
+                    if winner is attempt or not endpoint_error:
+                        raise item
+                    if unreleased:
+                        continue  # Another attempt may still answer
+                    if len(attempts) < self._attempts():
+                        print(
+                            f"Endpoint {attempt.endpoint.base_url} failed, retrying: {item}"
+                        )
+                        launch()
+                        continue
+                    raise item
+
+                if winner is None:
+                    winner = attempt
+                    attempt.ttft = time.time() - attempt.started_at
+                    for other in attempts:
+                        if other is not attempt:
+                            # Its wait so far is a lower bound on its TTFT
+                            other.ttft = time.time() - other.started_at
+                            other.cancel()
+                            release(other)
+                if item is None or assembler.feed(item):
+                    break
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+            for attempt in list(unreleased):
+                release(attempt)
+
+        hedge_won = winner is not attempts[0]
+        # The TTFT the caller saw, measured from the original request
+        controller.record(assembler.time_to_first_token, hedge_won)
+        return winner.endpoint, hedges_fired, hedge_won
+
+    def warm_up(self, messages: list[dict[str, Any]]) -> bool:
+        """
+        Prefill a prompt prefix on every endpoint so the first step hits a warm cache.
+
+        Sends the messages with max_tokens=1 and the same sampling settings and
+        extra_body as real requests, so the server tokenizes the prefix
+        identically and its prefix cache keeps the KV blocks.
+
+        Args:
+            messages: The stable leading messages, typically the system prompt.
+
+        Returns:
+            True if every endpoint answered.
+        """
+        # A trailing user turn keeps strict chat templates happy; only the
+        # shared leading tokens matter for the cache.
+        kwargs = {
+            **self._completion_kwargs(messages + [{"role": "user", "content": "."}]),
+            "max_tokens": 1,
+            "stream": False,
+        }
+        ok = True
+        for base_url in self.config.endpoints or [self.config.base_url]:
+            client = get_openai_client(base_url, self.config.api_key)
+            start = time.time()
+            try:
+                client.with_options(max_retries=0).chat.completions.create(**kwargs)
+                print(f"Warmed up {base_url} in {time.time() - start:.2f}s")
+            except Exception as e:
+                print(f"Warm-up of {base_url} failed: {e}")
+                ok = False
+        return ok
+
+    def _client_for(self, endpoint: Endpoint | None) -> OpenAI:
+        """The OpenAI client for an endpoint (or base_url without routing)."""
+        if endpoint is None:
+            return self.client
+        # Failover is the router's job, not the SDK's retry loop
+        return get_openai_client(endpoint.base_url, self.config.api_key).with_options(
+            max_retries=0
+        )
+
+    def _stream(
+        self,
+        client: OpenAI,
+        messages: list[dict[str, Any]],
+        assembler: _StreamAssembler,
+        **overrides: Any,
+    ) -> None:
+        """Stream one completion into the assembler."""
+        stream = client.chat.completions.create(
+            **self._completion_kwargs(messages, **overrides)
+        )
+        for chunk in stream:
+            if len(chunk.choices) == 0:
+                continue
+            content = chunk.choices[0].delta.content
+            if content is not None and assembler.feed(content):
+                # Abort generation on the server
+                stream.close()
+                break
+
+
+class _StreamAttempt:
+    """
+    One streamed completion of a hedged request, read on a daemon thread.
+
+    Content deltas are put on the shared queue as (attempt, text), followed
+    by (attempt, None) at the end of the stream or (attempt, exception).
+    """
+
+    def __init__(
+        self,
+        endpoint: Endpoint | None,
+        client: OpenAI,
+        kwargs: dict[str, Any],
+        events: queue.Queue,
+    ):
+        self.endpoint = endpoint
+        self.started_at = time.time()
+        self.ttft: float | None = None
+        self._stream = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+        threading.Thread(
+            target=self._run, args=(client, kwargs, events), daemon=True
+        ).start()
+
+    def _run(self, client: OpenAI, kwargs: dict[str, Any], events: queue.Queue) -> None:
+        try:
+            stream = client.chat.completions.create(**kwargs)
+            with self._lock:
+                self._stream = stream
+                cancelled = self._cancelled
+            if cancelled:
+                stream.close()
+                return
+            for chunk in stream:
+                if self._cancelled:
+                    return
+                if len(chunk.choices) == 0:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content is not None:
+                    events.put((self, content))
+            events.put((self, None))
+        except Exception as e:
+            if not self._cancelled:
+                events.put((self, e))
+
+    def cancel(self) -> None:
+        """Stop reading and close the stream, aborting generation on the server."""
+        with self._lock:
+            self._cancelled = True
+            stream = self._stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+
+class AsyncModelClient(_BaseModelClient):
+    """
+    Asynchronous client for OpenAI-compatible vision-language models.
+
+    Same contract as ModelClient, but requests are awaited, so many device
+    sessions can stream on one event loop. Clients on the same loop share
+    one HTTP connection pool.
+
+    Args:
+        config: Model configuration.
+        action_handler: Action handler class whose actions guided decoding
+            allows (default: ActionHandler).
+
+    Example:
+        >>> client = AsyncModelClient(ModelConfig(base_url="http://localhost:8000/v1"))
+        >>> responses = await asyncio.gather(
+        ...     *(client.request(messages) for messages in sessions)
+        ... )
+    """
+
+    def __init__(
+        self, config: ModelConfig | None = None, action_handler: type | None = None
+    ):
+        self.config = config or ModelConfig()
+        self.action_handler = action_handler
+        self._init_routing()
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The shared AsyncOpenAI client for the running event loop."""
+        return get_async_openai_client(self.config.base_url, self.config.api_key)
+
+    async def request(
+        self,
+        messages: list[dict[str, Any]],
+        on_action: Callable[[str], None] | None = None,
+        thinking_budget: int | None = None,
+    ) -> ModelResponse:
+        """
+        Send a request to the model.
+
+        Args:
+            messages: List of message dictionaries in OpenAI format.
+            on_action: Optional callback receiving the action string as soon as
+                it is known to be complete, from the streaming loop. Called at
+                most once, on the event loop, so it must not block.
+            thinking_budget: Thinking tokens allowed for this step; defaults to
+                config.thinking_budget.max_tokens when that is configured.
+
+        Returns:
+            ModelResponse containing thinking and action.
+
+        Raises:
+            ValueError: If the response cannot be parsed.
+        """
+        assembler = self._assembler(on_action, thinking_budget)
+
+        tried: list[Endpoint] = []
+        for attempt in range(self._attempts()):
+            endpoint = self._acquire_endpoint(tried)
+            if endpoint is not None:
+                tried.append(endpoint)
+            attempt_start = time.time()
+            try:
+                await self._stream(self._client_for(endpoint), messages, assembler)
+            except _ENDPOINT_ERRORS as e:
+                self._release_endpoint(endpoint, assembler, attempt_start, ok=False)
+                if self._should_retry(endpoint, assembler, attempt, e):
+                    continue
+                raise
+            except BaseException:
+                self._release_endpoint(endpoint, assembler, attempt_start)
+                raise
+            self._release_endpoint(endpoint, assembler, attempt_start)
+            break
+
+        if assembler.budget_exceeded:
+            await self._answer_after_budget(messages, assembler, endpoint)
+        return self._finish(assembler, endpoint)
+
+    async def _answer_after_budget(
+        self,
+        messages: list[dict[str, Any]],
+        assembler: _StreamAssembler,
+        endpoint: Endpoint | None,
+    ) -> None:
+        """Stream the action after the thinking budget ran out."""
+        client = self._client_for(endpoint)
+        strategy = self._answer_strategy()
+        if strategy == FORCE_ANSWER:
+            follow_up, overrides = self._answer_request(messages, assembler, strategy)
+            try:
+                await self._stream(client, follow_up, assembler, **overrides)
+                return
+            except BadRequestError as e:
+                print(f"Server cannot continue the response, retrying: {e}")
+        follow_up, overrides = self._answer_request(messages, assembler, RETRY)
+        await self._stream(client, follow_up, assembler, **overrides)
+
+    def _client_for(self, endpoint: Endpoint | None) -> AsyncOpenAI:
+        """The AsyncOpenAI client for an endpoint (or base_url without routing)."""
+        if endpoint is None:
+            return self.client
+        # Failover is the router's job, not the SDK's retry loop
+        return get_async_openai_client(
+            endpoint.base_url, self.config.api_key
+        ).with_options(max_retries=0)
+
+    async def _stream(
+        self,
+        client: AsyncOpenAI,
+        messages: list[dict[str, Any]],
+        assembler: _StreamAssembler,
+        **overrides: Any,
+    ) -> None:
+        """Stream one completion into the assembler."""
+        stream = await client.chat.completions.create(
+            **self._completion_kwargs(messages, **overrides)
+        )
+        async for chunk in stream:
+            if len(chunk.choices) == 0:
+                continue
+            content = chunk.choices[0].delta.content
+            if content is not None and assembler.feed(content):
+                # Abort generation on the server
+                await stream.close()
+                break
+
+
 class MessageBuilder:
     """Helper class for building conversation messages."""
 
@@ -226,7 +936,7 @@ class MessageBuilder:
 
     @staticmethod
     def create_user_message(
-        text: str, image_base64: str | None = None
+        text: str, image_base64: str | None = None, image_mime_type: str = "image/png"
     ) -> dict[str, Any]:
         """
         Create a user message with optional image.
@@ -234,6 +944,7 @@ class MessageBuilder:
         Args:
             text: Text content.
             image_base64: Optional base64-encoded image.
+            image_mime_type: MIME type of the encoded image.
 
         Returns:
             Message dictionary.
@@ -244,7 +955,9 @@ class MessageBuilder:
             content.append(
                 {
                     "type": "image_url",
-                    "image_url": {"url": f"data:image/png;base64,{image_base64}"},
+                    "image_url": {
+                        "url": f"data:{image_mime_type};base64,{image_base64}"
+                    },
                 }
             )
 
@@ -287,4 +1000,5 @@ class MessageBuilder:
             JSON string with screen info.
         """
         info = {"current_app": current_app, **extra_info}
-        return json.dumps(info, ensure_ascii=False)
+        # Sorted keys keep the serialization byte-identical across steps
+        return json.dumps(info, ensure_ascii=False, sort_keys=True)
@@ -0,0 +1,134 @@
+"""Bounding the conversation history sent to the model on every step."""
+
+import re
+from dataclasses import dataclass
+from typing import Any
+
+# The last <answer> block of an assistant message
+_ANSWER_PATTERN = re.compile(r".*<answer>(.*)</answer>\s*$", re.DOTALL)
+
+
+@dataclass
+class ContextConfig:
+    """Configuration for conversation history compaction."""
+
+    keep_recent_turns: int = 4  # Most recent assistant turns kept verbatim
+    drop_thinking: bool = True  # Older assistant turns keep only their action
+    max_tokens: int | None = 16000  # Estimated token budget for the history text
+    low_watermark: float = 0.75  # Trim to this share of the budget once exceeded
+    chars_per_token: float = 3.0  # Rough text-to-token ratio for the estimate
+    pinned_messages: int = 2  # Leading messages never changed (system prompt, task)
+
+
+class ContextManager:
+    """
+    Keeps the agent's message list bounded, editing it in place.
+
+    The pinned prefix (system prompt and the first user message with the task)
+    is never touched, so the server's prefix cache stays valid for it. After
+    that, assistant turns older than the verbatim window are reduced to their
+    <answer> part as they leave the window, so each turn is rewritten once and
+    everything before the window stays byte-identical between steps. When the
+    estimated size exceeds the budget, the oldest turns are dropped down to a
+    low watermark rather than one per step, which keeps prefix invalidations
+    rare.
+
+    Only message text is counted; screenshots are already stripped from all
+    but the current user message.
+
+    Args:
+        config: Compaction configuration.
+
+    Example:
+        >>> manager = ContextManager(ContextConfig(keep_recent_turns=3))
+        >>> manager.apply(context)  # before each model request
+    """
+
+    def __init__(self, config: ContextConfig | None = None):
+        self.config = config or ContextConfig()
+
+    def apply(self, messages: list[dict[str, Any]]) -> None:
+        """
+        Compact and trim the message list in place.
+
+        Args:
+            messages: Conversation in OpenAI format, ending with the current
+                user message.
+        """
+        pinned = self.config.pinned_messages
+        # Assistant turns and the user message that follows each of them
+        window = 2 * self.config.keep_recent_turns
+
+        if self.config.drop_thinking:
+            for i in range(pinned, len(messages) - window):
+                messages[i] = compact_message(messages[i])
+
+        if self.config.max_tokens is None:
+            return
+        if (
+            estimate_tokens(messages, self.config.chars_per_token)
+            <= self.config.max_tokens
+        ):
+            return
+
+        # Drop (assistant, user) pairs after the pinned prefix, oldest first
+        target = self.config.max_tokens * self.config.low_watermark
+        sizes = [
+            estimate_tokens([message], self.config.chars_per_token)
+            for message in messages
+        ]
+        total = sum(sizes)
+        keep = max(window, 2)  # Never drop the current user message
+        end = pinned
+        while total > target and len(messages) - (end + 2) >= keep:
+            total -= sizes[end] + sizes[end + 1]
+            end += 2
+        del messages[pinned:end]
+
+
+def compact_message(message: dict[str, Any]) -> dict[str, Any]:
+    """
+    Reduce an assistant message to its <answer> part.
+
+    Other messages, and assistant messages without an answer tag, are
+    returned unchanged.
+
+    Args:
+        message: Message dictionary.
+
+    Returns:
+        The compacted message.
+    """
+    content = message.get("content")
+    if message.get("role") != "assistant" or not isinstance(content, str):
+        return message
+    if content.startswith("<answer>"):
+        return message
+
+    match = _ANSWER_PATTERN.match(content)
+    if match is None:
+        return message
+    return {**message, "content": f"<answer>{match.group(1)}</answer>"}
+
+
+def estimate_tokens(
+    messages: list[dict[str, Any]], chars_per_token: float = 3.0
+) -> int:
+    """
+    Estimate the token count of the messages' text.
+
+    Args:
+        messages: Messages in OpenAI format.
+        chars_per_token: Characters per token.
+
+    Returns:
+        Estimated token count.
+    """
+    chars = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            chars += len(content)
+        elif isinstance(content, list):
+            chars += sum(len(item.get("text", "")) for item in content)
+    return int(chars / chars_per_token)
@@ -0,0 +1,105 @@
+"""Hedging policy for model requests: when to fire a duplicate and how often."""
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+
+@dataclass
+class HedgeConfig:
+    """Configuration for hedged model requests."""
+
+    percentile: float = 95.0  # TTFT percentile used as the hedge deadline
+    initial_delay: float = 2.0  # Deadline (seconds) until enough TTFTs are recorded
+    min_delay: float = 0.1  # Lower bound for the deadline (seconds)
+    min_samples: int = 20  # TTFT samples needed before the percentile is used
+    window: int = 200  # Most recent TTFT samples kept
+    budget: float = 0.05  # Hedges allowed per request, e.g. 0.05 = 5% extra load
+
+
+class HedgeController:
+    """
+    Tracks TTFTs and the hedge budget for a group of clients.
+
+    The deadline is the configured TTFT percentile over a sliding window, so
+    hedges only fire for requests already slower than almost all recent
+    ones. The budget is a token bucket: every request adds `budget` credit
+    (capped at one hedge) and every hedge spends one, so hedges never exceed
+    the configured share of requests even when a replica stalls for a while.
+
+    Args:
+        config: Hedge configuration.
+    """
+
+    def __init__(self, config: HedgeConfig):
+        self.config = config
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self._ttfts: deque[float] = deque(maxlen=config.window)
+        self._credit = 0.0
+        self._lock = threading.Lock()
+
+    def start_request(self) -> float:
+        """
+        Count a request and get its hedge deadline.
+
+        Returns:
+            Seconds to wait for a first token before hedging.
+        """
+        with self._lock:
+            self.requests += 1
+            self._credit = min(1.0, self._credit + self.config.budget)
+            if len(self._ttfts) < self.config.min_samples:
+                return self.config.initial_delay
+            ordered = sorted(self._ttfts)
+            index = round(self.config.percentile / 100 * (len(ordered) - 1))
+            return max(self.config.min_delay, ordered[index])
+
+    def try_hedge(self) -> bool:
+        """Spend budget on a hedge; False if the budget is exhausted."""
+        with self._lock:
+            if self._credit < 1.0:
+                return False
+            self._credit -= 1.0
+            self.hedges_fired += 1
+            return True
+
+    def record(self, ttft: float | None, hedge_won: bool = False) -> None:
+        """
+        Record the outcome of a request.
+
+        Args:
+            ttft: Time to first token of the request, if one arrived.
+            hedge_won: Whether the hedge produced the first token.
+        """
+        with self._lock:
+            if ttft is not None:
+                self._ttfts.append(ttft)
+            if hedge_won:
+                self.hedges_won += 1
+
+
+_controllers: dict[tuple, HedgeController] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_hedge_controller(key: tuple, config: HedgeConfig) -> HedgeController:
+    """
+    Get the process-wide hedge controller for a key.
+
+    Clients talking to the same endpoints share TTFT history and budget.
+
+    Args:
+        key: Identifies the endpoints and model.
+        config: Configuration used if the controller is created.
+
+    Returns:
+        Shared HedgeController.
+    """
+    with _controllers_lock:
+        controller = _controllers.get(key)
+        if controller is None:
+            controller = HedgeController(config)
+            _controllers[key] = controller
+        return controller
@@ -0,0 +1,133 @@
+"""Process-wide OpenAI client registry backed by shared HTTP connection pools."""
+
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+
+@dataclass
+class HTTPPoolConfig:
+    """Configuration for the shared HTTP connection pool."""
+
+    max_connections: int = 100  # Concurrent connections across all endpoints
+    max_keepalive_connections: int = 20  # Idle connections kept open for reuse
+    keepalive_expiry: float = 30.0  # Seconds an idle connection is kept
+    http2: bool = False  # Multiplex streams over one connection (requires h2)
+    connect_timeout: float = 10.0  # Seconds to establish a connection
+    timeout: float = 600.0  # Seconds for reads and writes
+
+
+_config = HTTPPoolConfig()
+_lock = threading.Lock()
+
+# One sync pool per process; async pools are bound to their event loop
+_sync_http_client: httpx.Client | None = None
+_sync_clients: dict[tuple[str, str], OpenAI] = {}
+_async_pools: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def configure_http_pool(config: HTTPPoolConfig) -> None:
+    """
+    Set the pool configuration used for clients created from now on.
+
+    Clients already handed out keep their pool; call this before creating
+    model clients.
+
+    Args:
+        config: Pool configuration.
+    """
+    global _config, _sync_http_client
+    with _lock:
+        _config = config
+        _sync_http_client = None
+        _sync_clients.clear()
+        _async_pools.clear()
+
+
+def get_http_pool_config() -> HTTPPoolConfig:
+    """Get the current pool configuration."""
+    return _config
+
+
+def get_openai_client(base_url: str, api_key: str) -> OpenAI:
+    """
+    Get the shared synchronous client for an endpoint.
+
+    Args:
+        base_url: API base URL.
+        api_key: API key.
+
+    Returns:
+        OpenAI client using the process-wide connection pool.
+    """
+    global _sync_http_client
+    key = (base_url, api_key)
+    with _lock:
+        client = _sync_clients.get(key)
+        if client is None:
+            if _sync_http_client is None:
+                _sync_http_client = DefaultHttpxClient(**_httpx_options(_config))
+            client = OpenAI(
+                base_url=base_url, api_key=api_key, http_client=_sync_http_client
+            )
+            _sync_clients[key] = client
+        return client
+
+
+def get_async_openai_client(base_url: str, api_key: str) -> AsyncOpenAI:
+    """
+    Get the shared asynchronous client for an endpoint on the running loop.
+
+    Connections cannot move between event loops, so each loop gets its own
+    pool; all clients on the same loop share it.
+
+    Args:
+        base_url: API base URL.
+        api_key: API key.
+
+    Returns:
+        AsyncOpenAI client using the event loop's connection pool.
+
+    Raises:
+        RuntimeError: If called outside a running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    key = (base_url, api_key)
+    with _lock:
+        pool = _async_pools.get(loop)
+        if pool is None:
+            pool = (DefaultAsyncHttpxClient(**_httpx_options(_config)), {})
+            _async_pools[loop] = pool
+        http_client, clients = pool
+        client = clients.get(key)
+        if client is None:
+            client = AsyncOpenAI(
+                base_url=base_url, api_key=api_key, http_client=http_client
+            )
+            clients[key] = client
+        return client
+
+
+def _httpx_options(config: HTTPPoolConfig) -> dict:
+    """Translate the pool configuration into httpx client options."""
+    http2 = config.http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("HTTP/2 requested but h2 is not installed, using HTTP/1.1")
+            http2 = False
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+        "timeout": httpx.Timeout(config.timeout, connect=config.connect_timeout),
+        "http2": http2,
+    }
@@ -0,0 +1,216 @@
+"""Routing model requests across several OpenAI-compatible endpoints."""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+# Routing policies
+LEAST_OUTSTANDING = "least_outstanding"
+TTFT = "ttft"
+
+# Sessions remembered for sticky routing before the oldest are dropped
+_MAX_STICKY_SESSIONS = 4096
+
+
+@dataclass
+class Endpoint:
+    """Load and health state of one model endpoint."""
+
+    base_url: str
+    in_flight: int = 0  # Requests currently streaming from this endpoint
+    ttft_ewma: float | None = None  # Smoothed time to first token (seconds)
+    healthy: bool = True
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0  # Monotonic time the next probe is allowed
+    backoff: float = 0.0  # Current ejection period (seconds)
+    probing: bool = False  # A probe request is in flight
+
+
+class EndpointRouter:
+    """
+    Picks an endpoint per request from a set of replicas.
+
+    With the least_outstanding policy the endpoint with the fewest in-flight
+    requests wins, ties broken by the lower TTFT average. With the ttft policy
+    endpoints are scored by TTFT average times (in-flight + 1), so a replica
+    busy prefilling long contexts is avoided without herding every request
+    onto the single fastest one. Endpoints without samples score zero and
+    are tried first.
+
+    An endpoint failing `failure_threshold` times in a row is ejected; after
+    its backoff one request without a session key is let through as a probe,
+    which either restores it or doubles the backoff. With a session key the
+    same endpoint is reused while it is healthy, so the server's prefix cache
+    keeps hitting, and the session is never moved onto a probe.
+
+    Args:
+        base_urls: Endpoint base URLs.
+        policy: 'least_outstanding' or 'ttft'.
+        ewma_alpha: Weight of the newest TTFT sample.
+        failure_threshold: Consecutive failures before ejection.
+        eject_seconds: First ejection period.
+        max_eject_seconds: Upper bound for the ejection period.
+    """
+
+    def __init__(
+        self,
+        base_urls: list[str],
+        policy: str = LEAST_OUTSTANDING,
+        ewma_alpha: float = 0.3,
+        failure_threshold: int = 2,
+        eject_seconds: float = 5.0,
+        max_eject_seconds: float = 60.0,
+    ):
+        if not base_urls:
+            raise ValueError("At least one endpoint is required")
+        if policy not in (LEAST_OUTSTANDING, TTFT):
+            raise ValueError(f"Unknown routing policy: {policy}")
+
+        self.endpoints = [Endpoint(base_url) for base_url in base_urls]
+        self.policy = policy
+        self.ewma_alpha = ewma_alpha
+        self.failure_threshold = failure_threshold
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self._sessions: dict[str, Endpoint] = {}
+        self._lock = threading.Lock()
+
+    def acquire(
+        self,
+        session_key: str | None = None,
+        exclude: list[Endpoint] | None = None,
+    ) -> Endpoint:
+        """
+        Choose an endpoint and count the request against it.
+
+        Every acquire must be paired with a release.
+
+        Args:
+            session_key: Optional key to keep a session on one endpoint.
+            exclude: Endpoints to avoid if any other is usable (e.g. for a
+                hedge or retry of a request already sent there).
+
+        Returns:
+            The chosen endpoint.
+        """
+        with self._lock:
+            now = time.monotonic()
+            endpoint = self._choose(now, session_key, exclude or [])
+            endpoint.in_flight += 1
+            if not endpoint.healthy and now >= endpoint.ejected_until:
+                endpoint.probing = True
+            if session_key is not None and not exclude:
+                self._sessions.pop(session_key, None)
+                self._sessions[session_key] = endpoint
+                if len(self._sessions) > _MAX_STICKY_SESSIONS:
+                    del self._sessions[next(iter(self._sessions))]
+            return endpoint
+
+    def release(
+        self, endpoint: Endpoint, ttft: float | None = None, ok: bool = True
+    ) -> None:
+        """
+        Record the outcome of a request.
+
+        Args:
+            endpoint: Endpoint returned by acquire.
+            ttft: Time to first token of the request, if one arrived.
+            ok: False if the endpoint failed (connection error, 5xx, overload).
+        """
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.probing = False
+
+            if ok:
+                endpoint.consecutive_failures = 0
+                if ttft is not None:
+                    if endpoint.ttft_ewma is None:
+                        endpoint.ttft_ewma = ttft
+                    else:
+                        endpoint.ttft_ewma += self.ewma_alpha * (
+                            ttft - endpoint.ttft_ewma
+                        )
+                if not endpoint.healthy:
+                    endpoint.healthy = True
+                    endpoint.backoff = 0.0
+                    print(f"Endpoint {endpoint.base_url} recovered")
+                return
+
+            endpoint.consecutive_failures += 1
+            if (
+                not endpoint.healthy
+                or endpoint.consecutive_failures >= self.failure_threshold
+            ):
+                endpoint.healthy = False
+                endpoint.backoff = min(
+                    self.max_eject_seconds,
+                    endpoint.backoff * 2 if endpoint.backoff else self.eject_seconds,
+                )
+                endpoint.ejected_until = time.monotonic() + endpoint.backoff
+                print(
+                    f"Endpoint {endpoint.base_url} ejected for {endpoint.backoff:.0f}s"
+                )
+
+    def _choose(
+        self, now: float, session_key: str | None, exclude: list[Endpoint]
+    ) -> Endpoint:
+        """Pick an endpoint; caller holds the lock."""
+        candidates = [e for e in self.endpoints if e not in exclude] or self.endpoints
+
+        if session_key is not None:
+            bound = self._sessions.get(session_key)
+            if bound is not None and bound.healthy and bound in candidates:
+                return bound
+        else:
+            # A recovered endpoint only comes back through a single probe, and
+            # only non-sticky traffic is sent to it so no session moves there
+            for endpoint in candidates:
+                if (
+                    not endpoint.healthy
+                    and not endpoint.probing
+                    and now >= endpoint.ejected_until
+                ):
+                    return endpoint
+
+        healthy = [endpoint for endpoint in candidates if endpoint.healthy]
+        if not healthy:
+            # Everything is ejected: fail open to the one closest to a probe
+            return min(candidates, key=lambda e: e.ejected_until)
+
+        best = min(self._score(endpoint) for endpoint in healthy)
+        return random.choice([e for e in healthy if self._score(e) == best])
+
+    def _score(self, endpoint: Endpoint) -> tuple[float, float]:
+        """Routing score under the current policy; lower is better."""
+        ttft = endpoint.ttft_ewma or 0.0
+        if self.policy == TTFT:
+            return (ttft * (endpoint.in_flight + 1), endpoint.in_flight)
+        return (endpoint.in_flight, ttft)
+
+
+_routers: dict[tuple[tuple[str, ...], str], EndpointRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_router(base_urls: list[str], policy: str = LEAST_OUTSTANDING) -> EndpointRouter:
+    """
+    Get the process-wide router for a set of endpoints.
+
+    Clients configured with the same endpoints share one router, so load and
+    health are tracked across all of them.
+
+    Args:
+        base_urls: Endpoint base URLs.
+        policy: Routing policy.
+
+    Returns:
+        Shared EndpointRouter.
+    """
+    key = (tuple(base_urls), policy)
+    with _routers_lock:
+        router = _routers.get(key)
+        if router is None:
+            router = EndpointRouter(list(base_urls), policy)
+            _routers[key] = router
+        return router
@@ -0,0 +1,226 @@
+"""Incremental analysis of streamed model responses."""
+
+import re
+
+# Markers that start the action expression in a response
+ACTION_MARKERS = ("finish(message=", "do(action=")
+
+
+class MarkerMatcher:
+    """
+    Single-pass matcher that finds the first of several markers in a stream.
+
+    A deterministic automaton (Aho-Corasick) is built over the markers, so
+    each character costs one dict lookup regardless of how many markers
+    there are, and runs of text that cannot start a marker are skipped with
+    a regex search. Text that is certainly not part of a marker is released
+    as soon as it arrives; only a possible marker prefix is held back.
+
+    Example:
+        >>> matcher = MarkerMatcher(ACTION_MARKERS)
+        >>> matcher.feed("Let me tap. do(act")
+        ('Let me tap. ', None)
+        >>> matcher.feed('ion="Tap"')
+        ('', 'do(action=')
+        >>> matcher.remainder
+        '"Tap"'
+    """
+
+    def __init__(self, markers: tuple[str, ...] = ACTION_MARKERS):
+        self.markers = markers
+        self.matched: str | None = None
+        self.remainder = ""  # Text after the marker in the chunk that completed it
+        self._state = 0
+        self._pending = ""  # Held-back text that may be the start of a marker
+        self._build(markers)
+
+    def feed(self, text: str) -> tuple[str, str | None]:
+        """
+        Consume a chunk of streamed text.
+
+        Args:
+            text: The next chunk.
+
+        Returns:
+            Tuple of (text that is safe to emit, matched marker or None).
+            Once a marker has matched, the text after it is in `remainder`
+            and further calls return ("", None).
+        """
+        if self.matched is not None:
+            return "", None
+
+        delta = self._delta
+        state = self._state
+        i, n = 0, len(text)
+        while i < n:
+            if state == 0:
+                # Nothing pending: jump to the next character that can start a marker
+                match = self._start_chars.search(text, i)
+                if match is None:
+                    break
+                i = match.start()
+            state = delta[state].get(text[i], 0)
+            i += 1
+            marker = self._output[state]
+            if marker is not None:
+                pending = self._pending + text[:i]
+                self.matched = marker
+                self.remainder = text[i:]
+                self._state = 0
+                self._pending = ""
+                return pending[: len(pending) - len(marker)], marker
+
+        self._state = state
+        pending = self._pending + text
+        keep = self._depth[state]
+        self._pending = pending[len(pending) - keep :] if keep else ""
+        return pending[: len(pending) - keep], None
+
+    def flush(self) -> str:
+        """Release held-back text at the end of the stream."""
+        pending, self._pending, self._state = self._pending, "", 0
+        return pending
+
+    def _build(self, markers: tuple[str, ...]) -> None:
+        """Build the goto/failure automaton and fold it into a transition table."""
+        goto: list[dict[str, int]] = [{}]
+        output: list[str | None] = [None]
+        depth = [0]
+        for marker in markers:
+            state = 0
+            for char in marker:
+                if char not in goto[state]:
+                    goto.append({})
+                    output.append(None)
+                    depth.append(depth[state] + 1)
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            if output[state] is None:
+                output[state] = marker
+
+        # Breadth-first failure links, then complete transitions per state
+        fail = [0] * len(goto)
+        delta: list[dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = list(goto[0].values())
+        while queue:
+            state = queue.pop(0)
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            if output[state] is None:
+                output[state] = output[fail[state]]
+            for char, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(char, 0) if state else 0
+                queue.append(child)
+
+        self._delta = delta
+        self._output = output
+        self._depth = depth
+        self._start_chars = re.compile(
+            "[" + "".join(re.escape(c) for c in goto[0]) + "]"
+        )
+
+
+class ActionCompletionTracker:
+    """
+    Detects when a streamed action expression is complete.
+
+    Fed with the text that follows the action marker (whose opening
+    parenthesis is already consumed), it tracks bracket depth and string
+    literals until the call's closing parenthesis. Free-text arguments (Type
+    text, finish message) may contain unescaped quotes, so a balanced close
+    is only accepted once the text that follows it confirms the call ended:
+    a newline, a tag such as </answer>, or another action. Anything else
+    means the close was inside the text, and the tracker gives up for this
+    response rather than risk truncating it.
+
+    Example:
+        >>> tracker = ActionCompletionTracker()
+        >>> tracker.feed('"Tap", element=[500, 300])')
+        >>> tracker.feed("</answer>")
+        26
+    """
+
+    _SPECIAL = re.compile(r"[\"'()\[\]{}]")
+    _IN_STRING = {
+        '"': re.compile(r'["\\]'),
+        "'": re.compile(r"['\\]"),
+    }
+
+    def __init__(self, markers: tuple[str, ...] = ACTION_MARKERS):
+        self.markers = markers
+        self.action_end: int | None = None  # Length of the expression body
+        self.abandoned = False
+        self._consumed = 0
+        self._depth = 1
+        self._quote: str | None = None
+        self._escape = False
+        self._after = ""
+
+    def feed(self, text: str) -> int | None:
+        """
+        Consume the next chunk of the action expression.
+
+        Args:
+            text: Text following the marker (or following the previous chunk).
+
+        Returns:
+            Length of the expression body up to and including its closing
+            parenthesis once it is known to be complete, otherwise None.
+        """
+        if self.abandoned:
+            return None
+        if self.action_end is None:
+            end = self._scan(text)
+            if end is None:
+                self._consumed += len(text)
+                return None
+            self.action_end = self._consumed + end
+            text = text[end:]
+
+        self._after += text
+        tail = self._after.lstrip(" \t")
+        if not tail:
+            return None
+        if tail[0] in "\r\n<" or tail.startswith(self.markers):
+            return self.action_end
+
+        self.abandoned = True
+        return None
+
+    def _scan(self, text: str) -> int | None:
+        """Advance the bracket/string state; return the index after the close."""
+        i, n = 0, len(text)
+        if self._escape and n:
+            # Escaped character split from its backslash across chunks
+            self._escape = False
+            i = 1
+        while i < n:
+            if self._quote:
+                match = self._IN_STRING[self._quote].search(text, i)
+                if match is None:
+                    return None
+                i = match.start()
+                if text[i] == "\\":
+                    if i + 1 >= n:
+                        self._escape = True
+                        return None
+                    i += 2
+                    continue
+                self._quote = None
+                i += 1
+                continue
+
+            match = self._SPECIAL.search(text, i)
+            if match is None:
+                return None
+            i = match.start()
+            char = text[i]
+            i += 1
+            if char in "\"'":
+                self._quote = char
+            elif char in "([{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    return i
+        return None
@@ -0,0 +1,49 @@
+"""Per-step thinking budget: how much the model may think before it must answer."""
+
+from dataclasses import dataclass, field
+
+# Strategies once the budget is spent
+FORCE_ANSWER = "continue"  # Continue the truncated response with the answer opened
+RETRY = "retry"  # Ask again with a short-thinking hint
+
+
+@dataclass
+class ThinkingBudgetConfig:
+    """Configuration for the thinking budget."""
+
+    max_tokens: int = 800  # Thinking tokens allowed per step
+    # Smaller budgets after simple actions, by previous action name
+    after_action: dict[str, int] = field(
+        default_factory=lambda: {"Back": 300, "Home": 300, "Wait": 300}
+    )
+    strategy: str = FORCE_ANSWER  # 'continue' or 'retry'
+    answer_max_tokens: int = 200  # Token limit for the answer once forced
+
+    def budget_after(self, action_name: str | None) -> int:
+        """
+        Get the thinking budget for a step.
+
+        Args:
+            action_name: Name of the previous step's action, if any.
+
+        Returns:
+            Thinking tokens allowed, never more than max_tokens.
+        """
+        return min(self.after_action.get(action_name, self.max_tokens), self.max_tokens)
+
+
+def answer_prefix(thinking: str) -> str:
+    """
+    Text that closes truncated thinking and opens the answer.
+
+    Args:
+        thinking: The thinking streamed so far.
+
+    Returns:
+        Text to append so the model continues with the action.
+    """
+    if "<think>" not in thinking:
+        return "\n"
+    if "</think>" in thinking:
+        return "\n<answer>"
+    return "</think>\n<answer>"
@@ -1,8 +1,36 @@
 """Utility module for Phone Agent."""
 
+from phone_agent.utils.image import (
+    ImageConfig,
+    PreparedImage,
+    black_image_base64,
+    compute_target_size,
+    encode_image,
+    get_base64_image_size,
+    get_image_size,
+    prepare_image,
+)
 from phone_agent.utils.logger import AgentLogger, LogConfig
+from phone_agent.utils.shell import (
+    DeviceShell,
+    DeviceShells,
+    ShellNotStartedError,
+    ShellSessionError,
+)
 
 __all__ = [
     "AgentLogger",
     "LogConfig",
+    "ImageConfig",
+    "PreparedImage",
+    "compute_target_size",
+    "prepare_image",
+    "encode_image",
+    "get_image_size",
+    "get_base64_image_size",
+    "black_image_base64",
+    "DeviceShell",
+    "DeviceShells",
+    "ShellNotStartedError",
+    "ShellSessionError",
 ]
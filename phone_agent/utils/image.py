@@ -0,0 +1,291 @@
+"""Image preparation for screenshots sent to the model."""
+
+import base64
+import math
+import struct
+from dataclasses import dataclass
+from functools import lru_cache
+from io import BytesIO
+from typing import Any
+
+from PIL import Image
+
+_MIME_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+}
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SIGNATURE = b"\xff\xd8"
+
+# JPEG start-of-frame markers (SOF0-SOF15 minus DHT, JPG and DAC), which hold the size
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# Base64 prefix lengths tried when probing encoded images. JPEG frame headers
+# are usually within the first few hundred bytes; the last size covers a
+# maximal (64 KiB) APP segment before it.
+_BASE64_PROBE_SIZES = (64, 4096, 87384)
+
+
+@dataclass
+class ImageConfig:
+    """Configuration for preparing screenshots before sending them to the model."""
+
+    max_long_edge: int | None = None  # Cap on the longer side, in pixels
+    max_pixels: int | None = None  # Cap on width * height
+    patch_multiple: int | None = None  # Snap both sides to this multiple (e.g. 28)
+    output_format: str | None = None  # "png", "jpeg", "webp"; None keeps the source
+    png_compress_level: int = 1
+    jpeg_quality: int = 90
+    webp_quality: int = 90
+
+
+@dataclass
+class PreparedImage:
+    """
+    A screenshot prepared for the model, with the transform that produced it.
+
+    The prepared image always covers the full source frame (pure scaling, no
+    crop or padding), so the model's 0-1000 relative coordinates map to the
+    source screenshot unchanged. Absolute coordinates in the prepared image
+    can be mapped back with to_source().
+    """
+
+    base64_data: str
+    mime_type: str
+    width: int
+    height: int
+    source_width: int
+    source_height: int
+
+    @property
+    def scale_x(self) -> float:
+        """Horizontal scale from source to prepared image."""
+        return self.width / self.source_width
+
+    @property
+    def scale_y(self) -> float:
+        """Vertical scale from source to prepared image."""
+        return self.height / self.source_height
+
+    def to_source(self, x: float, y: float) -> tuple[int, int]:
+        """Map pixel coordinates in the prepared image to the source screenshot."""
+        return int(x / self.scale_x), int(y / self.scale_y)
+
+
+def compute_target_size(
+    width: int, height: int, config: ImageConfig
+) -> tuple[int, int]:
+    """
+    Compute the prepared image size for a source size.
+
+    Args:
+        width: Source width in pixels.
+        height: Source height in pixels.
+        config: Image preparation configuration.
+
+    Returns:
+        Tuple of (width, height). Never larger than the source.
+    """
+    scale = 1.0
+    if config.max_long_edge:
+        scale = min(scale, config.max_long_edge / max(width, height))
+    if config.max_pixels:
+        scale = min(scale, math.sqrt(config.max_pixels / (width * height)))
+
+    target_width = max(1, round(width * scale))
+    target_height = max(1, round(height * scale))
+
+    multiple = config.patch_multiple
+    if multiple:
+        # Round down so the limits above still hold after snapping
+        target_width = max(multiple, target_width // multiple * multiple)
+        target_height = max(multiple, target_height // multiple * multiple)
+
+    return target_width, target_height
+
+
+def prepare_image(screenshot: Any, config: ImageConfig | None) -> PreparedImage:
+    """
+    Resize and re-encode a screenshot for the model.
+
+    Args:
+        screenshot: Screenshot object from any device backend.
+        config: Image preparation configuration. None passes the image through.
+
+    Returns:
+        PreparedImage with the data to send and the applied transform.
+    """
+    source_mime = getattr(screenshot, "mime_type", "image/png")
+    passthrough = PreparedImage(
+        base64_data=screenshot.base64_data,
+        mime_type=source_mime,
+        width=screenshot.width,
+        height=screenshot.height,
+        source_width=screenshot.width,
+        source_height=screenshot.height,
+    )
+    if config is None:
+        return passthrough
+
+    target_size = compute_target_size(screenshot.width, screenshot.height, config)
+    output_format = config.output_format
+    if output_format not in _MIME_TYPES:
+        output_format = None
+    target_mime = _MIME_TYPES[output_format] if output_format else source_mime
+
+    if target_size == (screenshot.width, screenshot.height) and (
+        target_mime == source_mime
+    ):
+        # Nothing to do, avoid decoding the image
+        return passthrough
+
+    try:
+        img = Image.open(BytesIO(base64.b64decode(screenshot.base64_data)))
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        if target_size != img.size:
+            img = img.resize(target_size, Image.Resampling.BICUBIC, reducing_gap=2.0)
+
+        encoded, mime_type = encode_image(
+            img, config, output_format or source_mime.split("/", 1)[-1]
+        )
+    except Exception as e:
+        print(f"Image preparation failed, sending original: {e}")
+        return passthrough
+
+    return PreparedImage(
+        base64_data=base64.b64encode(encoded).decode("ascii"),
+        mime_type=mime_type,
+        width=img.width,
+        height=img.height,
+        source_width=screenshot.width,
+        source_height=screenshot.height,
+    )
+
+
+def encode_image(
+    img: Image.Image, config: Any, output_format: str | None = None
+) -> tuple[bytes, str]:
+    """
+    Encode an image with a configured codec.
+
+    Args:
+        img: Image to encode.
+        config: Codec settings (ImageConfig or ScreenshotConfig): output_format,
+            png_compress_level, jpeg_quality and webp_quality.
+        output_format: "png", "jpeg" or "webp", overriding config.output_format.
+            Unknown formats fall back to PNG.
+
+    Returns:
+        Tuple of (encoded bytes, MIME type).
+    """
+    output_format = output_format or config.output_format
+    if output_format not in _MIME_TYPES:
+        output_format = "png"
+
+    buffered = BytesIO()
+    if output_format == "jpeg":
+        img.save(buffered, format="JPEG", quality=config.jpeg_quality)
+    elif output_format == "webp":
+        img.save(buffered, format="WEBP", quality=config.webp_quality)
+    else:
+        img.save(buffered, format="PNG", compress_level=config.png_compress_level)
+
+    return buffered.getvalue(), _MIME_TYPES[output_format]
+
+
+def get_image_size(data: bytes) -> tuple[int, int] | None:
+    """
+    Read the dimensions of a PNG or JPEG image from its header.
+
+    Nothing is decoded: PNG stores the size in the IHDR chunk right after
+    the signature, JPEG in the start-of-frame segment.
+
+    Args:
+        data: Image bytes; a prefix is enough as long as it covers the header.
+
+    Returns:
+        Tuple of (width, height), or None if the format is not recognized or
+        the header is not within the data.
+    """
+    if data.startswith(PNG_SIGNATURE):
+        # Signature (8) + chunk length (4) + chunk type (4) + width (4) + height (4)
+        if len(data) < 24 or data[12:16] != b"IHDR":
+            return None
+        width, height = struct.unpack(">II", data[16:24])
+        return width, height
+
+    if data.startswith(JPEG_SIGNATURE):
+        offset = 2
+        while offset + 9 <= len(data):
+            if data[offset] != 0xFF:
+                return None
+            marker = data[offset + 1]
+            if marker == 0xFF:
+                offset += 1  # Fill byte
+                continue
+            if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+                offset += 2  # Standalone marker without a length
+                continue
+            if marker in _JPEG_SOF_MARKERS:
+                height, width = struct.unpack(">HH", data[offset + 5 : offset + 9])
+                return width, height
+            (length,) = struct.unpack(">H", data[offset + 2 : offset + 4])
+            offset += 2 + length
+
+    return None
+
+
+def get_base64_image_size(base64_data: str) -> tuple[int, int] | None:
+    """
+    Read the dimensions of a base64-encoded PNG or JPEG image.
+
+    Only a prefix of the string is decoded, growing until the header is
+    found, so the image is never decoded in full.
+
+    Args:
+        base64_data: Base64-encoded image, optionally with line breaks.
+
+    Returns:
+        Tuple of (width, height), or None if the format is not recognized.
+    """
+    for size in _BASE64_PROBE_SIZES + (len(base64_data),):
+        chunk = base64_data[:size].replace("\r", "").replace("\n", "")
+        chunk = chunk[: len(chunk) // 4 * 4]
+        try:
+            dimensions = get_image_size(base64.b64decode(chunk))
+        except ValueError:
+            return None
+        if dimensions is not None or size >= len(base64_data):
+            return dimensions
+    return None
+
+
+def get_image_mime_type(data: bytes, default: str = "image/png") -> str:
+    """Get the MIME type of PNG or JPEG bytes from their signature."""
+    if data.startswith(PNG_SIGNATURE):
+        return "image/png"
+    if data.startswith(JPEG_SIGNATURE):
+        return "image/jpeg"
+    return default
+
+
+@lru_cache(maxsize=8)
+def black_image_base64(width: int, height: int) -> str:
+    """
+    Get a black PNG of the given size, base64-encoded.
+
+    Used for fallback screenshots; encoded once per resolution.
+
+    Args:
+        width: Image width in pixels.
+        height: Image height in pixels.
+
+    Returns:
+        Base64-encoded PNG.
+    """
+    buffered = BytesIO()
+    Image.new("RGB", (width, height), color="black").save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode("ascii")
@@ -0,0 +1,143 @@
+"""Visual settle detection for waiting after device actions."""
+
+import base64
+import time
+from io import BytesIO
+from typing import Any, Callable
+
+from PIL import Image, ImageChops, ImageStat
+
+from phone_agent.config.timing import TIMING_CONFIG, SettleTimingConfig
+
+# Duration of the most recent frame grab, the estimate for the next wait's
+# first grab
+_last_grab_time = 0.0
+
+
+def make_thumbnail(img: Image.Image, width: int) -> Image.Image:
+    """
+    Downscale an image to a small grayscale thumbnail for frame comparison.
+
+    Args:
+        img: Source image.
+        width: Thumbnail width in pixels; height keeps the aspect ratio.
+
+    Returns:
+        Grayscale thumbnail.
+    """
+    height = max(1, round(img.height * width / img.width))
+    if img.format == "JPEG":
+        # Let the JPEG decoder downscale via DCT scaling, much cheaper than a full decode
+        img.draft("L", (width, height))
+    return img.resize((width, height), Image.Resampling.NEAREST).convert("L")
+
+
+def thumbnail_from_screenshot(screenshot: Any, width: int) -> Image.Image | None:
+    """
+    Build a settle thumbnail from a Screenshot-like object.
+
+    Args:
+        screenshot: Object with base64_data.
+        width: Thumbnail width in pixels.
+
+    Returns:
+        Grayscale thumbnail, or None if the screenshot is a fallback image.
+    """
+    if screenshot is None or screenshot.is_sensitive:
+        return None
+    img = Image.open(BytesIO(base64.b64decode(screenshot.base64_data)))
+    return make_thumbnail(img, width)
+
+
+def frame_difference(a: Image.Image, b: Image.Image) -> float:
+    """Mean absolute difference between two grayscale thumbnails (0-255)."""
+    if a.size != b.size:
+        return 255.0
+    return ImageStat.Stat(ImageChops.difference(a, b)).mean[0]
+
+
+def wait_until_stable(
+    grab_frame: Callable[[], Image.Image | None],
+    min_delay: float,
+    max_delay: float,
+    config: SettleTimingConfig | None = None,
+) -> float:
+    """
+    Wait until consecutive frames stop changing.
+
+    A frame is only grabbed if it is expected to finish before max_delay,
+    judged by how long the previous grab took, so slow grabs do not make the
+    wait longer than the fixed delay it replaces.
+
+    Args:
+        grab_frame: Returns a grayscale thumbnail of the current screen, or
+            None if no frame is available.
+        min_delay: Seconds to wait before sampling starts.
+        max_delay: Upper bound on the total wait in seconds.
+        config: Settle configuration. Defaults to the global timing config.
+
+    Returns:
+        Seconds actually waited.
+    """
+    global _last_grab_time
+    config = config or TIMING_CONFIG.settle
+    start = time.monotonic()
+    min_delay = min(min_delay, max_delay)
+    time.sleep(min_delay)
+
+    previous = None
+    stable = 0
+    while True:
+        remaining = max_delay - (time.monotonic() - start)
+        if remaining <= _last_grab_time:
+            # No time for another grab: finish the fixed delay instead
+            time.sleep(max(0.0, remaining))
+            break
+
+        grab_start = time.monotonic()
+        try:
+            frame = grab_frame()
+        except Exception:
+            frame = None
+        _last_grab_time = time.monotonic() - grab_start
+
+        if frame is None:
+            # Cannot observe the screen, fall back to the fixed delay
+            time.sleep(max(0.0, max_delay - (time.monotonic() - start)))
+            break
+
+        if previous is not None and frame_difference(previous, frame) <= (
+            config.diff_threshold
+        ):
+            stable += 1
+            if stable >= config.stable_frames:
+                break
+        else:
+            stable = 0
+        previous = frame
+
+        remaining = max_delay - (time.monotonic() - start)
+        time.sleep(max(0.0, min(config.sample_interval, remaining)))
+
+    return time.monotonic() - start
+
+
+def wait_after_action(
+    action: str,
+    delay: float,
+    grab_frame: Callable[[], Image.Image | None],
+) -> None:
+    """
+    Wait after a device action, using settle detection if enabled.
+
+    Args:
+        action: Action type used to pick the minimum wait (e.g. "tap").
+        delay: Fixed delay; the upper bound when settle detection is enabled.
+        grab_frame: Returns a grayscale thumbnail of the current screen.
+    """
+    settle = TIMING_CONFIG.settle
+    if not settle.enabled or delay <= 0:
+        time.sleep(delay)
+        return
+
+    wait_until_stable(grab_frame, settle.get_min_delay(action), delay, settle)
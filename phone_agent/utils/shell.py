@@ -0,0 +1,261 @@
+"""Persistent interactive shell sessions for low-latency device commands."""
+
+import os
+import queue
+import subprocess
+import threading
+import uuid
+from typing import Callable
+
+# Set PHONE_AGENT_PERSISTENT_SHELL=false to run every command in a new shell
+PERSISTENT_SHELL = os.getenv("PHONE_AGENT_PERSISTENT_SHELL", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
+
+class ShellSessionError(OSError):
+    """Raised when a shell session does not respond to framed commands."""
+
+
+class ShellNotStartedError(OSError):
+    """Raised when a command never reached the shell, so it is safe to rerun."""
+
+
+class DeviceShell:
+    """
+    A long-lived shell session (e.g. `adb shell`, `hdc shell`) on one device.
+
+    Commands are written to the session's stdin and framed with begin/end
+    sentinel lines, so each command pays only a round trip instead of the
+    setup cost of a new shell. The session is restarted automatically if it
+    dies or a command times out.
+
+    The sentinels are written as `__PA_BEGIN_""<token>`, which the shell
+    prints as `__PA_BEGIN_<token>`; lines echoed back by a terminal keep the
+    quotes and are never mistaken for a sentinel. Shells behind a PTY (e.g.
+    `hdc shell`) get an empty prompt and echo turned off when the session
+    starts, and sentinels are matched anywhere in a line, so a leftover
+    prompt or output without a trailing newline does not hide them.
+
+    Args:
+        command: Command that starts the shell, e.g. ["adb", "-s", id, "shell"].
+        timeout: Default per-command timeout in seconds.
+
+    Example:
+        >>> shell = DeviceShell(["adb", "-s", "emulator-5554", "shell"])
+        >>> shell.run("input tap 540 1200").returncode
+        0
+    """
+
+    def __init__(self, command: list[str], timeout: float = 10):
+        self.command = command
+        self.timeout = timeout
+        self._proc: subprocess.Popen | None = None
+        self._lines: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        """Whether the shell process is running."""
+        return self._proc is not None and self._proc.poll() is None
+
+    def run(
+        self, command: str, timeout: float | None = None
+    ) -> subprocess.CompletedProcess:
+        """
+        Run a command in the session.
+
+        Args:
+            command: Shell command line.
+            timeout: Timeout in seconds. Defaults to the session timeout.
+
+        Returns:
+            CompletedProcess with text stdout (stderr merged in) and the
+            command's exit code.
+
+        Raises:
+            subprocess.TimeoutExpired: If the command does not finish in time;
+                the session is restarted on the next call.
+            ShellSessionError: If the session never acknowledged the command,
+                e.g. a shell that does not read commands from a pipe.
+            ShellNotStartedError: If the shell cannot be started or closes
+                before the command begins; the command did not run.
+            EOFError: If the shell closes while the command is running; the
+                command may have had effects and must not be blindly rerun.
+        """
+        timeout = timeout or self.timeout
+        with self._lock:
+            try:
+                if not self.alive:
+                    self._start()
+                try:
+                    return self._run_locked(command, timeout)
+                except BrokenPipeError:
+                    # Session died since the last command, restart once and retry
+                    self._start()
+                    return self._run_locked(command, timeout)
+            except BrokenPipeError as e:
+                raise ShellNotStartedError(f"Shell session closed: {e}") from e
+
+    def close(self) -> None:
+        """Terminate the shell session."""
+        with self._lock:
+            self._kill()
+
+    def _run_locked(self, command: str, timeout: float) -> subprocess.CompletedProcess:
+        """Send one framed command and collect its output. Caller holds the lock."""
+        token = uuid.uuid4().hex
+        begin = f"__PA_BEGIN_{token}"
+        end = f"__PA_END_{token}_"
+        script = (
+            f'echo __PA_BEGIN_""{token}\n'
+            f"{{ {command}\n}} </dev/null 2>&1\n"
+            f'echo __PA_END_""{token}_$?\n'
+        )
+        self._proc.stdin.write(script.encode("utf-8"))
+        self._proc.stdin.flush()
+
+        output = []
+        started = False
+        while True:
+            try:
+                line = self._lines.get(timeout=timeout)
+            except queue.Empty:
+                self._kill()
+                if not started:
+                    raise ShellSessionError(
+                        f"Shell session not responding: {' '.join(self.command)}"
+                    )
+                raise subprocess.TimeoutExpired(command, timeout)
+            if line is None:
+                # The process may not be reaped yet; never reuse it
+                self._kill()
+                if not started:
+                    # The command never ran, safe to retry in a new session
+                    raise BrokenPipeError("Shell session closed")
+                raise EOFError("Shell session closed")
+
+            line = line.rstrip("\r\n")
+            if not started:
+                started = begin in line
+                continue
+            head, found, status = line.rpartition(end)
+            if found and status.isdigit():
+                if head:
+                    output.append(head)  # Output without a trailing newline
+                return subprocess.CompletedProcess(
+                    command, int(status), "".join(output), ""
+                )
+            output.append(line + "\n")
+
+    def _start(self) -> None:
+        """Start the shell process and its reader thread."""
+        self._kill()
+        self._lines = queue.Queue()
+        try:
+            self._proc = subprocess.Popen(
+                self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+        except OSError as e:
+            raise ShellNotStartedError(f"Cannot start {self.command[0]}: {e}") from e
+        threading.Thread(
+            target=self._read_output,
+            args=(self._proc, self._lines),
+            name=f"shell-{' '.join(self.command)}",
+            daemon=True,
+        ).start()
+        # No prompt and no echo if the shell runs on a PTY; harmless otherwise
+        self._proc.stdin.write(b"PS1=''; PS2=''; stty -echo 2>/dev/null\n")
+        self._proc.stdin.flush()
+
+    def _kill(self) -> None:
+        """Terminate the shell process if running."""
+        if self._proc is None:
+            return
+        try:
+            self._proc.kill()
+            self._proc.wait(timeout=5)
+        except Exception:
+            pass
+        self._proc = None
+
+    @staticmethod
+    def _read_output(proc: subprocess.Popen, lines: queue.Queue) -> None:
+        """Forward output lines to the queue; None marks end of stream."""
+        for raw in iter(proc.stdout.readline, b""):
+            lines.put(raw.decode("utf-8", errors="replace"))
+        lines.put(None)
+
+
+class DeviceShells:
+    """
+    Persistent shell sessions per device, with a one-shot fallback.
+
+    A command falls back to a new one-shot shell only when it provably never
+    ran: the session could not be started, closed before the command began,
+    or never answers framed commands (the device is then remembered and
+    always uses one-shot shells). A session that closes mid-command raises,
+    since running `input tap` or `input text` again would repeat it.
+
+    Args:
+        shell_command: Builds the command that starts a device's shell.
+        run_once: Runs shell arguments in a one-shot shell:
+            (device_id, args, timeout) -> CompletedProcess.
+        enabled: Whether to use persistent sessions at all.
+    """
+
+    def __init__(
+        self,
+        shell_command: Callable[[str | None], list[str]],
+        run_once: Callable[
+            [str | None, list[str], float | None], subprocess.CompletedProcess
+        ],
+        enabled: bool = PERSISTENT_SHELL,
+    ):
+        self.shell_command = shell_command
+        self.run_once = run_once
+        self.enabled = enabled
+        self._shells: dict[str | None, DeviceShell] = {}
+        # Devices whose shell does not answer framed commands
+        self._unsupported: set[str | None] = set()
+        self._lock = threading.Lock()
+
+    def get(self, device_id: str | None = None) -> DeviceShell:
+        """Get the session for a device, creating it on first use."""
+        with self._lock:
+            shell = self._shells.get(device_id)
+            if shell is None:
+                shell = DeviceShell(self.shell_command(device_id))
+                self._shells[device_id] = shell
+            return shell
+
+    def run(
+        self, device_id: str | None, args: list[str], timeout: float | None = None
+    ) -> subprocess.CompletedProcess:
+        """
+        Run shell arguments (joined with spaces) in the device's session.
+
+        Raises:
+            EOFError: If the session closed while the command was running.
+            subprocess.TimeoutExpired: If the command did not finish in time.
+        """
+        if self.enabled and device_id not in self._unsupported:
+            try:
+                return self.get(device_id).run(" ".join(args), timeout)
+            except ShellSessionError:
+                self._unsupported.add(device_id)
+            except ShellNotStartedError:
+                pass
+        return self.run_once(device_id, args, timeout)
+
+    def close(self) -> None:
+        """Terminate all sessions."""
+        with self._lock:
+            for shell in self._shells.values():
+                shell.close()
+            self._shells.clear()
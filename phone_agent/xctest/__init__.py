@@ -1,5 +1,11 @@
 """XCTest utilities for iOS device interaction via WebDriverAgent/XCUITest."""
 
+from phone_agent.xctest.client import (
+    WDAClient,
+    WDAClientConfig,
+    configure_wda_clients,
+    get_wda_client,
+)
 from phone_agent.xctest.connection import (
     ConnectionType,
     DeviceInfo,
@@ -17,18 +23,30 @@ from phone_agent.xctest.device import (
     swipe,
     tap,
 )
+from phone_agent.xctest.geometry import (
+    ScreenGeometry,
+    get_screen_geometry,
+    invalidate_screen_geometry,
+)
+from phone_agent.xctest.gestures import GestureBuilder
 from phone_agent.xctest.input import (
     clear_text,
+    replace_text,
     type_text,
 )
+from phone_agent.xctest.mjpeg import MJPEGConfig, MJPEGFrameSource, get_mjpeg_source
 from phone_agent.xctest.screenshot import get_screenshot
 
 __all__ = [
     # Screenshot
     "get_screenshot",
+    "MJPEGFrameSource",
+    "MJPEGConfig",
+    "get_mjpeg_source",
     # Input
     "type_text",
     "clear_text",
+    "replace_text",
     # Device control
     "get_current_app",
     "tap",
@@ -38,10 +56,20 @@ __all__ = [
     "double_tap",
     "long_press",
     "launch_app",
+    "GestureBuilder",
+    # Screen geometry
+    "ScreenGeometry",
+    "get_screen_geometry",
+    "invalidate_screen_geometry",
     # Connection management
     "XCTestConnection",
     "DeviceInfo",
     "ConnectionType",
     "quick_connect",
     "list_devices",
+    # WebDriverAgent HTTP client
+    "WDAClient",
+    "WDAClientConfig",
+    "configure_wda_clients",
+    "get_wda_client",
 ]
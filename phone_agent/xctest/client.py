@@ -0,0 +1,166 @@
+"""Pooled, keep-alive HTTP client for WebDriverAgent."""
+
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class WDAClientConfig:
+    """Connection policy for WebDriverAgent clients."""
+
+    pool_size: int = 4  # Keep-alive connections per device
+    connect_retries: int = 2  # Retries when a connection cannot be opened
+    backoff_factor: float = 0.1  # Exponential backoff between those retries (seconds)
+    connect_timeout: float = 3.0  # Seconds to open a connection (usbmux tunnels)
+    timeout: float = 10.0  # Default seconds to wait for a response
+
+
+class WDAClient:
+    """
+    HTTP client for one WebDriverAgent server, shared by all xctest calls.
+
+    Holds a requests.Session, so taps, screenshots and app queries reuse
+    keep-alive connections instead of opening a new TCP connection (and
+    iproxy tunnel) per call. Only connection failures are retried: the
+    request has not reached WDA yet, so even gestures are safe to resend.
+
+    Args:
+        wda_url: WebDriverAgent URL.
+        config: Connection policy.
+
+    Example:
+        >>> client = get_wda_client("http://localhost:8100")
+        >>> client.post(client.session_url("actions", session_id), json=payload)
+    """
+
+    def __init__(self, wda_url: str, config: WDAClientConfig | None = None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.wda_url = wda_url.rstrip("/")
+        self.config = config or WDAClientConfig()
+        self.session_id: str | None = None
+
+        retry = Retry(
+            total=None,
+            connect=self.config.connect_retries,
+            read=0,
+            status=0,
+            other=0,
+            allowed_methods=None,
+            backoff_factor=self.config.backoff_factor,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.config.pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.verify = False
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, endpoint: str) -> str:
+        """Full URL for an endpoint outside any session."""
+        return f"{self.wda_url}/{endpoint}"
+
+    def session_url(self, endpoint: str, session_id: str | None = None) -> str:
+        """
+        Full URL for a session endpoint.
+
+        Args:
+            endpoint: The endpoint path.
+            session_id: Session ID; defaults to the client's current session.
+
+        Returns:
+            The session URL, or the sessionless URL if there is no session.
+        """
+        session_id = session_id or self.session_id
+        if session_id:
+            return f"{self.wda_url}/session/{session_id}/{endpoint}"
+        # Try to use WDA endpoints without session when possible
+        return self.url(endpoint)
+
+    def get(self, url: str, timeout: float | None = None, **kwargs: Any):
+        """Send a GET request; returns a requests.Response."""
+        return self.session.get(url, timeout=self._timeout(timeout), **kwargs)
+
+    def post(self, url: str, timeout: float | None = None, **kwargs: Any):
+        """Send a POST request; returns a requests.Response."""
+        return self.session.post(url, timeout=self._timeout(timeout), **kwargs)
+
+    def start_session(self, capabilities: dict[str, Any] | None = None):
+        """
+        Create a WDA session and make it the client's current session.
+
+        Args:
+            capabilities: Session capabilities.
+
+        Returns:
+            The requests.Response of the session request.
+        """
+        response = self.post(
+            self.url("session"), json={"capabilities": capabilities or {}}, timeout=30
+        )
+        if response.status_code in (200, 201):
+            data = response.json()
+            self.session_id = data.get("sessionId") or data.get("value", {}).get(
+                "sessionId"
+            )
+        return response
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.session.close()
+
+    def _timeout(self, timeout: float | None) -> tuple[float, float]:
+        """(connect, read) timeout for a request."""
+        return self.config.connect_timeout, timeout or self.config.timeout
+
+
+_clients: dict[str, WDAClient] = {}
+_clients_lock = threading.Lock()
+_config = WDAClientConfig()
+
+
+def configure_wda_clients(config: WDAClientConfig) -> None:
+    """
+    Set the connection policy for WDA clients created from now on.
+
+    Args:
+        config: Connection policy.
+    """
+    global _config
+    with _clients_lock:
+        _config = config
+
+
+def get_wda_client(wda_url: str = "http://localhost:8100") -> WDAClient:
+    """
+    Get the process-wide client for a WebDriverAgent URL.
+
+    Each device has its own WDA URL, so this is one pooled client per device.
+
+    Args:
+        wda_url: WebDriverAgent URL.
+
+    Returns:
+        Shared WDAClient.
+    """
+    key = wda_url.rstrip("/")
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = WDAClient(key, _config)
+            _clients[key] = client
+        return client
+
+
+def close_wda_clients() -> None:
+    """Close and forget all WDA clients."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
@@ -5,6 +5,9 @@ import time
 from dataclasses import dataclass
 from enum import Enum
 
+from phone_agent.xctest.client import get_wda_client
+from phone_agent.xctest.geometry import invalidate_screen_geometry
+
 
 class ConnectionType(Enum):
     """Type of iOS connection."""
@@ -204,11 +207,9 @@ class XCTestConnection:
             True if WDA is ready, False otherwise.
         """
         try:
-            import requests
+            client = get_wda_client(self.wda_url)
 
-            response = requests.get(
-                f"{self.wda_url}/status", timeout=timeout, verify=False
-            )
+            response = client.get(client.url("status"), timeout=timeout)
             return response.status_code == 200
         except ImportError:
             print(
@@ -226,21 +227,13 @@ class XCTestConnection:
             Tuple of (success, session_id or error_message).
         """
         try:
-            import requests
+            client = get_wda_client(self.wda_url)
 
-            response = requests.post(
-                f"{self.wda_url}/session",
-                json={"capabilities": {}},
-                timeout=30,
-                verify=False,
-            )
+            response = client.start_session()
 
             if response.status_code in (200, 201):
-                data = response.json()
-                session_id = data.get("sessionId") or data.get("value", {}).get(
-                    "sessionId"
-                )
-                return True, session_id or "session_started"
+                invalidate_screen_geometry(self.wda_url)
+                return True, client.session_id or "session_started"
             else:
                 return False, f"Failed to start session: {response.text}"
 
@@ -260,9 +253,9 @@ class XCTestConnection:
             Status dictionary or None if not available.
         """
         try:
-            import requests
+            client = get_wda_client(self.wda_url)
 
-            response = requests.get(f"{self.wda_url}/status", timeout=5, verify=False)
+            response = client.get(client.url("status"), timeout=5)
 
             if response.status_code == 200:
                 return response.json()
@@ -5,27 +5,19 @@ import time
 from typing import Optional
 
 from phone_agent.config.apps_ios import APP_PACKAGES_IOS as APP_PACKAGES
+from phone_agent.config.apps_ios import BUNDLE_ID_APP_NAMES
+from phone_agent.utils.settle import wait_after_action
+from phone_agent.xctest.client import get_wda_client
+from phone_agent.xctest.geometry import get_screen_geometry, to_points
+from phone_agent.xctest.gestures import GestureBuilder
+from phone_agent.xctest.screenshot import get_settle_frame
 
-SCALE_FACTOR = 3 # 3 for most modern iPhone 
 
-def _get_wda_session_url(wda_url: str, session_id: str | None, endpoint: str) -> str:
-    """
-    Get the correct WDA URL for a session endpoint.
-
-    Args:
-        wda_url: Base WDA URL.
-        session_id: Optional session ID.
-        endpoint: The endpoint path.
-
-    Returns:
-        Full URL for the endpoint.
-    """
-    base = wda_url.rstrip("/")
-    if session_id:
-        return f"{base}/session/{session_id}/{endpoint}"
-    else:
-        # Try to use WDA endpoints without session when possible
-        return f"{base}/{endpoint}"
+def _wait_after_action(
+    action: str, delay: float, wda_url: str, session_id: str | None
+) -> None:
+    """Wait after an action, returning early once the screen settles if enabled."""
+    wait_after_action(action, delay, lambda: get_settle_frame(wda_url, session_id))
 
 
 def get_current_app(
@@ -42,12 +34,10 @@ def get_current_app(
         The app name if recognized, otherwise "System Home".
     """
     try:
-        import requests
+        client = get_wda_client(wda_url)
 
         # Get active app info from WDA using activeAppInfo endpoint
-        response = requests.get(
-            f"{wda_url.rstrip('/')}/wda/activeAppInfo", timeout=5, verify=False
-        )
+        response = client.get(client.url("wda/activeAppInfo"), timeout=5)
 
         if response.status_code == 200:
             data = response.json()
@@ -58,9 +48,9 @@ def get_current_app(
 
             if bundle_id:
                 # Try to find app name from bundle ID
-                for app_name, package in APP_PACKAGES.items():
-                    if package == bundle_id:
-                        return app_name
+                app_name = BUNDLE_ID_APP_NAMES.get(bundle_id)
+                if app_name:
+                    return app_name
 
             return "System Home"
 
@@ -90,30 +80,10 @@ def tap(
         delay: Delay in seconds after tap.
     """
     try:
-        import requests
-
-        url = _get_wda_session_url(wda_url, session_id, "actions")
-
         # W3C WebDriver Actions API for tap/click
-        actions = {
-            "actions": [
-                {
-                    "type": "pointer",
-                    "id": "finger1",
-                    "parameters": {"pointerType": "touch"},
-                    "actions": [
-                        {"type": "pointerMove", "duration": 0, "x": x / SCALE_FACTOR, "y": y / SCALE_FACTOR},
-                        {"type": "pointerDown", "button": 0},
-                        {"type": "pause", "duration": 0.1},
-                        {"type": "pointerUp", "button": 0},
-                    ],
-                }
-            ]
-        }
-
-        requests.post(url, json=actions, timeout=15, verify=False)
+        GestureBuilder(wda_url, session_id).tap(x, y).perform(timeout=15)
 
-        time.sleep(delay)
+        _wait_after_action("tap", delay, wda_url, session_id)
 
     except ImportError:
         print("Error: requests library required. Install: pip install requests")
@@ -139,34 +109,12 @@ def double_tap(
         delay: Delay in seconds after double tap.
     """
     try:
-        import requests
-
-        url = _get_wda_session_url(wda_url, session_id, "actions")
-
-        # W3C WebDriver Actions API for double tap
-        actions = {
-            "actions": [
-                {
-                    "type": "pointer",
-                    "id": "finger1",
-                    "parameters": {"pointerType": "touch"},
-                    "actions": [
-                        {"type": "pointerMove", "duration": 0, "x": x / SCALE_FACTOR, "y": y / SCALE_FACTOR},
-                        {"type": "pointerDown", "button": 0},
-                        {"type": "pause", "duration": 100},
-                        {"type": "pointerUp", "button": 0},
-                        {"type": "pause", "duration": 100},
-                        {"type": "pointerDown", "button": 0},
-                        {"type": "pause", "duration": 100},
-                        {"type": "pointerUp", "button": 0},
-                    ],
-                }
-            ]
-        }
-
-        requests.post(url, json=actions, timeout=10, verify=False)
+        # Both taps and the gap between them run on the device in one request
+        GestureBuilder(wda_url, session_id).tap(x, y).pause(100).tap(x, y).perform(
+            timeout=10
+        )
 
-        time.sleep(delay)
+        _wait_after_action("double_tap", delay, wda_url, session_id)
 
     except ImportError:
         print("Error: requests library required. Install: pip install requests")
@@ -194,33 +142,15 @@ def long_press(
         delay: Delay in seconds after long press.
     """
     try:
-        import requests
-
-        url = _get_wda_session_url(wda_url, session_id, "actions")
-
         # W3C WebDriver Actions API for long press
         # Convert duration to milliseconds
         duration_ms = int(duration * 1000)
 
-        actions = {
-            "actions": [
-                {
-                    "type": "pointer",
-                    "id": "finger1",
-                    "parameters": {"pointerType": "touch"},
-                    "actions": [
-                        {"type": "pointerMove", "duration": 0, "x": x / SCALE_FACTOR, "y": y / SCALE_FACTOR},
-                        {"type": "pointerDown", "button": 0},
-                        {"type": "pause", "duration": duration_ms},
-                        {"type": "pointerUp", "button": 0},
-                    ],
-                }
-            ]
-        }
-
-        requests.post(url, json=actions, timeout=int(duration + 10), verify=False)
+        GestureBuilder(wda_url, session_id).press(x, y, duration_ms).perform(
+            timeout=int(duration + 10)
+        )
 
-        time.sleep(delay)
+        _wait_after_action("long_press", delay, wda_url, session_id)
 
     except ImportError:
         print("Error: requests library required. Install: pip install requests")
@@ -252,7 +182,7 @@ def swipe(
         delay: Delay in seconds after swipe.
     """
     try:
-        import requests
+        client = get_wda_client(wda_url)
 
         if duration is None:
             # Calculate duration based on distance
@@ -260,20 +190,22 @@ def swipe(
             duration = dist_sq / 1000000  # Convert to seconds
             duration = max(0.3, min(duration, 2.0))  # Clamp between 0.3-2 seconds
 
-        url = _get_wda_session_url(wda_url, session_id, "wda/dragfromtoforduration")
+        url = client.session_url("wda/dragfromtoforduration", session_id)
+        from_x, from_y = to_points(start_x, start_y, wda_url, session_id)
+        to_x, to_y = to_points(end_x, end_y, wda_url, session_id)
 
         # WDA dragfromtoforduration API payload
         payload = {
-            "fromX": start_x / SCALE_FACTOR,
-            "fromY": start_y / SCALE_FACTOR,
-            "toX": end_x / SCALE_FACTOR,
-            "toY": end_y / SCALE_FACTOR,
+            "fromX": from_x,
+            "fromY": from_y,
+            "toX": to_x,
+            "toY": to_y,
             "duration": duration,
         }
 
-        requests.post(url, json=payload, timeout=int(duration + 10), verify=False)
+        client.post(url, json=payload, timeout=int(duration + 10))
 
-        time.sleep(delay)
+        _wait_after_action("swipe", delay, wda_url, session_id)
 
     except ImportError:
         print("Error: requests library required. Install: pip install requests")
@@ -299,9 +231,9 @@ def back(
         by swiping from the left edge of the screen.
     """
     try:
-        import requests
+        client = get_wda_client(wda_url)
 
-        url = _get_wda_session_url(wda_url, session_id, "wda/dragfromtoforduration")
+        url = client.session_url("wda/dragfromtoforduration", session_id)
 
         # Swipe from left edge to simulate back gesture
         payload = {
@@ -312,9 +244,9 @@ def back(
             "duration": 0.3,
         }
 
-        requests.post(url, json=payload, timeout=10, verify=False)
+        client.post(url, json=payload, timeout=10)
 
-        time.sleep(delay)
+        _wait_after_action("back", delay, wda_url, session_id)
 
     except ImportError:
         print("Error: requests library required. Install: pip install requests")
@@ -336,13 +268,13 @@ def home(
         delay: Delay in seconds after pressing home.
     """
     try:
-        import requests
+        client = get_wda_client(wda_url)
 
-        url = f"{wda_url.rstrip('/')}/wda/homescreen"
+        url = client.url("wda/homescreen")
 
-        requests.post(url, timeout=10, verify=False)
+        client.post(url, timeout=10)
 
-        time.sleep(delay)
+        _wait_after_action("home", delay, wda_url, session_id)
 
     except ImportError:
         print("Error: requests library required. Install: pip install requests")
@@ -372,16 +304,14 @@ def launch_app(
         return False
 
     try:
-        import requests
+        client = get_wda_client(wda_url)
 
         bundle_id = APP_PACKAGES[app_name]
-        url = _get_wda_session_url(wda_url, session_id, "wda/apps/launch")
+        url = client.session_url("wda/apps/launch", session_id)
 
-        response = requests.post(
-            url, json={"bundleId": bundle_id}, timeout=10, verify=False
-        )
+        response = client.post(url, json={"bundleId": bundle_id}, timeout=10)
 
-        time.sleep(delay)
+        _wait_after_action("launch", delay, wda_url, session_id)
         return response.status_code in (200, 201)
 
     except ImportError:
@@ -396,7 +326,7 @@ def get_screen_size(
     wda_url: str = "http://localhost:8100", session_id: str | None = None
 ) -> tuple[int, int]:
     """
-    Get the screen dimensions.
+    Get the screen dimensions in points, from the per-device geometry cache.
 
     Args:
         wda_url: WebDriverAgent URL.
@@ -405,26 +335,12 @@ def get_screen_size(
     Returns:
         Tuple of (width, height). Returns (375, 812) as default if unable to fetch.
     """
-    try:
-        import requests
-
-        url = _get_wda_session_url(wda_url, session_id, "window/size")
-
-        response = requests.get(url, timeout=5, verify=False)
-
-        if response.status_code == 200:
-            data = response.json()
-            value = data.get("value", {})
-            width = value.get("width", 375)
-            height = value.get("height", 812)
-            return width, height
-
-    except ImportError:
-        print("Error: requests library required. Install: pip install requests")
-    except Exception as e:
-        print(f"Error getting screen size: {e}")
+    geometry = get_screen_geometry(wda_url, session_id)
+    if geometry is not None:
+        return int(geometry.width), int(geometry.height)
 
     # Default iPhone screen size (iPhone X and later)
+    print("Warning: screen size unavailable, assuming 375x812 points")
     return 375, 812
 
 
@@ -444,11 +360,11 @@ def press_button(
         delay: Delay in seconds after pressing.
     """
     try:
-        import requests
+        client = get_wda_client(wda_url)
 
-        url = f"{wda_url.rstrip('/')}/wda/pressButton"
+        url = client.url("wda/pressButton")
 
-        requests.post(url, json={"name": button_name}, timeout=10, verify=False)
+        client.post(url, json={"name": button_name}, timeout=10)
 
         time.sleep(delay)
 
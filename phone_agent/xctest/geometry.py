@@ -0,0 +1,187 @@
+"""Per-device screen geometry: converts screenshot pixels to WDA points."""
+
+import threading
+from dataclasses import dataclass
+
+from phone_agent.xctest.client import get_wda_client
+
+# Points-to-pixels scale used when WDA cannot report one (most modern iPhones)
+DEFAULT_SCALE = 3.0
+
+
+@dataclass(frozen=True)
+class ScreenGeometry:
+    """Screen size of one device in points, and the screenshot size in pixels."""
+
+    width: float  # Logical width in points (window/size)
+    height: float  # Logical height in points (window/size)
+    pixel_width: int  # Width of the screenshot the model sees
+    pixel_height: int  # Height of the screenshot the model sees
+    session_id: str | None = None  # WDA session the geometry was read in
+
+    @property
+    def scale(self) -> float:
+        """Screenshot pixels per point (3.0 for @3x, lower for scaled frames)."""
+        return self.pixel_width / self.width
+
+    @property
+    def is_landscape(self) -> bool:
+        """Whether the screen is wider than it is tall."""
+        return self.width > self.height
+
+    def to_points(self, x: float, y: float) -> tuple[float, float]:
+        """
+        Convert screenshot pixel coordinates to WDA points.
+
+        Args:
+            x: X coordinate in screenshot pixels.
+            y: Y coordinate in screenshot pixels.
+
+        Returns:
+            Tuple of (x, y) in points.
+        """
+        return x * self.width / self.pixel_width, y * self.height / self.pixel_height
+
+
+_geometries: dict[str, ScreenGeometry] = {}
+_screenshot_sizes: dict[str, tuple[int, int]] = {}
+_lock = threading.Lock()
+
+
+def _key(wda_url: str) -> str:
+    return wda_url.rstrip("/")
+
+
+def get_screen_geometry(
+    wda_url: str = "http://localhost:8100", session_id: str | None = None
+) -> ScreenGeometry | None:
+    """
+    Get the cached geometry of a device, reading it from WDA on first use.
+
+    window/size is requested once per WDA session. The pixel size is the one
+    last recorded with record_screenshot_size; without one, WDA's reported
+    screen scale is used instead.
+
+    Args:
+        wda_url: WebDriverAgent URL.
+        session_id: Optional WDA session ID.
+
+    Returns:
+        ScreenGeometry, or None if WDA did not report a window size.
+    """
+    key = _key(wda_url)
+    with _lock:
+        geometry = _geometries.get(key)
+        screenshot_size = _screenshot_sizes.get(key)
+    if geometry is not None and (
+        session_id is None or geometry.session_id in (None, session_id)
+    ):
+        return geometry
+
+    client = get_wda_client(wda_url)
+    try:
+        response = client.get(client.session_url("window/size", session_id), timeout=5)
+        if response.status_code != 200:
+            print(f"Error getting window size: HTTP {response.status_code}")
+            return None
+        value = response.json().get("value", {})
+        width, height = value["width"], value["height"]
+    except Exception as e:
+        print(f"Error getting window size: {e}")
+        return None
+
+    # A screenshot taken in the other orientation is stale
+    if screenshot_size is None or (screenshot_size[0] > screenshot_size[1]) != (
+        width > height
+    ):
+        scale = _get_screen_scale(wda_url, session_id)
+        screenshot_size = round(width * scale), round(height * scale)
+
+    geometry = ScreenGeometry(
+        width=width,
+        height=height,
+        pixel_width=screenshot_size[0],
+        pixel_height=screenshot_size[1],
+        session_id=session_id,
+    )
+    with _lock:
+        _geometries[key] = geometry
+    return geometry
+
+
+def _get_screen_scale(wda_url: str, session_id: str | None) -> float:
+    """Read the screen scale from WDA's /wda/screen endpoint."""
+    client = get_wda_client(wda_url)
+    try:
+        response = client.get(client.session_url("wda/screen", session_id), timeout=5)
+        if response.status_code == 200:
+            scale = response.json().get("value", {}).get("scale")
+            if scale:
+                return float(scale)
+    except Exception as e:
+        print(f"Error getting screen scale: {e}")
+    return DEFAULT_SCALE
+
+
+def record_screenshot_size(wda_url: str, width: int, height: int) -> None:
+    """
+    Record the pixel size of the latest screenshot of a device.
+
+    A size different from the cached geometry means the device rotated (or
+    the frame scaling changed), so the geometry is read again on next use.
+
+    Args:
+        wda_url: WebDriverAgent URL.
+        width: Screenshot width in pixels.
+        height: Screenshot height in pixels.
+    """
+    key = _key(wda_url)
+    with _lock:
+        _screenshot_sizes[key] = (width, height)
+        geometry = _geometries.get(key)
+        if geometry is not None and (geometry.pixel_width, geometry.pixel_height) != (
+            width,
+            height,
+        ):
+            del _geometries[key]
+
+
+def invalidate_screen_geometry(wda_url: str | None = None) -> None:
+    """
+    Forget cached geometry, e.g. after a new WDA session or a rotation.
+
+    Args:
+        wda_url: WebDriverAgent URL, or None to forget all devices.
+    """
+    with _lock:
+        if wda_url is None:
+            _geometries.clear()
+            _screenshot_sizes.clear()
+        else:
+            _geometries.pop(_key(wda_url), None)
+            _screenshot_sizes.pop(_key(wda_url), None)
+
+
+def to_points(
+    x: float,
+    y: float,
+    wda_url: str = "http://localhost:8100",
+    session_id: str | None = None,
+) -> tuple[float, float]:
+    """
+    Convert screenshot pixel coordinates to WDA points for a device.
+
+    Args:
+        x: X coordinate in screenshot pixels.
+        y: Y coordinate in screenshot pixels.
+        wda_url: WebDriverAgent URL.
+        session_id: Optional WDA session ID.
+
+    Returns:
+        Tuple of (x, y) in points; divided by DEFAULT_SCALE if the geometry
+        is unavailable.
+    """
+    geometry = get_screen_geometry(wda_url, session_id)
+    if geometry is None:
+        return x / DEFAULT_SCALE, y / DEFAULT_SCALE
+    return geometry.to_points(x, y)
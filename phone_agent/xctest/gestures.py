@@ -0,0 +1,251 @@
+"""Compile compound gestures into a single W3C actions request for WDA."""
+
+import unicodedata
+from typing import Any
+
+from phone_agent.xctest.client import get_wda_client
+from phone_agent.xctest.geometry import to_points
+
+# W3C WebDriver key value for Backspace
+BACKSPACE_KEY = "\ue003"
+
+_ZWJ = "\u200d"
+
+
+class GestureBuilder:
+    """
+    Builds a pointer/key timeline and sends it as one /actions request.
+
+    W3C actions run tick by tick: each tick takes the next action of every
+    input source. Adding a step to one source pads the other with a
+    zero-length pause, so steps run in the order they were added and the
+    timing between them is kept on the device instead of between requests.
+
+    Coordinates are screenshot pixels, converted to points with the
+    device's cached screen geometry.
+
+    Args:
+        wda_url: WebDriverAgent URL.
+        session_id: Optional WDA session ID.
+
+    Example:
+        >>> gesture = GestureBuilder(wda_url, session_id)
+        >>> gesture.tap(540, 1200).pause(100).tap(540, 1200).perform()
+        >>> GestureBuilder(wda_url).clear(100).type("hello").perform()
+    """
+
+    def __init__(
+        self, wda_url: str = "http://localhost:8100", session_id: str | None = None
+    ):
+        self.wda_url = wda_url
+        self.session_id = session_id
+        self._pointer: list[dict[str, Any]] = []
+        self._keys: list[dict[str, Any]] = []
+
+    def _add_pointer(self, *actions: dict[str, Any]) -> "GestureBuilder":
+        self._pointer.extend(actions)
+        self._keys.extend({"type": "pause", "duration": 0} for _ in actions)
+        return self
+
+    def _add_keys(self, *actions: dict[str, Any]) -> "GestureBuilder":
+        self._keys.extend(actions)
+        self._pointer.extend({"type": "pause", "duration": 0} for _ in actions)
+        return self
+
+    def _move(self, x: int, y: int, duration_ms: int = 0) -> dict[str, Any]:
+        point_x, point_y = to_points(x, y, self.wda_url, self.session_id)
+        return {
+            "type": "pointerMove",
+            "duration": duration_ms,
+            "x": point_x,
+            "y": point_y,
+        }
+
+    def pause(self, duration_ms: int) -> "GestureBuilder":
+        """
+        Wait before the next step.
+
+        Args:
+            duration_ms: Pause in milliseconds.
+        """
+        return self._add_pointer({"type": "pause", "duration": duration_ms})
+
+    def press(self, x: int, y: int, duration_ms: int) -> "GestureBuilder":
+        """
+        Touch down at a point and hold.
+
+        Args:
+            x: X coordinate in screenshot pixels.
+            y: Y coordinate in screenshot pixels.
+            duration_ms: Hold time in milliseconds.
+        """
+        return self._add_pointer(
+            self._move(x, y),
+            {"type": "pointerDown", "button": 0},
+            {"type": "pause", "duration": duration_ms},
+            {"type": "pointerUp", "button": 0},
+        )
+
+    def tap(self, x: int, y: int) -> "GestureBuilder":
+        """
+        Tap at a point.
+
+        Args:
+            x: X coordinate in screenshot pixels.
+            y: Y coordinate in screenshot pixels.
+        """
+        return self.press(x, y, 100)
+
+    def swipe(
+        self, start_x: int, start_y: int, end_x: int, end_y: int, duration_ms: int
+    ) -> "GestureBuilder":
+        """
+        Swipe from one point to another.
+
+        Args:
+            start_x: Starting X coordinate in screenshot pixels.
+            start_y: Starting Y coordinate in screenshot pixels.
+            end_x: Ending X coordinate in screenshot pixels.
+            end_y: Ending Y coordinate in screenshot pixels.
+            duration_ms: Duration of the move in milliseconds.
+        """
+        return self._add_pointer(
+            self._move(start_x, start_y),
+            {"type": "pointerDown", "button": 0},
+            self._move(end_x, end_y, duration_ms),
+            {"type": "pointerUp", "button": 0},
+        )
+
+    def type(self, text: str) -> "GestureBuilder":
+        """
+        Type text into the focused field, one grapheme cluster per key.
+
+        Args:
+            text: The text to type.
+        """
+        for key in _graphemes(text):
+            self._add_keys(
+                {"type": "keyDown", "value": key}, {"type": "keyUp", "value": key}
+            )
+        return self
+
+    def clear(self, count: int = 100) -> "GestureBuilder":
+        """
+        Delete text in the focused field with backspaces.
+
+        Args:
+            count: Number of backspaces to send.
+        """
+        return self.type(BACKSPACE_KEY * count)
+
+    def build(self) -> dict[str, Any]:
+        """
+        Get the W3C actions payload.
+
+        Returns:
+            Payload with a touch pointer and/or a key input source.
+        """
+        sources = []
+        if any(action["type"] != "pause" for action in self._pointer):
+            sources.append(
+                {
+                    "type": "pointer",
+                    "id": "finger1",
+                    "parameters": {"pointerType": "touch"},
+                    "actions": self._pointer,
+                }
+            )
+        if any(action["type"] != "pause" for action in self._keys):
+            sources.append({"type": "key", "id": "keyboard", "actions": self._keys})
+        return {"actions": sources}
+
+    def duration(self) -> float:
+        """Total duration of the timeline in seconds."""
+        ticks = zip(self._pointer, self._keys)
+        return (
+            sum(max(a.get("duration", 0), b.get("duration", 0)) for a, b in ticks)
+            / 1000
+        )
+
+    def send(self, timeout: float | None = None):
+        """
+        Send the timeline to WDA as one request, leaving errors to the caller.
+
+        Args:
+            timeout: Seconds to wait for WDA (default: timeline duration + 10).
+
+        Returns:
+            WDA's response, or None if there is nothing to perform.
+
+        Raises:
+            Exception: If the request fails; after a timeout WDA may still be
+                performing the actions.
+        """
+        payload = self.build()
+        if not payload["actions"]:
+            return None
+
+        client = get_wda_client(self.wda_url)
+        return client.post(
+            client.session_url("actions", self.session_id),
+            json=payload,
+            timeout=timeout or self.duration() + 10,
+        )
+
+    def perform(self, timeout: float | None = None) -> bool:
+        """
+        Send the timeline to WDA as one request.
+
+        Args:
+            timeout: Seconds to wait for WDA (default: timeline duration + 10).
+
+        Returns:
+            True if WDA performed the actions.
+        """
+        try:
+            response = self.send(timeout)
+            return response is None or response.status_code == 200
+
+        except ImportError:
+            print("Error: requests library required. Install: pip install requests")
+        except Exception as e:
+            print(f"Error performing gesture: {e}")
+        return False
+
+
+def _graphemes(text: str) -> list[str]:
+    """
+    Split text into user-perceived characters for key actions.
+
+    Keeps combining marks, variation selectors, emoji modifiers and tags with
+    their base, joins ZWJ sequences (e.g. family emoji) and pairs regional
+    indicators into flags, so no key carries half a character.
+    """
+    clusters: list[str] = []
+    for char in text:
+        code = ord(char)
+        if clusters and (
+            clusters[-1].endswith(_ZWJ)
+            or char == _ZWJ
+            or unicodedata.category(char) in ("Mn", "Mc", "Me")
+            or 0xFE00 <= code <= 0xFE0F  # Variation selectors
+            or 0x1F3FB <= code <= 0x1F3FF  # Skin tone modifiers
+            or 0xE0020 <= code <= 0xE007F  # Tag characters (subdivision flags)
+            or (
+                _is_regional_indicator(char)
+                and _ends_with_single_flag_half(clusters[-1])
+            )
+        ):
+            clusters[-1] += char
+        else:
+            clusters.append(char)
+    return clusters
+
+
+def _is_regional_indicator(char: str) -> bool:
+    return 0x1F1E6 <= ord(char) <= 0x1F1FF
+
+
+def _ends_with_single_flag_half(cluster: str) -> bool:
+    """Whether a cluster is one regional indicator waiting for its pair."""
+    return len(cluster) == 1 and _is_regional_indicator(cluster)
@@ -2,25 +2,8 @@
 
 import time
 
-
-def _get_wda_session_url(wda_url: str, session_id: str | None, endpoint: str) -> str:
-    """
-    Get the correct WDA URL for a session endpoint.
-
-    Args:
-        wda_url: Base WDA URL.
-        session_id: Optional session ID.
-        endpoint: The endpoint path.
-
-    Returns:
-        Full URL for the endpoint.
-    """
-    base = wda_url.rstrip("/")
-    if session_id:
-        return f"{base}/session/{session_id}/{endpoint}"
-    else:
-        # Try to use WDA endpoints without session when possible
-        return f"{base}/{endpoint}"
+from phone_agent.xctest.client import get_wda_client
+from phone_agent.xctest.gestures import GestureBuilder
 
 
 def type_text(
@@ -43,13 +26,13 @@ def type_text(
         Use tap() to focus on the input field first.
     """
     try:
-        import requests
+        client = get_wda_client(wda_url)
 
-        url = _get_wda_session_url(wda_url, session_id, "wda/keys")
+        url = client.session_url("wda/keys", session_id)
 
         # Send text to WDA
-        response = requests.post(
-            url, json={"value": list(text), "frequency": frequency}, timeout=30, verify=False
+        response = client.post(
+            url, json={"value": list(text), "frequency": frequency}, timeout=30
         )
 
         if response.status_code not in (200, 201):
@@ -77,30 +60,101 @@ def clear_text(
         The input field must be focused before calling this function.
     """
     try:
-        import requests
+        if _clear_active_element(wda_url, session_id):
+            return
 
-        # First, try to get the active element
-        url = _get_wda_session_url(wda_url, session_id, "element/active")
+        # Fallback: send backspace commands
+        _clear_with_backspace(wda_url, session_id)
 
-        response = requests.get(url, timeout=10, verify=False)
+    except ImportError:
+        print("Error: requests library required. Install: pip install requests")
+    except Exception as e:
+        print(f"Error clearing text: {e}")
 
-        if response.status_code == 200:
-            data = response.json()
-            element_id = data.get("value", {}).get("ELEMENT") or data.get("value", {}).get("element-6066-11e4-a52e-4f735466cecf")
 
-            if element_id:
-                # Clear the element
-                clear_url = _get_wda_session_url(wda_url, session_id, f"element/{element_id}/clear")
-                requests.post(clear_url, timeout=10, verify=False)
-                return
+def replace_text(
+    text: str,
+    wda_url: str = "http://localhost:8100",
+    session_id: str | None = None,
+    max_backspaces: int = 100,
+) -> None:
+    """
+    Replace the text in the currently focused input field.
+
+    The field is cleared through its element when WDA reports one (two
+    requests, since its length is unknown), and the text is typed as one W3C
+    key action sequence of whole grapheme clusters. Without an element, up to
+    max_backspaces backspaces go in the same sequence before the text. Falls
+    back to wda/keys only if WDA rejects key actions; after a timeout WDA may
+    still be typing, so nothing is resent.
 
-        # Fallback: send backspace commands
-        _clear_with_backspace(wda_url, session_id)
+    The tap that focused the field was an earlier step and is not repeated:
+    tapping a focused field can move the cursor or open its edit menu.
+
+    Args:
+        text: The text to type.
+        wda_url: WebDriverAgent URL.
+        session_id: Optional WDA session ID.
+        max_backspaces: Maximum number of backspaces to clear with.
+    """
+    try:
+        cleared = _clear_active_element(wda_url, session_id)
+    except Exception as e:
+        print(f"Error clearing text: {e}")
+        cleared = False
 
+    gesture = GestureBuilder(wda_url, session_id)
+    if not cleared:
+        gesture.clear(max_backspaces)
+    try:
+        response = gesture.type(text).send(timeout=30)
     except ImportError:
         print("Error: requests library required. Install: pip install requests")
+        return
     except Exception as e:
-        print(f"Error clearing text: {e}")
+        print(f"Error replacing text: {e}")
+        return
+    if response is None or response.status_code == 200:
+        return
+
+    print(f"Key actions rejected (HTTP {response.status_code}), using wda/keys")
+    if not cleared:
+        _clear_with_backspace(wda_url, session_id, max_backspaces)
+    type_text(text, wda_url, session_id)
+
+
+def _clear_active_element(
+    wda_url: str = "http://localhost:8100",
+    session_id: str | None = None,
+) -> bool:
+    """
+    Clear the focused element through WDA's element API.
+
+    Args:
+        wda_url: WebDriverAgent URL.
+        session_id: Optional WDA session ID.
+
+    Returns:
+        True if WDA reported an active element and cleared it.
+    """
+    client = get_wda_client(wda_url)
+
+    # First, try to get the active element
+    url = client.session_url("element/active", session_id)
+
+    response = client.get(url, timeout=10)
+
+    if response.status_code == 200:
+        data = response.json()
+        element_id = data.get("value", {}).get("ELEMENT") or data.get("value", {}).get("element-6066-11e4-a52e-4f735466cecf")
+
+        if element_id:
+            # Clear the element
+            clear_url = client.session_url(f"element/{element_id}/clear", session_id)
+            response = client.post(clear_url, timeout=10)
+            return response.status_code == 200
+
+    return False
 
 
 def _clear_with_backspace(
@@ -117,17 +171,16 @@ def _clear_with_backspace(
         max_backspaces: Maximum number of backspaces to send.
     """
     try:
-        import requests
+        client = get_wda_client(wda_url)
 
-        url = _get_wda_session_url(wda_url, session_id, "wda/keys")
+        url = client.session_url("wda/keys", session_id)
 
         # Send backspace character multiple times
         backspace_char = "\u0008"  # Backspace Unicode character
-        requests.post(
+        client.post(
             url,
             json={"value": [backspace_char] * max_backspaces},
             timeout=10,
-            verify=False,
         )
 
     except Exception as e:
@@ -152,11 +205,11 @@ def send_keys(
         >>> send_keys(["\n"])  # Send enter key
     """
     try:
-        import requests
+        client = get_wda_client(wda_url)
 
-        url = _get_wda_session_url(wda_url, session_id, "wda/keys")
+        url = client.session_url("wda/keys", session_id)
 
-        requests.post(url, json={"value": keys}, timeout=10, verify=False)
+        client.post(url, json={"value": keys}, timeout=10)
 
     except ImportError:
         print("Error: requests library required. Install: pip install requests")
@@ -193,11 +246,11 @@ def hide_keyboard(
         session_id: Optional WDA session ID.
     """
     try:
-        import requests
+        client = get_wda_client(wda_url)
 
-        url = f"{wda_url.rstrip('/')}/wda/keyboard/dismiss"
+        url = client.url("wda/keyboard/dismiss")
 
-        requests.post(url, timeout=10, verify=False)
+        client.post(url, timeout=10)
 
     except ImportError:
         print("Error: requests library required. Install: pip install requests")
@@ -220,11 +273,11 @@ def is_keyboard_shown(
         True if keyboard is shown, False otherwise.
     """
     try:
-        import requests
+        client = get_wda_client(wda_url)
 
-        url = _get_wda_session_url(wda_url, session_id, "wda/keyboard/shown")
+        url = client.session_url("wda/keyboard/shown", session_id)
 
-        response = requests.get(url, timeout=5, verify=False)
+        response = client.get(url, timeout=5)
 
         if response.status_code == 200:
             data = response.json()
@@ -254,13 +307,11 @@ def set_pasteboard(
         After setting pasteboard, you can simulate paste gesture.
     """
     try:
-        import requests
+        client = get_wda_client(wda_url)
 
-        url = f"{wda_url.rstrip('/')}/wda/setPasteboard"
+        url = client.url("wda/setPasteboard")
 
-        requests.post(
-            url, json={"content": text, "contentType": "plaintext"}, timeout=10, verify=False
-        )
+        client.post(url, json={"content": text, "contentType": "plaintext"}, timeout=10)
 
     except ImportError:
         print("Error: requests library required. Install: pip install requests")
@@ -281,11 +332,11 @@ def get_pasteboard(
         Pasteboard content or None if failed.
     """
     try:
-        import requests
+        client = get_wda_client(wda_url)
 
-        url = f"{wda_url.rstrip('/')}/wda/getPasteboard"
+        url = client.url("wda/getPasteboard")
 
-        response = requests.post(url, timeout=10, verify=False)
+        response = client.post(url, timeout=10)
 
         if response.status_code == 200:
             data = response.json()
@@ -0,0 +1,299 @@
+"""In-memory iOS frames from WebDriverAgent's MJPEG stream."""
+
+import base64
+import http.client
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterator
+from urllib.parse import urlparse
+
+from phone_agent.utils.image import get_image_size
+from phone_agent.xctest.client import get_wda_client
+from phone_agent.xctest.geometry import record_screenshot_size
+from phone_agent.xctest.screenshot import Screenshot
+
+# Running frame sources by WDA URL, for settle detection
+_sources: dict[str, "MJPEGFrameSource"] = {}
+_sources_lock = threading.Lock()
+
+
+@dataclass
+class MJPEGConfig:
+    """Configuration for the WDA MJPEG frame source."""
+
+    port: int = 9100  # WDA mjpegServerPort
+    framerate: int = 10  # appium:mjpegServerFramerate (frames per second)
+    quality: int = 50  # appium:mjpegServerScreenshotQuality (1-100)
+    scaling_factor: int = 100  # appium:mjpegScalingFactor (percent of native size)
+    frame_wait: float = 0.5  # Seconds to wait for a frame newer than requested
+    reconnect_delay: float = 1.0  # Seconds between reconnect attempts
+
+
+class MJPEGFrameSource:
+    """
+    Keeps the latest frame of WDA's MJPEG stream in memory.
+
+    WebDriverAgent serves a continuous multipart JPEG stream on its MJPEG
+    port. A background thread keeps that stream open and holds on to the
+    newest frame, so a screenshot is a memory read instead of a /screenshot
+    request returning a base64 PNG in JSON. Frames are JPEG, which is also
+    much smaller to send to the model.
+
+    WDA only sends a frame when the screen changes, so a frame older than
+    the last action may still be current: get_frame waits briefly for a
+    newer one and otherwise returns the latest.
+
+    Args:
+        wda_url: WebDriverAgent URL; the stream is on the same host.
+        session_id: Optional WDA session ID, used to apply the stream settings.
+        config: MJPEG stream configuration.
+
+    Example:
+        >>> source = MJPEGFrameSource("http://localhost:8100", session_id)
+        >>> source.start()
+        >>> screenshot = source.get_frame(newer_than=last_action_end)
+        >>> source.stop()
+    """
+
+    def __init__(
+        self,
+        wda_url: str = "http://localhost:8100",
+        session_id: str | None = None,
+        config: MJPEGConfig | None = None,
+    ):
+        self.wda_url = wda_url
+        self.session_id = session_id
+        self.config = config or MJPEGConfig()
+        self.host = urlparse(wda_url).hostname or "localhost"
+        self._frame: bytes | None = None
+        self._frame_size: tuple[int, int] = (0, 0)
+        self._frame_time = 0.0
+        self._screenshot: Screenshot | None = None  # Encoded latest frame
+        self._new_frame = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._socket: socket.socket | None = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the reader thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Apply the stream settings and start the reader thread."""
+        if self.running:
+            return
+        if not self.apply_settings():
+            print(
+                "Warning: could not apply the MJPEG settings; the stream keeps its "
+                "current frame rate, quality and scaling"
+            )
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"mjpeg-{self.host}:{self.config.port}", daemon=True
+        )
+        self._thread.start()
+        with _sources_lock:
+            _sources[self.wda_url.rstrip("/")] = self
+
+    def stop(self) -> None:
+        """Stop the reader thread and close the stream."""
+        with _sources_lock:
+            if _sources.get(self.wda_url.rstrip("/")) is self:
+                del _sources[self.wda_url.rstrip("/")]
+        self._stop_event.set()
+        sock = self._socket
+        if sock is not None:
+            try:
+                # Unblocks the reader's recv, which close() alone does not
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def apply_settings(self) -> bool:
+        """
+        Set the stream's frame rate, quality and scaling through WDA settings.
+
+        Returns:
+            True if WDA accepted the settings.
+        """
+        try:
+            client = get_wda_client(self.wda_url)
+            response = client.post(
+                client.session_url("appium/settings", self.session_id),
+                json={
+                    "settings": {
+                        "mjpegServerFramerate": self.config.framerate,
+                        "mjpegServerScreenshotQuality": self.config.quality,
+                        "mjpegScalingFactor": self.config.scaling_factor,
+                    }
+                },
+                timeout=10,
+            )
+            return response.status_code == 200
+        except Exception as e:
+            print(f"Error applying MJPEG settings: {e}")
+            return False
+
+    def latest_jpeg(self) -> bytes | None:
+        """Get the newest JPEG frame as received, without encoding it."""
+        with self._new_frame:
+            return self._frame
+
+    def latest(self) -> Screenshot | None:
+        """Get the newest frame without waiting."""
+        with self._new_frame:
+            if self._frame is None:
+                return None
+            if self._screenshot is None:
+                # Encoded on demand: most streamed frames are never requested
+                width, height = self._frame_size
+                self._screenshot = Screenshot(
+                    base64_data=base64.b64encode(self._frame).decode("ascii"),
+                    width=width,
+                    height=height,
+                    mime_type="image/jpeg",
+                )
+                # Frames may be scaled (mjpegScalingFactor); taps follow them
+                record_screenshot_size(self.wda_url, width, height)
+            return self._screenshot
+
+    def get_frame(
+        self, newer_than: float | None = None, timeout: float | None = None
+    ) -> Screenshot | None:
+        """
+        Get the newest frame, preferring one received after a given time.
+
+        Args:
+            newer_than: Wall-clock time (time.time()), e.g. when the last
+                action finished. None accepts any frame.
+            timeout: Seconds to wait for a newer frame before settling for
+                the latest (default: config.frame_wait).
+
+        Returns:
+            The frame, or None if no frame has been received yet.
+        """
+        if timeout is None:
+            timeout = self.config.frame_wait
+        deadline = time.monotonic() + timeout
+        with self._new_frame:
+            while self._frame is None or (
+                newer_than is not None and self._frame_time < newer_than
+            ):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.running:
+                    break
+                self._new_frame.wait(remaining)
+        return self.latest()
+
+    def _run(self) -> None:
+        """Reader loop, reconnecting when the stream drops."""
+        last_error: Exception | None = None
+        while not self._stop_event.is_set():
+            # Plain http.client: its reads return as soon as a line or a frame
+            # is in, where requests' raw stream waits to fill its buffer
+            connection = http.client.HTTPConnection(
+                self.host, self.config.port, timeout=3
+            )
+            try:
+                connection.connect()
+                # No read timeout: frames only come when the screen changes
+                self._socket = connection.sock
+                self._socket.settimeout(None)
+                connection.request("GET", "/")
+                response = connection.getresponse()
+                if response.status != 200:
+                    raise ConnectionError(f"MJPEG stream returned {response.status}")
+                for frame in _read_parts(response):
+                    if self._stop_event.is_set():
+                        break
+                    self._set_frame(frame)
+                last_error = None
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                if type(e) is not type(last_error):
+                    print(f"MJPEG stream error: {e}")
+                last_error = e
+            finally:
+                self._socket = None
+                connection.close()
+            self._stop_event.wait(self.config.reconnect_delay)
+
+    def _set_frame(self, frame: bytes) -> None:
+        """Publish a received JPEG frame."""
+        size = get_image_size(frame)
+        if size is None:
+            return  # Not a JPEG, or truncated
+        with self._new_frame:
+            self._frame = frame
+            self._frame_size = size
+            self._frame_time = time.time()
+            self._screenshot = None
+            self._new_frame.notify_all()
+
+
+def get_mjpeg_source(wda_url: str = "http://localhost:8100") -> MJPEGFrameSource | None:
+    """
+    Get the running MJPEG frame source of a device, if any.
+
+    Args:
+        wda_url: WebDriverAgent URL.
+
+    Returns:
+        The MJPEGFrameSource, or None if no stream runs for the device.
+    """
+    with _sources_lock:
+        return _sources.get(wda_url.rstrip("/"))
+
+
+def _read_parts(stream: http.client.HTTPResponse) -> Iterator[bytes]:
+    """
+    Split a multipart/x-mixed-replace stream into part bodies.
+
+    Uses each part's Content-Length when present, otherwise reads up to the
+    JPEG end-of-image marker or the next boundary line.
+    """
+    line = stream.readline()
+    while line:
+        if not line.startswith(b"--"):
+            line = stream.readline()
+            continue
+
+        headers = {}
+        while True:
+            line = stream.readline()
+            if not line:
+                return
+            line = line.strip()
+            if not line:
+                break
+            name, _, value = line.partition(b":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = headers.get(b"content-length")
+        if length is not None:
+            body = stream.read(int(length))
+            if len(body) < int(length):
+                return
+            yield body
+            line = stream.readline()
+            continue
+
+        # No length: the part ends at the JPEG end-of-image marker
+        chunks = []
+        line = stream.readline()
+        while line and not line.startswith(b"--"):
+            chunks.append(line)
+            if line.endswith(b"\xff\xd9\r\n"):
+                break
+            line = stream.readline()
+        if chunks:
+            yield b"".join(chunks).rstrip(b"\r\n")
+        if not line.startswith(b"--"):
+            line = stream.readline()
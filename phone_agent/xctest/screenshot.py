@@ -10,6 +10,16 @@ from io import BytesIO
 
 from PIL import Image
 
+from phone_agent.config.timing import TIMING_CONFIG
+from phone_agent.utils.image import (
+    black_image_base64,
+    get_base64_image_size,
+    get_image_size,
+)
+from phone_agent.utils.settle import make_thumbnail
+from phone_agent.xctest.client import get_wda_client
+from phone_agent.xctest.geometry import record_screenshot_size
+
 
 @dataclass
 class Screenshot:
@@ -19,6 +29,7 @@ class Screenshot:
     width: int
     height: int
     is_sensitive: bool = False
+    mime_type: str = "image/png"
 
 
 def get_screenshot(
@@ -45,18 +56,49 @@ def get_screenshot(
     """
     # Try WebDriverAgent first (preferred method)
     screenshot = _get_screenshot_wda(wda_url, session_id, timeout)
-    if screenshot:
-        return screenshot
 
     # Fallback to idevicescreenshot
-    screenshot = _get_screenshot_idevice(device_id, timeout)
+    if not screenshot:
+        screenshot = _get_screenshot_idevice(device_id, timeout)
+
     if screenshot:
+        # Coordinates the model returns are in this screenshot's pixels
+        record_screenshot_size(wda_url, screenshot.width, screenshot.height)
         return screenshot
 
     # Return fallback black image
     return _create_fallback_screenshot(is_sensitive=False)
 
 
+def get_settle_frame(
+    wda_url: str = "http://localhost:8100", session_id: str | None = None
+) -> Image.Image | None:
+    """
+    Capture a small grayscale frame for settle detection.
+
+    Reads the latest frame of the device's MJPEG stream from memory. Without
+    a running stream every frame would be a full /screenshot request, so
+    None is returned and the fixed delay is used instead.
+
+    Args:
+        wda_url: WebDriverAgent URL.
+        session_id: Optional WDA session ID.
+
+    Returns:
+        Grayscale thumbnail, or None if no MJPEG stream runs for the device.
+    """
+    # Imported lazily: the MJPEG module builds on this one
+    from phone_agent.xctest.mjpeg import get_mjpeg_source
+
+    source = get_mjpeg_source(wda_url)
+    frame = source.latest_jpeg() if source is not None else None
+    if frame is None:
+        return None
+    return make_thumbnail(
+        Image.open(BytesIO(frame)), TIMING_CONFIG.settle.thumbnail_width
+    )
+
+
 def _get_screenshot_wda(
     wda_url: str, session_id: str | None, timeout: int
 ) -> Screenshot | None:
@@ -72,21 +114,20 @@ def _get_screenshot_wda(
         Screenshot object or None if failed.
     """
     try:
-        import requests
+        client = get_wda_client(wda_url)
 
-        url = f"{wda_url.rstrip('/')}/screenshot"
+        url = client.url("screenshot")
 
-        response = requests.get(url, timeout=timeout, verify=False)
+        response = client.get(url, timeout=timeout)
 
         if response.status_code == 200:
             data = response.json()
             base64_data = data.get("value", "")
 
-            if base64_data:
-                # Decode to get dimensions
-                img_data = base64.b64decode(base64_data)
-                img = Image.open(BytesIO(img_data))
-                width, height = img.size
+            # The size comes from the PNG header; the image is never decoded
+            size = get_base64_image_size(base64_data) if base64_data else None
+            if size is not None:
+                width, height = size
 
                 return Screenshot(
                     base64_data=base64_data,
@@ -131,19 +172,25 @@ def _get_screenshot_idevice(
         )
 
         if result.returncode == 0 and os.path.exists(temp_path):
-            # Read and encode image
-            img = Image.open(temp_path)
-            width, height = img.size
-
-            buffered = BytesIO()
-            img.save(buffered, format="PNG")
-            base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
-            # Cleanup
+            with open(temp_path, "rb") as f:
+                data = f.read()
             os.remove(temp_path)
 
+            size = get_image_size(data)
+            if size is None:
+                # Older iOS versions produce TIFF; re-encode those as PNG
+                img = Image.open(BytesIO(data))
+                size = img.size
+                buffered = BytesIO()
+                img.save(buffered, format="PNG")
+                data = buffered.getvalue()
+            width, height = size
+
             return Screenshot(
-                base64_data=base64_data, width=width, height=height, is_sensitive=False
+                base64_data=base64.b64encode(data).decode("ascii"),
+                width=width,
+                height=height,
+                is_sensitive=False,
             )
 
     except FileNotFoundError:
@@ -169,13 +216,8 @@ def _create_fallback_screenshot(is_sensitive: bool) -> Screenshot:
     # Default iPhone screen size (iPhone 14 Pro)
     default_width, default_height = 1179, 2556
 
-    black_img = Image.new("RGB", (default_width, default_height), color="black")
-    buffered = BytesIO()
-    black_img.save(buffered, format="PNG")
-    base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
     return Screenshot(
-        base64_data=base64_data,
+        base64_data=black_image_base64(default_width, default_height),
         width=default_width,
         height=default_height,
         is_sensitive=is_sensitive,
@@ -0,0 +1,181 @@
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from phone_agent.model.stream import (  # noqa: E402
+    ACTION_MARKERS,
+    ActionCompletionTracker,
+    MarkerMatcher,
+)
+
+THINKING_WORDS = (
+    "the search box is at the top of the screen so I should tap it first and "
+    "then type the keyword, after that the results page will load and I can "
+    "pick the first item; finishing the task needs a few more steps ( [ { "
+).split(" ")
+
+
+def synthesize_stream(thinking_chars: int, seed: int) -> list[str]:
+    """Build a long-thinking response split into token-sized chunks."""
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < thinking_chars:
+        word = rng.choice(THINKING_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    text = (
+        "<think>"
+        + " ".join(words)
+        + '</think><answer>do(action="Type", text="coffee (large) \\"to go\\"")'
+        + "</answer>"
+    )
+    chunks = []
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, 6)
+        chunks.append(text[i : i + size])
+        i += size
+    return chunks
+
+
+def load_stream(path: str) -> list[str]:
+    """Load a recorded stream: a JSON list of content deltas."""
+    with open(path, "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+    if not isinstance(chunks, list) or not all(isinstance(c, str) for c in chunks):
+        raise ValueError(f"{path} must contain a JSON list of strings")
+    return chunks
+
+
+def legacy_parse(chunks: list[str]) -> str:
+    """The previous loop: string concatenation and a prefix scan per chunk."""
+    raw_content = ""
+    buffer = ""
+    in_action_phase = False
+    for content in chunks:
+        raw_content += content
+        if not in_action_phase:
+            buffer += content
+            for marker in ACTION_MARKERS:
+                if marker in buffer:
+                    in_action_phase = True
+                    break
+        if not in_action_phase:
+            is_potential_marker = False
+            for marker in ACTION_MARKERS:
+                for i in range(1, len(marker)):
+                    if buffer.endswith(marker[:i]):
+                        is_potential_marker = True
+                        break
+                if is_potential_marker:
+                    break
+            if not is_potential_marker:
+                buffer = ""
+    return raw_content
+
+
+def incremental_parse(chunks: list[str]) -> str:
+    """The current loop: marker automaton, chunk-fed tracker, list accumulation."""
+    thinking_parts = []
+    action_parts = []
+    matcher = MarkerMatcher(ACTION_MARKERS)
+    tracker = ActionCompletionTracker()
+    for content in chunks:
+        if matcher.matched is None:
+            emitted, marker = matcher.feed(content)
+            thinking_parts.append(emitted)
+            if marker is None:
+                continue
+            action_parts.append(marker)
+            content = matcher.remainder
+        action_parts.append(content)
+        body_end = tracker.feed(content)
+        if body_end is not None:
+            action_text = "".join(action_parts)
+            action_parts = [action_text[: len(matcher.matched) + body_end]]
+            break
+    if matcher.matched is None:
+        thinking_parts.append(matcher.flush())
+    return "".join(thinking_parts) + "".join(action_parts)
+
+
+def measure(parse, chunks: list[str], repeat: int) -> float:
+    """Best wall time of `repeat` runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(chunks)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmark for the streaming response parser",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Usage examples:
+  python scripts/benchmark_stream_parser.py
+  python scripts/benchmark_stream_parser.py --thinking-chars 2000 20000 100000
+  python scripts/benchmark_stream_parser.py --stream-file recorded_stream.json
+        """,
+    )
+
+    parser.add_argument(
+        "--thinking-chars",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 50000],
+        help="Thinking lengths of the synthesized streams (default: 1000 10000 50000)",
+    )
+
+    parser.add_argument(
+        "--stream-file",
+        type=str,
+        action="append",
+        default=[],
+        help="Recorded stream to replay, as a JSON list of content deltas (repeatable)",
+    )
+
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Runs per stream; the best time is reported (default: 5)",
+    )
+
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Random seed for synthesized streams"
+    )
+
+    args = parser.parse_args()
+
+    streams = [(path, load_stream(path)) for path in args.stream_file]
+    if not streams:
+        streams = [
+            (f"synthetic {n} chars", synthesize_stream(n, args.seed))
+            for n in args.thinking_chars
+        ]
+
+    print(
+        f"{'stream':<28}{'chunks':>8}{'legacy ms':>12}{'current ms':>12}{'speedup':>9}"
+    )
+    print("-" * 69)
+    for name, chunks in streams:
+        legacy = legacy_parse(chunks)
+        current = incremental_parse(chunks)
+        if not legacy.startswith(current):
+            print(f"{name}: parsers disagree, skipping")
+            continue
+        legacy_ms = measure(legacy_parse, chunks, args.repeat)
+        current_ms = measure(incremental_parse, chunks, args.repeat)
+        print(
+            f"{name:<28}{len(chunks):>8}{legacy_ms:>12.2f}{current_ms:>12.2f}"
+            f"{legacy_ms / current_ms:>8.1f}x"
+        )
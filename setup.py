@@ -32,8 +32,17 @@ setup(
     install_requires=[
         "Pillow>=12.0.0",
         "openai>=2.9.0",
+        "httpx>=0.23.0",
     ],
     extras_require={
+        # NumPy path for PHONE_AGENT_SCREENSHOT_MODE=raw
+        "raw-capture": [
+            "numpy>=1.24.0",
+        ],
+        # HTTP/2 for the model connection pool (HTTPPoolConfig.http2)
+        "http2": [
+            "httpx[http2]>=0.23.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "black>=23.0.0",
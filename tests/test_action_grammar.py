@@ -0,0 +1,52 @@
+"""Tests for the guided-decoding grammar built from the handler's action tables."""
+
+import re
+
+import pytest
+
+from phone_agent.actions.grammar import guided_decoding_params, handler_arguments
+from phone_agent.actions.handler import ActionHandler, parse_action
+
+
+def test_arguments_cover_every_handler():
+    assert handler_arguments(ActionHandler).keys() == ActionHandler.HANDLERS.keys()
+
+
+def test_mismatched_tables_are_rejected():
+    class ExtraAction(ActionHandler):
+        HANDLERS = {**ActionHandler.HANDLERS, "Zoom": "_handle_zoom"}
+
+    with pytest.raises(ValueError, match="missing \\['Zoom'\\]"):
+        guided_decoding_params("regex", ExtraAction)
+
+
+def test_regex_accepts_every_action_shape():
+    pattern = guided_decoding_params("regex", ActionHandler)["guided_regex"]
+    for response in (
+        'thinking do(action="Tap", element=[500, 300])',
+        'do(action="Swipe", start=[1,2], end=[3,4])\n</answer>',
+        'do(action="Type", text="say "hi"")',
+        'do(action="Back")',
+        'finish(message="done")',
+    ):
+        assert re.fullmatch(pattern, response), response
+
+
+def test_well_formed_actions_parse_without_ast():
+    assert parse_action('do(action="Long Press", element=[1, 2])') == {
+        "_metadata": "do",
+        "action": "Long Press",
+        "element": [1, 2],
+    }
+    assert parse_action('do(action="Type_Name", text="a "b" c")') == {
+        "_metadata": "do",
+        "action": "Type",
+        "text": 'a "b" c',
+    }
+
+
+def test_ios_arguments_cover_every_handler():
+    from phone_agent.actions.handler_ios import IOSActionHandler
+
+    arguments = handler_arguments(IOSActionHandler)
+    assert arguments.keys() == IOSActionHandler.HANDLERS.keys()
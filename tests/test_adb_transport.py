@@ -0,0 +1,244 @@
+"""Tests for the native adb server protocol client against a fake adb server."""
+
+import socket
+import struct
+import subprocess
+import threading
+
+import pytest
+
+import phone_agent.adb.transport as transport_module
+from phone_agent.adb.transport import (
+    ADBProtocolError,
+    ADBServiceOpenError,
+    ADBTransport,
+    run_adb_shell,
+)
+
+SERIAL = "emulator-5554"
+SCREENCAP = bytes(range(256)) * 1024  # Binary output with every byte value
+REMOTE_FILE = b"\x89PNG" + b"x" * (150 * 1024)  # Spans several sync chunks
+
+
+def _read_exact(conn: socket.socket, size: int) -> bytes:
+    buf = b""
+    while len(buf) < size:
+        chunk = conn.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("client closed")
+        buf += chunk
+    return buf
+
+
+def _read_request(conn: socket.socket) -> str:
+    length = int(_read_exact(conn, 4), 16)
+    return _read_exact(conn, length).decode()
+
+
+def _fail(conn: socket.socket, message: str) -> None:
+    payload = message.encode()
+    conn.sendall(b"FAIL" + b"%04x" % len(payload) + payload)
+
+
+def _shell_packet(packet_id: int, data: bytes) -> bytes:
+    return struct.pack("<BI", packet_id, len(data)) + data
+
+
+class FakeADBServer:
+    """Minimal adb server speaking the smart-socket protocol on a local port."""
+
+    def __init__(self, features: str = "shell_v2,cmd"):
+        self.features = features
+        self.requests: list[str] = []
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self.port = self._server.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._server.close()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with conn:
+                try:
+                    self._handle(conn)
+                except ConnectionError:
+                    pass
+
+    def _handle(self, conn: socket.socket) -> None:
+        request = _read_request(conn)
+        self.requests.append(request)
+
+        if request in ("host:features", f"host-serial:{SERIAL}:features"):
+            payload = self.features.encode()
+            conn.sendall(b"OKAY" + b"%04x" % len(payload) + payload)
+            return
+
+        if request.startswith("host:transport:"):
+            if request != f"host:transport:{SERIAL}":
+                _fail(conn, f"device '{request.rsplit(':', 1)[-1]}' not found")
+                return
+        elif request != "host:transport-any":
+            _fail(conn, f"unknown host service: {request}")
+            return
+        conn.sendall(b"OKAY")
+
+        service = _read_request(conn)
+        self.requests.append(service)
+        conn.sendall(b"OKAY")
+
+        if service.startswith("shell,v2,raw:"):
+            command = service.split(":", 1)[1]
+            if command == "reset":
+                # Drop the connection after the command started
+                conn.sendall(_shell_packet(1, b"partial"))
+                conn.setsockopt(
+                    socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+                )
+            elif command == "false":
+                conn.sendall(_shell_packet(2, b"oops\n") + _shell_packet(3, bytes([1])))
+            else:
+                conn.sendall(
+                    _shell_packet(1, b"out-1 ")
+                    + _shell_packet(2, b"err\n")
+                    + _shell_packet(1, b"out-2\n")
+                    + _shell_packet(3, bytes([0]))
+                )
+        elif service.startswith("shell:"):
+            conn.sendall(b"merged output\n")
+        elif service.startswith("exec:"):
+            conn.sendall(SCREENCAP)
+        elif service == "sync:":
+            self._handle_sync(conn)
+
+    def _handle_sync(self, conn: socket.socket) -> None:
+        command = _read_exact(conn, 4)
+        assert command == b"RECV"
+        (length,) = struct.unpack("<I", _read_exact(conn, 4))
+        path = _read_exact(conn, length).decode()
+        self.requests.append(f"RECV {path}")
+
+        if path != "/sdcard/tmp.png":
+            message = b"No such file or directory"
+            conn.sendall(b"FAIL" + struct.pack("<I", len(message)) + message)
+            return
+        for start in range(0, len(REMOTE_FILE), 64 * 1024):
+            chunk = REMOTE_FILE[start : start + 64 * 1024]
+            conn.sendall(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+        conn.sendall(b"DONE" + struct.pack("<I", 0))
+        assert _read_exact(conn, 8) == b"QUIT" + struct.pack("<I", 0)
+
+
+@pytest.fixture
+def server():
+    fake = FakeADBServer()
+    yield fake
+    fake.close()
+
+
+@pytest.fixture
+def transport(server):
+    return ADBTransport(host="127.0.0.1", port=server.port, timeout=5)
+
+
+def test_host_transport_selects_device(server, transport):
+    transport.exec_out(SERIAL, "true")
+    assert server.requests[-2:] == [f"host:transport:{SERIAL}", "exec:true"]
+
+    transport.exec_out(None, "true")
+    assert server.requests[-2:] == ["host:transport-any", "exec:true"]
+
+
+def test_host_transport_unknown_device_raises(transport):
+    with pytest.raises(ADBProtocolError, match="not found"):
+        transport.exec_out("missing-device", "true")
+
+
+def test_shell_v2_splits_stdout_and_stderr(server, transport):
+    result = transport.shell(SERIAL, "echo hi")
+
+    assert result.returncode == 0
+    assert result.stdout == b"out-1 out-2\n"
+    assert result.stderr == b"err\n"
+    assert server.requests[-1] == "shell,v2,raw:echo hi"
+
+
+def test_shell_v2_exit_code(transport):
+    result = transport.shell(SERIAL, "false")
+
+    assert result.returncode == 1
+    assert result.stdout == b""
+    assert result.stderr == b"oops\n"
+
+
+def test_shell_without_v2_uses_legacy_service():
+    server = FakeADBServer(features="cmd")
+    try:
+        transport = ADBTransport(host="127.0.0.1", port=server.port, timeout=5)
+        result = transport.shell(SERIAL, "echo hi")
+    finally:
+        server.close()
+
+    assert result.returncode == 0
+    assert result.stdout == b"merged output\n"
+    assert server.requests[-1] == "shell:echo hi"
+
+
+def test_features_are_cached(server, transport):
+    transport.shell(SERIAL, "echo hi")
+    transport.shell(SERIAL, "echo hi")
+
+    assert server.requests.count(f"host-serial:{SERIAL}:features") == 1
+
+
+def test_exec_returns_binary_output(transport):
+    assert transport.exec_out(SERIAL, "screencap -p") == SCREENCAP
+
+
+def test_sync_recv_reads_all_chunks(server, transport):
+    assert transport.pull(SERIAL, "/sdcard/tmp.png") == REMOTE_FILE
+    assert server.requests[-1] == "RECV /sdcard/tmp.png"
+
+
+def test_sync_recv_failure_raises(transport):
+    with pytest.raises(ADBProtocolError, match="No such file"):
+        transport.pull(SERIAL, "/sdcard/missing.png")
+
+
+@pytest.fixture
+def native_shell(server, monkeypatch):
+    """run_adb_shell on the fake server, recording subprocess fallbacks."""
+    fallbacks = []
+    monkeypatch.setattr(transport_module, "_NATIVE_ENABLED", True)
+    monkeypatch.setattr(
+        transport_module,
+        "_transport",
+        ADBTransport(host="127.0.0.1", port=server.port, timeout=5),
+    )
+    monkeypatch.setattr(
+        transport_module.subprocess,
+        "run",
+        lambda args, **kwargs: (
+            fallbacks.append(args)
+            or subprocess.CompletedProcess(args, 0, b"fallback\n", b"")
+        ),
+    )
+    return fallbacks
+
+
+def test_service_open_failure_falls_back_to_adb_binary(native_shell):
+    result = run_adb_shell("missing-device", ["echo", "hi"])
+    assert result.stdout == "fallback\n"
+    assert native_shell == [["adb", "-s", "missing-device", "shell", "echo", "hi"]]
+
+
+def test_failure_after_service_open_is_raised_not_rerun(native_shell):
+    with pytest.raises((OSError, ADBProtocolError)) as raised:
+        run_adb_shell(SERIAL, ["reset"])
+    assert not isinstance(raised.value, ADBServiceOpenError)
+    assert native_shell == []
@@ -0,0 +1,41 @@
+"""Tests for the shared frame ring and the capture service."""
+
+import time
+import uuid
+
+import pytest
+
+from phone_agent.capture import CaptureConfig, CaptureService, SharedFrameRing
+
+
+def _ring_name() -> str:
+    return f"phone_agent_test_{uuid.uuid4().hex[:8]}"
+
+
+def test_create_refuses_a_ring_in_use():
+    name = _ring_name()
+    ring = SharedFrameRing.create(name, slot_count=1, slot_size=16)
+    try:
+        with pytest.raises(FileExistsError, match="in use"):
+            SharedFrameRing.create(name, slot_count=1, slot_size=16)
+        # The live ring was left in place
+        ring.write("aGk=", 1, 1, captured_at=1.0)
+        assert ring.read_latest().base64_data == "aGk="
+    finally:
+        ring.close()
+
+
+def test_get_frame_returns_once_a_capture_fails():
+    def capture():
+        raise OSError("device offline")
+
+    config = CaptureConfig(slot_count=1, slot_size=16, ring_name=_ring_name())
+    service = CaptureService(capture_fn=capture, config=config)
+    service.start()
+    try:
+        start = time.monotonic()
+        assert service.get_frame(newer_than=time.time(), timeout=10) is None
+        assert time.monotonic() - start < 2
+        assert isinstance(service.last_error, OSError)
+    finally:
+        service.stop()
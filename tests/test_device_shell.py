@@ -0,0 +1,66 @@
+"""Tests for persistent shell sessions, with and without a PTY."""
+
+import shutil
+import subprocess
+
+import pytest
+
+from phone_agent.utils.shell import DeviceShell, DeviceShells
+
+SHELLS = [pytest.param(["sh"], id="pipe")]
+if shutil.which("script"):
+    # `script` puts an interactive shell on a PTY, like `hdc shell`
+    SHELLS.append(pytest.param(["script", "-qfc", "sh -i", "/dev/null"], id="pty"))
+
+
+@pytest.fixture(params=SHELLS)
+def shell(request):
+    session = DeviceShell(request.param, timeout=5)
+    yield session
+    session.close()
+
+
+def test_output_and_exit_code(shell):
+    result = shell.run("echo hello; echo world")
+    assert result.stdout == "hello\nworld\n"
+    assert result.returncode == 0
+
+    assert shell.run("exit_with() { return $1; }; exit_with 3").returncode == 3
+
+
+def test_output_without_trailing_newline(shell):
+    assert shell.run("printf abc").stdout == "abc"
+
+
+def test_session_is_reused(shell):
+    shell.run("MARKER=kept")
+    assert shell.run("echo $MARKER").stdout == "kept\n"
+
+
+def _recording_fallback(calls):
+    def run_once(device_id, args, timeout):
+        calls.append(args)
+        return subprocess.CompletedProcess(args, 0, "one-shot\n", "")
+
+    return run_once
+
+
+def test_registry_falls_back_when_the_shell_cannot_start():
+    calls = []
+    shells = DeviceShells(lambda _: ["/nonexistent/shell"], _recording_fallback(calls))
+    result = shells.run(None, ["echo", "hi"])
+    assert result.stdout == "one-shot\n"
+    assert calls == [["echo", "hi"]]
+
+
+def test_registry_does_not_rerun_a_command_cut_off_midway():
+    calls = []
+    shells = DeviceShells(lambda _: ["sh"], _recording_fallback(calls))
+    try:
+        with pytest.raises(EOFError):
+            shells.run(None, ["echo", "started;", "exit"])
+        assert calls == []
+        # The next command gets a fresh session
+        assert shells.run(None, ["echo", "again"]).stdout == "again\n"
+    finally:
+        shells.close()
@@ -0,0 +1,26 @@
+"""Tests for W3C key actions built by GestureBuilder."""
+
+from phone_agent.xctest.gestures import BACKSPACE_KEY, GestureBuilder
+
+
+def _typed_keys(gesture: GestureBuilder) -> list[str]:
+    (keyboard,) = gesture.build()["actions"]
+    return [a["value"] for a in keyboard["actions"] if a["type"] == "keyDown"]
+
+
+def test_type_keeps_grapheme_clusters_together():
+    text = "a👨‍👩‍👧🇯🇵👍🏽é❤️1️⃣"
+    assert _typed_keys(GestureBuilder().type(text)) == [
+        "a",
+        "👨‍👩‍👧",
+        "🇯🇵",
+        "👍🏽",
+        "é",
+        "❤️",
+        "1️⃣",
+    ]
+
+
+def test_clear_then_type_is_one_sequence():
+    gesture = GestureBuilder().clear(2).type("hi")
+    assert _typed_keys(gesture) == [BACKSPACE_KEY, BACKSPACE_KEY, "h", "i"]
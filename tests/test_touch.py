@@ -0,0 +1,51 @@
+"""Tests for the sendevent touch backend's gesture scripts."""
+
+import codecs
+import struct
+
+from phone_agent.adb import touch
+
+
+def _screen(event_size: int) -> touch.TouchScreen:
+    return touch.TouchScreen(
+        path="/dev/input/event2",
+        x_min=0,
+        x_max=1079,
+        y_min=0,
+        y_max=2399,
+        screen_width=1080,
+        screen_height=2400,
+        has_slot=True,
+        event_size=event_size,
+    )
+
+
+def test_each_report_is_one_print():
+    ts = _screen(event_size=24)
+    commands = touch._commands(ts, touch._down(ts, 10, 20) + ["sleep 0.1"])
+    assert len(commands) == 2 and commands[1] == "sleep 0.1"
+    assert commands[0].startswith("print -n '") and commands[0].endswith(ts.path)
+
+    data = codecs.escape_decode(commands[0].split("'")[1])[0]
+    events = [
+        struct.unpack_from("<qqHHi", data, i)[2:] for i in range(0, len(data), 24)
+    ]
+    assert events[0] == (3, 47, 0)  # ABS_MT_SLOT 0
+    assert events[-1] == (0, 0, 0)  # SYN_REPORT
+
+
+def test_without_print_each_event_is_a_sendevent():
+    ts = _screen(event_size=0)
+    assert touch._commands(ts, touch._up(ts)) == [
+        f"sendevent {ts.path} 3 57 4294967295",
+        f"sendevent {ts.path} 0 0 0",
+    ]
+
+
+def test_turned_screenshot_drops_the_cached_rotation(monkeypatch):
+    monkeypatch.setitem(touch._touch_screens, "dev", _screen(event_size=0))
+    monkeypatch.setitem(touch._rotations, "dev", 0)
+    touch.note_screen_size("dev", 1080, 2400)
+    assert touch._rotations["dev"] == 0
+    touch.note_screen_size("dev", 2400, 1080)
+    assert "dev" not in touch._rotations